@@ -1,6 +1,16 @@
-from elog.logbook import Logbook
+from elog.logbook import Logbook, BulkResult
 from elog.logbook import LogbookError, LogbookAuthenticationError, LogbookServerProblem, LogbookMessageRejected, \
     LogbookInvalidMessageID, LogbookInvalidAttachmentType
+from elog.message import Message
+from elog.resultset import ResultSet
+from elog.sequence import MessageSequence
+from elog.server import LogbookServer
+from elog.instrumentation import StatsCollector, LogTracer
+from elog.transport import Transport, RequestsTransport, RecordingTransport, ReplayTransport
+from elog.index import SearchIndex
+from elog.cache import AttachmentCache
+from elog.crawl import crawl, CrawlProgress
+from elog.replicate import replicate, ReplicationResult, StageStats
 
 
 def open(*args, **kwargs):
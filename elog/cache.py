@@ -0,0 +1,160 @@
+import hashlib
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+
+
+class AttachmentCache(object):
+    """
+    Persistent cache of downloaded attachments. Elog never changes the content behind an attachment url (the file
+    name contains the upload time), so cached content never gets stale. Content is stored once per sha256 digest
+    in <directory>/blobs, the index (url --> digest) in an SQLite database. The cache can be shared by threads and
+    processes. If the content exceeds max_bytes, least recently used attachments are evicted.
+
+        cache = elog.AttachmentCache(os.path.expanduser('~/.cache/elog'), max_bytes=2 * 1024 ** 3)
+        logbook.use_attachment_cache(cache)
+        logbook.download_attachment(url)  # downloaded only once
+        print(cache.stats())
+    """
+
+    def __init__(self, directory, max_bytes=1024 ** 3):
+        """
+        :param directory: directory of the cache (created if it does not exist)
+        :param max_bytes: maximal size of the cached content in bytes
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        os.makedirs(os.path.join(directory, 'blobs'), exist_ok=True)
+        self._db = sqlite3.connect(os.path.join(directory, 'index.sqlite'), timeout=60, check_same_thread=False,
+                                   isolation_level=None)
+        with self._lock:
+            self._db.execute('PRAGMA journal_mode=WAL')
+            self._db.execute('CREATE TABLE IF NOT EXISTS attachments (url TEXT PRIMARY KEY, digest TEXT, '
+                             'size INTEGER, last_used REAL)')
+            self._db.execute('CREATE INDEX IF NOT EXISTS attachments_last_used ON attachments (last_used)')
+
+    def __getstate__(self):
+        # Pickled by its location, the copy opens the same cache
+        return {'directory': self.directory, 'max_bytes': self.max_bytes}
+
+    def __setstate__(self, state):
+        self.__init__(state['directory'], state['max_bytes'])
+
+    def get(self, url):
+        """
+        :return: cached content of the attachment or None
+        """
+        with self._lock:
+            row = self._db.execute('SELECT digest FROM attachments WHERE url = ?', (url,)).fetchone()
+            if row is not None:
+                self._db.execute('UPDATE attachments SET last_used = ? WHERE url = ?', (time.time(), url))
+        content = None
+        if row is not None:
+            try:
+                with open(self._blob_path(row[0]), 'rb') as blob:
+                    content = blob.read()
+            except FileNotFoundError:
+                # Evicted by other process in the meantime
+                pass
+
+        with self._lock:
+            if content is None:
+                self._misses += 1
+            else:
+                self._hits += 1
+        return content
+
+    def put(self, url, content):
+        """
+        Stores content of the attachment and evicts least recently used attachments if the cache is too big.
+        Content larger than max_bytes is not stored.
+        """
+        if len(content) > self.max_bytes:
+            return
+        digest = hashlib.sha256(content).hexdigest()
+
+        # Blobs are written and removed only within the write transaction, so a blob cannot be evicted by other
+        # process between writing it and referencing it from the index.
+        with self._lock:
+            self._db.execute('BEGIN IMMEDIATE')
+            try:
+                self._write_blob(digest, content)
+                self._db.execute('INSERT OR REPLACE INTO attachments (url, digest, size, last_used) '
+                                 'VALUES (?, ?, ?, ?)', (url, digest, len(content), time.time()))
+                self._remove_blobs(self._evict())
+                self._db.execute('COMMIT')
+            except BaseException:
+                self._db.execute('ROLLBACK')
+                raise
+
+    def stats(self):
+        """
+        :return: dictionary with 'hits', 'misses', 'hit_ratio' (of this instance) and 'entries', 'bytes' (whole cache)
+        """
+        with self._lock:
+            entries = self._db.execute('SELECT COUNT(*) FROM attachments').fetchone()[0]
+            size = self._total_size()
+            hits, misses = self._hits, self._misses
+        return {'hits': hits, 'misses': misses, 'hit_ratio': hits / (hits + misses) if hits + misses else 0.0,
+                'entries': entries, 'bytes': size}
+
+    def clear(self):
+        """ Removes all cached attachments."""
+        with self._lock:
+            self._db.execute('BEGIN IMMEDIATE')
+            try:
+                digests = [digest for (digest,) in self._db.execute('SELECT DISTINCT digest FROM attachments')]
+                self._remove_blobs(digests)
+                self._db.execute('DELETE FROM attachments')
+                self._db.execute('COMMIT')
+            except BaseException:
+                self._db.execute('ROLLBACK')
+                raise
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+    def _evict(self):
+        """ Removes least recently used entries until the size fits. Returns digests which are not used anymore."""
+        evicted = list()
+        size = self._total_size()
+        while size > self.max_bytes:
+            url, digest, blob_size = self._db.execute('SELECT url, digest, size FROM attachments '
+                                                      'ORDER BY last_used LIMIT 1').fetchone()
+            self._db.execute('DELETE FROM attachments WHERE url = ?', (url,))
+            if self._db.execute('SELECT 1 FROM attachments WHERE digest = ?', (digest,)).fetchone() is None:
+                evicted.append(digest)
+                size -= blob_size
+        return evicted
+
+    def _write_blob(self, digest, content):
+        path = self._blob_path(digest)
+        if os.path.exists(path):
+            return
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Written to a temporary file first, so other processes never read partial content
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+        with os.fdopen(fd, 'wb') as tmp:
+            tmp.write(content)
+        os.replace(tmp_path, path)
+
+    def _remove_blobs(self, digests):
+        for digest in digests:
+            try:
+                os.remove(self._blob_path(digest))
+            except FileNotFoundError:
+                pass
+
+    def _total_size(self):
+        """ Size of the stored content (each blob counted once)."""
+        return self._db.execute('SELECT COALESCE(SUM(size), 0) FROM (SELECT DISTINCT digest, size FROM attachments)') \
+            .fetchone()[0]
+
+    def _blob_path(self, digest):
+        return os.path.join(self.directory, 'blobs', digest[:2], digest)
@@ -0,0 +1,295 @@
+"""
+Command line tool for bulk operations on a logbook. Results are written to stdout as JSON lines (one object per
+line), so they can be piped to other tools or to another elog command:
+
+    elog list https://elog.example.com/demo/ | elog read https://elog.example.com/demo/ - --workers 8
+
+Credentials can be given with --user / --password or the environment variables ELOG_USER / ELOG_PASSWORD.
+"""
+import argparse
+import contextlib
+import json
+import os
+import sys
+import threading
+import time
+
+from elog.export import _map_ordered, FORMATS
+from elog.instrumentation import StatsCollector
+from elog.logbook import Logbook
+from elog.logbook_exceptions import *
+from elog.transport import Transport, RequestsTransport
+
+
+def main(argv=None):
+    """
+    Entry point of the elog command.
+
+    :param argv: command line arguments (default: sys.argv[1:])
+    :return: exit status
+    """
+    args = _make_parser().parse_args(argv)
+    stats = StatsCollector() if args.stats else None
+    transport = RequestsTransport()
+    if args.rate:
+        transport = _RateLimitedTransport(transport, args.rate)
+    logbook = Logbook(args.url, user=args.user or os.environ.get('ELOG_USER'),
+                      password=args.password or os.environ.get('ELOG_PASSWORD'), session_login=args.session_login,
+                      transport=transport)
+    if stats is not None:
+        logbook.add_hook(stats)
+
+    try:
+        # follow ends by itself when the deadline is reached, everything else fails if it does not finish in time
+        with logbook._deadline(None if args.command == 'follow' else args.deadline):
+            args.run(logbook, args)
+    except LogbookError as e:
+        print('elog: error: {}'.format(e), file=sys.stderr)
+        return 1
+    except KeyboardInterrupt:
+        return 130
+    except BrokenPipeError:
+        # Reader of the output has gone (e.g. | head), the rest of the output is discarded
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+    finally:
+        transport.close()
+        if stats is not None:
+            print(_format_stats(stats), file=sys.stderr)
+    return 0
+
+
+def _make_parser():
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument('url', help='url of the logbook, e.g. https://elog.example.com/demo/')
+    common.add_argument('--user', help='user name (default: $ELOG_USER)')
+    common.add_argument('--password', help='password (default: $ELOG_PASSWORD)')
+    common.add_argument('--session-login', action='store_true',
+                        help='log in once and use the session cookie instead of sending credentials with each request')
+    common.add_argument('--workers', type=int, default=4, help='number of concurrent requests (default: 4)')
+    common.add_argument('--rate', type=float, help='maximal number of requests per second')
+    common.add_argument('--deadline', type=float, help='total time budget of the command in seconds')
+    common.add_argument('--timeout', type=float, help='timeout of each request in seconds')
+    common.add_argument('--stats', action='store_true',
+                        help='print summary of requests, bytes and latencies to stderr at the end')
+
+    parser = argparse.ArgumentParser(prog='elog', description='Bulk operations on an elog logbook. Results are '
+                                                              'written to stdout as JSON lines.')
+    commands = parser.add_subparsers(dest='command', required=True, metavar='command')
+
+    command = commands.add_parser('list', parents=[common], help='list IDs of all messages')
+    command.set_defaults(run=_list)
+
+    command = commands.add_parser('search', parents=[common], help='list IDs of messages matching the search')
+    command.add_argument('term', nargs='?', default='', help='text to search for (regular expression)')
+    command.add_argument('-a', '--attribute', action='append', default=[], metavar='NAME=VALUE',
+                         help='search for attribute value (can be repeated)')
+    command.add_argument('--scope', default='subtext', help='where to search for the term (default: subtext)')
+    command.add_argument('-n', '--limit', type=int, help='maximal number of results (default: all)')
+    command.set_defaults(run=_search)
+
+    command = commands.add_parser('read', parents=[common], help='read messages')
+    command.add_argument('ids', nargs='*', help='message IDs, "-" reads them from stdin (default: all messages)')
+    command.set_defaults(run=_read)
+
+    command = commands.add_parser('export', parents=[common], help='export all messages to a file')
+    command.add_argument('path', help='output file')
+    command.add_argument('--format', choices=FORMATS, default='jsonl', help='format of the file (default: jsonl)')
+    command.add_argument('--include-attachments', action='store_true',
+                         help='download attachments to <path>.attachments/')
+    command.add_argument('--restart', action='store_true', help='ignore the checkpoint of an interrupted export')
+    command.set_defaults(run=_export)
+
+    command = commands.add_parser('fetch-attachments', parents=[common], help='download attachments of messages')
+    command.add_argument('ids', nargs='*', help='message IDs, "-" reads them from stdin (default: all messages)')
+    command.add_argument('-d', '--directory', default='.',
+                         help='attachments are stored to <directory>/<msg_id>/ (default: current directory)')
+    command.set_defaults(run=_fetch_attachments)
+
+    command = commands.add_parser('post-from-file', parents=[common], help='post messages from a JSON lines file')
+    command.add_argument('path', help='file with one object {"message", "attributes", "attachments", "msg_id", '
+                                      '"reply", "encoding"} per line, "-" reads stdin')
+    command.set_defaults(run=_post_from_file)
+
+    command = commands.add_parser('delete', parents=[common], help='delete messages (with all their replies)')
+    command.add_argument('ids', nargs='*', help='message IDs, "-" reads them from stdin')
+    command.add_argument('--search', metavar='TERM', help='delete all messages matching the search term')
+    command.add_argument('--all', action='store_true', help='delete all messages of the logbook')
+    command.set_defaults(run=_delete)
+
+    command = commands.add_parser('follow', parents=[common], help='print new messages as they are posted')
+    command.add_argument('--since', type=int, help='print also messages with ID higher than this one')
+    command.add_argument('--poll-interval', type=float, default=5, help='seconds between polls (default: 5)')
+    command.add_argument('--include-edits', action='store_true', help='print edited messages as well')
+    command.set_defaults(run=_follow)
+    return parser
+
+
+def _list(logbook, args):
+    for msg_id in logbook.get_message_ids(timeout=args.timeout):
+        _write({'msg_id': msg_id})
+
+
+def _search(logbook, args):
+    search_term = args.term
+    if args.attribute:
+        search_term = dict(_split_attribute(attribute) for attribute in args.attribute)
+        if args.term:
+            search_term[args.scope] = args.term
+    limit = args.limit if args.limit is not None else logbook.count(timeout=args.timeout)
+    for msg_id in logbook.search(search_term, limit, args.scope, timeout=args.timeout) if limit else []:
+        _write({'msg_id': msg_id})
+
+
+def _read(logbook, args):
+    def read(msg_id):
+        try:
+            return logbook.read(msg_id, timeout=args.timeout, raw=True)
+        except LogbookInvalidMessageID as e:
+            return e
+
+    for msg_id, entry in _map_ordered(logbook._bind_context(read), _target_ids(logbook, args), args.workers):
+        if isinstance(entry, LogbookError):
+            print('elog: message {} skipped: {}'.format(msg_id, entry), file=sys.stderr)
+        else:
+            _write({'msg_id': msg_id, 'attributes': entry.attributes, 'message': entry.text,
+                    'attachments': entry.attachments})
+
+
+def _export(logbook, args):
+    exported = logbook.export(args.path, args.format, args.include_attachments, args.workers,
+                              resume=not args.restart, timeout=args.timeout)
+    _write({'path': args.path, 'exported': exported})
+
+
+def _fetch_attachments(logbook, args):
+    def fetch(msg_id):
+        try:
+            attachments = logbook.read(msg_id, timeout=args.timeout, raw=True).attachments
+        except LogbookInvalidMessageID as e:
+            return e
+        directory = os.path.join(args.directory, str(msg_id))
+        files = list()
+        for url in attachments:
+            content = logbook.download_attachment(url, timeout=args.timeout)
+            os.makedirs(directory, exist_ok=True)
+            path = os.path.join(directory, os.path.basename(url))
+            with open(path, 'wb') as attachment:
+                attachment.write(content)
+            files.append({'msg_id': msg_id, 'url': url, 'path': path, 'bytes': len(content)})
+        return files
+
+    for msg_id, files in _map_ordered(logbook._bind_context(fetch), _target_ids(logbook, args), args.workers):
+        if isinstance(files, LogbookError):
+            print('elog: message {} skipped: {}'.format(msg_id, files), file=sys.stderr)
+        else:
+            for record in files:
+                _write(record)
+
+
+def _post_from_file(logbook, args):
+    def post(line):
+        line_number, record = line
+        try:
+            msg_id = logbook.post(record.get('message', ''), msg_id=record.get('msg_id'),
+                                  reply=record.get('reply', False), attributes=record.get('attributes'),
+                                  attachments=record.get('attachments'), encoding=record.get('encoding'),
+                                  timeout=args.timeout)
+            return {'line': line_number, 'msg_id': msg_id}
+        except LogbookError as e:
+            return {'line': line_number, 'error': str(e)}
+
+    with (contextlib.nullcontext(sys.stdin) if args.path == '-' else open(args.path)) as lines:
+        records = ((i, json.loads(line)) for i, line in enumerate(lines, 1) if line.strip())
+        for _, result in _map_ordered(logbook._bind_context(post), records, args.workers):
+            _write(result)
+
+
+def _delete(logbook, args):
+    if args.all:
+        targets = logbook.get_message_ids(timeout=args.timeout)
+    elif args.search is not None:
+        targets = args.search
+    elif args.ids:
+        targets = _target_ids(logbook, args)
+    else:
+        raise SystemExit('elog delete: error: specify message IDs, --search or --all')
+
+    result = logbook.delete_many(targets, workers=args.workers, timeout=args.timeout)
+    for msg_id in result.succeeded:
+        _write({'msg_id': msg_id, 'deleted': True})
+    for msg_id, error in result.failed.items():
+        _write({'msg_id': msg_id, 'deleted': False, 'error': str(error)})
+
+
+def _follow(logbook, args):
+    for event in logbook.follow(args.since, args.poll_interval, include_edits=args.include_edits,
+                                timeout=args.timeout, workers=args.workers, deadline=args.deadline):
+        message, attributes, attachments = event.entry
+        _write({'msg_id': event.msg_id, 'edited': event.edited, 'attributes': attributes, 'message': message,
+                'attachments': attachments})
+
+
+def _target_ids(logbook, args):
+    """ Returns IDs given on the command line, read from stdin ("-") or all IDs of the logbook."""
+    if not args.ids:
+        return sorted(logbook.get_message_ids(timeout=args.timeout))
+    if args.ids == ['-']:
+        return (_parse_id(line) for line in sys.stdin if line.strip())
+    return [int(msg_id) for msg_id in args.ids]
+
+
+def _parse_id(line):
+    """ Returns message ID from a line with the ID or a JSON object with 'msg_id' (output of other commands)."""
+    value = json.loads(line)
+    return int(value['msg_id'] if isinstance(value, dict) else value)
+
+
+def _split_attribute(attribute):
+    name, separator, value = attribute.partition('=')
+    if not separator:
+        raise SystemExit('elog: error: attribute must be given as NAME=VALUE: ' + attribute)
+    return name, value
+
+
+def _write(record):
+    # Flushed line by line, so the output can be consumed while the command is running
+    sys.stdout.write(json.dumps(record, ensure_ascii=False) + '\n')
+    sys.stdout.flush()
+
+
+def _format_stats(stats):
+    requests = stats.request_summary()
+    latency = requests.pop('latency')
+    totals = [sum(counter.get(key, 0) for counter in requests.values())
+              for key in ('requests', 'bytes_sent', 'bytes_received', 'errors')]
+    return '{}\n\n{} requests, {} B sent, {} B received, {} errors, latency p50 {:.1f} ms, p90 {:.1f} ms, ' \
+           'p99 {:.1f} ms'.format(stats, *totals, latency['p50'] * 1000, latency['p90'] * 1000,
+                                  latency['p99'] * 1000)
+
+
+class _RateLimitedTransport(Transport):
+    """ Transport which spaces the requests of all threads to at most rate requests per second."""
+
+    def __init__(self, transport, rate):
+        super().__init__()
+        self._transport = transport
+        self.cookies = transport.cookies
+        self._interval = 1.0 / rate
+        self._lock = threading.Lock()
+        self._next = time.monotonic()
+
+    def request(self, *args, **kwargs):
+        with self._lock:
+            now = time.monotonic()
+            wait = self._next - now
+            self._next = max(now, self._next) + self._interval
+        if wait > 0:
+            time.sleep(wait)
+        return self._transport.request(*args, **kwargs)
+
+    def close(self):
+        self._transport.close()
+
+
+if __name__ == '__main__':
+    sys.exit(main())
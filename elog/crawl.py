@@ -0,0 +1,102 @@
+import collections
+import concurrent.futures
+import time
+
+from elog.export import _map_ordered
+from elog.logbook_exceptions import *
+
+# Reported to the progress callback of crawl() after each finished shard.
+#   shard: index of the finished shard, shards_done / shards_total: number of finished / all shards
+#   messages: messages read by the shard, messages_done / messages_total: messages read by finished / all shards
+#   shard_elapsed: time the worker spent on the shard, throughput: messages per second of the shard
+#   elapsed: time since the start of the crawl
+CrawlProgress = collections.namedtuple('CrawlProgress', ['shard', 'shards_done', 'shards_total', 'messages',
+                                                         'messages_done', 'messages_total', 'shard_elapsed',
+                                                         'throughput', 'elapsed'])
+
+# Logbook and number of threads of the worker process (set by the pool initializer)
+_worker = dict()
+
+
+def crawl(logbook, msg_ids=None, processes=4, max_connections=8, shard_size=200, progress=None, timeout=None,
+          mp_context=None):
+    """
+    Reads many messages with a pool of processes, e.g. for a backfill of a large logbook. IDs are split into shards
+    of shard_size messages which are read by the worker processes (each with its own pooled connections and
+    several threads). Results are merged by the calling process and yielded in the order of the IDs.
+
+        for msg_id, (message, attributes, attachments) in elog.crawl(logbook, processes=8, max_connections=16):
+            ...
+
+    :param logbook: Logbook to be crawled (it is pickled to the workers, hooks and search index are not)
+    :param msg_ids: IDs of the messages to read (default: all messages of the logbook)
+    :param processes: number of worker processes
+    :param max_connections: maximal number of concurrent requests to the server of all workers together
+    :param shard_size: number of messages per shard
+    :param progress: callable called with CrawlProgress after each finished shard
+    :param timeout: The timeout value to be passed to the requests.
+    :param mp_context: multiprocessing context of the process pool (default: default context of the platform)
+    :return: generator of (msg_id, elog.Message) where the message can be unpacked as (message, attributes,
+             attachments). Messages deleted in the meantime are skipped.
+    """
+    if msg_ids is None:
+        msg_ids = logbook.get_message_ids(timeout=timeout)
+    msg_ids = sorted(msg_ids)
+    shards = [msg_ids[i:i + shard_size] for i in range(0, len(msg_ids), max(1, shard_size))]
+    if not shards:
+        return
+
+    # Concurrency is limited per server: processes x threads <= max_connections
+    processes = max(1, min(processes, max_connections, len(shards)))
+    threads = max(1, max_connections // processes)
+
+    start = time.perf_counter()
+    done = collections.Counter()
+
+    def finish(pending):
+        shard, future = pending.popleft()
+        entries, shard_elapsed = future.result()
+        done['shards'] += 1
+        done['messages'] += len(entries)
+        if progress is not None:
+            progress(CrawlProgress(shard, done['shards'], len(shards), len(entries), done['messages'], len(msg_ids),
+                                   shard_elapsed, len(entries) / shard_elapsed if shard_elapsed else 0.0,
+                                   time.perf_counter() - start))
+        return entries
+
+    with concurrent.futures.ProcessPoolExecutor(processes, mp_context=mp_context, initializer=_init_worker,
+                                                initargs=(logbook, threads, timeout)) as executor:
+        # Bounded number of shards in flight, so results do not pile up if they are consumed slowly
+        pending = collections.deque()
+        try:
+            for shard, shard_ids in enumerate(shards):
+                pending.append((shard, executor.submit(_read_shard, shard_ids)))
+                if len(pending) >= 2 * processes:
+                    yield from finish(pending)
+            while pending:
+                yield from finish(pending)
+        finally:
+            for _, future in pending:
+                future.cancel()
+
+
+def _init_worker(logbook, threads, timeout):
+    _worker['logbook'] = logbook
+    _worker['threads'] = threads
+    _worker['timeout'] = timeout
+
+
+def _read_shard(msg_ids):
+    """ Reads the messages of one shard in the worker process. Returns (list of (msg_id, entry), elapsed)."""
+    start = time.perf_counter()
+    entries = [(msg_id, entry) for msg_id, entry in _map_ordered(_read, msg_ids, _worker['threads'])
+               if entry is not None]
+    return entries, time.perf_counter() - start
+
+
+def _read(msg_id):
+    try:
+        # Only the raw response is sent back to the parent process and parsed there when it is used
+        return _worker['logbook'].read(msg_id, timeout=_worker['timeout'], raw=True)
+    except LogbookInvalidMessageID:
+        return None
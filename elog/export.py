@@ -0,0 +1,160 @@
+import collections
+import csv
+import io
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from elog.logbook_exceptions import *
+
+FORMATS = ('jsonl', 'csv')
+
+# Checkpoint is written after this many processed messages
+CHECKPOINT_INTERVAL = 100
+
+
+class Exporter(object):
+    """
+    Exports all messages of a logbook to a JSON lines or CSV file (see Logbook.export()). Messages are read by a pool
+    of threads and written in the order of their IDs as soon as they arrive. Only a bounded number of messages is
+    kept in memory. Progress is stored in a checkpoint file (<path>.checkpoint) so an interrupted export can be
+    resumed. The checkpoint is removed when the export is complete.
+    """
+
+    def __init__(self, logbook, path, format='jsonl', include_attachments=False, workers=4, columns=None,
+                 timeout=None):
+        """
+        :param logbook: Logbook to be exported
+        :param path: path of the output file
+        :param format: 'jsonl' (one JSON object per message) or 'csv'
+        :param include_attachments: download attachments to directory <path>.attachments/<msg_id>/
+        :param workers: number of threads reading messages
+        :param columns: attribute columns of the CSV file (default: attributes of the first messages)
+        :param timeout: The timeout value to be passed to the requests.
+        """
+        if format not in FORMATS:
+            raise ValueError('Invalid export format: {}. Valid options: {}.'.format(format, ', '.join(FORMATS)))
+        self._logbook = logbook
+        self._path = path
+        self._format = format
+        self._include_attachments = include_attachments
+        self._workers = max(1, workers)
+        self._columns = list(columns) if columns is not None else None
+        self._timeout = timeout
+        self.checkpoint_path = path + '.checkpoint'
+        self.attachments_dir = path + '.attachments'
+
+    def run(self, resume=True):
+        """
+        :param resume: continue the export from the checkpoint if there is one, otherwise start from scratch
+        :return: number of messages in the output file
+        """
+        checkpoint = self._load_checkpoint() if resume else None
+        if checkpoint is None:
+            checkpoint = {'format': self._format, 'last_id': 0, 'offset': 0, 'exported': 0, 'columns': self._columns}
+        elif checkpoint['format'] != self._format:
+            raise ValueError('Checkpoint of {} export cannot be resumed as {}.'.format(checkpoint['format'],
+                                                                                       self._format))
+        self._columns = checkpoint['columns']
+
+        msg_ids = sorted(msg_id for msg_id in self._logbook.get_message_ids(timeout=self._timeout)
+                         if msg_id > checkpoint['last_id'])
+
+        with open(self._path, 'r+b' if checkpoint['offset'] else 'wb') as output:
+            # Anything written after the checkpoint is written again
+            output.truncate(checkpoint['offset'])
+            output.seek(checkpoint['offset'])
+
+            # Reads in the pool are limited by the time budget of the caller (if any)
+            fetch = self._logbook._bind_context(self._fetch)
+            for i, (msg_id, entry) in enumerate(_map_ordered(fetch, msg_ids, self._workers), 1):
+                if entry is not None:
+                    output.write(self._encode(msg_id, *entry, header=checkpoint['exported'] == 0))
+                    checkpoint['exported'] += 1
+                checkpoint['last_id'] = msg_id
+                if i % CHECKPOINT_INTERVAL == 0:
+                    self._save_checkpoint(output, checkpoint)
+
+            if checkpoint['exported'] == 0 and self._format == 'csv':
+                output.write(self._encode_csv([self._header()]))
+
+        if os.path.exists(self.checkpoint_path):
+            os.remove(self.checkpoint_path)
+        return checkpoint['exported']
+
+    def _fetch(self, msg_id):
+        """ Reads message (and downloads its attachments). Returns None if it was deleted in the meantime."""
+        try:
+            message, attributes, attachments = self._logbook.read(msg_id, timeout=self._timeout)
+        except LogbookInvalidMessageID:
+            return None
+
+        if self._include_attachments and attachments:
+            directory = os.path.join(self.attachments_dir, str(msg_id))
+            os.makedirs(directory, exist_ok=True)
+            files = list()
+            for url in attachments:
+                name = os.path.basename(url)
+                with open(os.path.join(directory, name), 'wb') as attachment:
+                    attachment.write(self._logbook.download_attachment(url, timeout=self._timeout))
+                files.append(os.path.join(os.path.basename(self.attachments_dir), str(msg_id), name))
+            attachments = files
+        return message, attributes, attachments
+
+    def _encode(self, msg_id, message, attributes, attachments, header=False):
+        if self._format == 'jsonl':
+            record = {'msg_id': msg_id, 'attributes': attributes, 'message': message, 'attachments': attachments}
+            return (json.dumps(record, ensure_ascii=False) + '\n').encode('utf-8')
+
+        if self._columns is None:
+            self._columns = list(attributes)
+        extra = {key: value for key, value in attributes.items() if key not in self._columns}
+        row = [msg_id] + [attributes.get(column, '') for column in self._columns] + \
+              [message, ','.join(attachments), json.dumps(extra, ensure_ascii=False) if extra else '']
+        return self._encode_csv([self._header(), row] if header else [row])
+
+    def _header(self):
+        return ['msg_id'] + (self._columns or []) + ['message', 'attachments', 'other_attributes']
+
+    @staticmethod
+    def _encode_csv(rows):
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(rows)
+        return buffer.getvalue().encode('utf-8')
+
+    def _load_checkpoint(self):
+        if not os.path.exists(self.checkpoint_path) or not os.path.exists(self._path):
+            return None
+        with open(self.checkpoint_path) as checkpoint:
+            return json.load(checkpoint)
+
+    def _save_checkpoint(self, output, checkpoint):
+        output.flush()
+        os.fsync(output.fileno())
+        checkpoint['offset'] = output.tell()
+        checkpoint['columns'] = self._columns
+        with open(self.checkpoint_path + '.tmp', 'w') as tmp:
+            json.dump(checkpoint, tmp)
+        os.replace(self.checkpoint_path + '.tmp', self.checkpoint_path)
+
+
+def _map_ordered(function, items, workers):
+    """
+    Calls function(item) for all items in a pool of threads and yields (item, result) in the order of items. At
+    most 2 * workers calls are pending at any time, so results are not accumulated if they are consumed slowly.
+    """
+    pending = collections.deque()
+    items = iter(items)
+    with ThreadPoolExecutor(workers) as executor:
+        try:
+            for item in items:
+                pending.append((item, executor.submit(function, item)))
+                if len(pending) >= 2 * workers:
+                    item, future = pending.popleft()
+                    yield item, future.result()
+            while pending:
+                item, future = pending.popleft()
+                yield item, future.result()
+        finally:
+            for _, future in pending:
+                future.cancel()
@@ -0,0 +1,107 @@
+import collections
+from elog.logbook_exceptions import *
+
+# Event yielded when following the logbook. entry is what Logbook.read(msg_id) returns.
+FollowEvent = collections.namedtuple('FollowEvent', ['msg_id', 'edited', 'entry'])
+
+# Upper limit for the listing page when catching up with many new messages in one poll
+MAX_CATCH_UP_ENTRIES = 1000
+
+
+class Follower(object):
+    """
+    Keeps the state of Logbook.follow() between polls: the highest message ID already yielded (high-water mark),
+    the fingerprints of the watched listing rows and the current polling interval.
+    """
+
+    def __init__(self, logbook, since_id=None, poll_interval=5, max_interval=60, include_edits=False, window=20,
+                 timeout=None, workers=4):
+        """
+        :param logbook: Logbook instance to follow
+        :param since_id: yield messages with ID higher than since_id (None: start after the newest message)
+        :param poll_interval: minimal time between two polls in seconds
+        :param max_interval: maximal time between two polls in seconds
+        :param include_edits: detect and yield edited messages
+        :param window: number of newest messages requested per poll
+        :param timeout: The timeout value to be passed to the get requests.
+        :param workers: number of messages read concurrently
+        """
+        self._logbook = logbook
+        self._high_water_mark = since_id
+        self._poll_interval = poll_interval
+        self._max_interval = max(max_interval, poll_interval)
+        self._include_edits = include_edits
+        self._window = max(1, window)
+        self._timeout = timeout
+        self._workers = workers
+        self._fingerprints = dict()
+        self.interval = poll_interval
+
+    def poll(self):
+        """
+        Polls the logbook once and adapts the polling interval.
+
+        :return: list of FollowEvent, new messages in ascending order of IDs followed by edited messages
+        """
+        rows, complete = self._get_rows()
+
+        if self._high_water_mark is None:
+            # First poll without since_id. Only remember where we are.
+            self._high_water_mark = rows[0][0] if rows else 0
+            self._remember(rows)
+            return []
+
+        if complete:
+            new_ids = sorted(msg_id for msg_id, _ in rows if msg_id > self._high_water_mark)
+        else:
+            # Burst larger than the largest page, the new IDs below the page are taken from the whole listing
+            new_ids = sorted(msg_id for msg_id in self._logbook.get_message_ids(timeout=self._timeout)
+                             if msg_id > self._high_water_mark)
+        edited_ids = list()
+        if self._include_edits:
+            edited_ids = [msg_id for msg_id, row in rows if msg_id <= self._high_water_mark and
+                          msg_id in self._fingerprints and self._fingerprints[msg_id] != hash(row)]
+
+        # New and edited messages are read concurrently. The high-water mark and the fingerprints are updated only
+        # when all of them are read, so nothing is missed if the poll fails.
+        entries = self._logbook._map_concurrently(self._read, new_ids + edited_ids, self._workers)
+        if new_ids:
+            self._high_water_mark = new_ids[-1]
+        self._remember(rows)
+        events = [FollowEvent(msg_id, msg_id in edited_ids, entry)
+                  for msg_id, entry in zip(new_ids + edited_ids, entries) if entry is not None]
+
+        if events:
+            self.interval = self._poll_interval
+        else:
+            self.interval = min(self.interval * 2, self._max_interval)
+        return events
+
+    def _get_rows(self):
+        """
+        Requests the newest entries. If all of them are new, the page is enlarged until it reaches the high-water
+        mark (at most to MAX_CATCH_UP_ENTRIES).
+
+        :return: (rows, complete) where complete is False if there are new messages below the largest page
+        """
+        n_entries = self._window
+        while True:
+            rows = self._logbook._get_newest_entries(n_entries, timeout=self._timeout)
+            if self._high_water_mark is None or len(rows) < n_entries or \
+                    any(msg_id <= self._high_water_mark for msg_id, _ in rows):
+                return rows, True
+            if n_entries >= MAX_CATCH_UP_ENTRIES:
+                return rows, False
+            n_entries = min(n_entries * 4, MAX_CATCH_UP_ENTRIES)
+
+    def _remember(self, rows):
+        """ Keeps fingerprints of the watched window only."""
+        if self._include_edits:
+            self._fingerprints = {msg_id: hash(row) for msg_id, row in rows[:self._window]}
+
+    def _read(self, msg_id):
+        """ Reads message. Returns None if message was deleted in the meantime."""
+        try:
+            return self._logbook.read(msg_id, timeout=self._timeout)
+        except LogbookInvalidMessageID:
+            return None
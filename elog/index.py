@@ -0,0 +1,216 @@
+import hashlib
+import json
+import re
+import sqlite3
+import threading
+import time
+
+from elog.logbook_exceptions import *
+
+# Search parameters which are options and not search terms
+SEARCH_OPTIONS = {'sall', 'casesensitive'}
+
+# Characters which make a search term a regular expression. Other terms are plain substrings and can be looked
+# up in the full-text index.
+REGEX_CHARACTERS = set('.^$*+?{}[]\\|()')
+
+
+class SearchIndex(object):
+    """
+    Local full-text index of the entries of one logbook stored in SQLite. While the index is fresh (synchronized
+    within max_age seconds) Logbook.search() is answered from the index without loading the server, otherwise the
+    server is searched as usual.
+
+        index = elog.SearchIndex(logbook, 'demo.index.sqlite', max_age=60)
+        index.sync()  # builds the index, later calls only read new and edited messages
+        logbook.use_search_index(index)
+        logbook.search('beam dump')
+
+    Search terms have the same meaning as on the server: case insensitive regular expressions matched against the
+    text (scope 'subtext', and all attributes if option 'sall' is set) or the attribute values.
+    """
+
+    def __init__(self, logbook, path=':memory:', max_age=300):
+        """
+        :param logbook: Logbook which entries are indexed
+        :param path: path of the SQLite database file (kept between runs) or ':memory:'
+        :param max_age: maximal time in seconds since the last synchronisation for which the index is used
+        """
+        self._logbook = logbook
+        self.max_age = max_age
+        self._lock = threading.RLock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._db:
+            self._db.execute('CREATE TABLE IF NOT EXISTS entries (msg_id INTEGER PRIMARY KEY, text TEXT, '
+                             'attributes TEXT, fingerprint TEXT)')
+            self._db.execute('CREATE TABLE IF NOT EXISTS attribute_keys (key TEXT PRIMARY KEY)')
+            self._db.execute('CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value)')
+            self._full_text = _create_full_text_table(self._db)
+
+    @property
+    def synced_at(self):
+        """ Time (time.time()) of the last successful synchronisation or None."""
+        with self._lock:
+            row = self._db.execute("SELECT value FROM meta WHERE key = 'synced_at'").fetchone()
+        return row[0] if row else None
+
+    def is_fresh(self):
+        """ Returns True if the index was synchronised within max_age seconds."""
+        synced_at = self.synced_at
+        return synced_at is not None and time.time() - synced_at <= self.max_age
+
+    def sync(self, full=False, timeout=None):
+        """
+        Brings the index up to date with one listing request plus reading of new and changed messages. Changes are
+        detected with the listing rows (attributes and beginning of the text). Use full=True to read all messages
+        again, e.g. if only the end of long texts was edited.
+
+        :param full: read all messages, not only new and changed ones
+        :param timeout: The timeout value to be passed to the requests.
+        :return: tuple (number of indexed messages, number of removed messages)
+        """
+        started = time.time()
+        rows = self._logbook._get_newest_entries(timeout=timeout)
+        fingerprints = {msg_id: hashlib.sha1(row.encode('utf-8')).hexdigest() for msg_id, row in rows}
+        with self._lock:
+            known = dict(self._db.execute('SELECT msg_id, fingerprint FROM entries'))
+
+        removed = [msg_id for msg_id in known if msg_id not in fingerprints]
+        changed = sorted(msg_id for msg_id, fingerprint in fingerprints.items()
+                         if full or known.get(msg_id) != fingerprint)
+        for msg_id in changed:
+            try:
+                message, attributes, attachments = self._logbook.read(msg_id, timeout=timeout)
+            except LogbookInvalidMessageID:
+                removed.append(msg_id)  # deleted in the meantime
+                continue
+            self._store(msg_id, message, attributes, fingerprints[msg_id])
+
+        with self._lock, self._db:
+            self._delete(removed)
+            self._db.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('synced_at', ?)", (started,))
+        return len(changed), len(removed)
+
+    def start(self, interval=60):
+        """
+        Synchronises the index in a background thread every interval seconds until stop() is called. Errors of a
+        synchronisation are ignored (the index gets stale and searches go to the server).
+
+        :param interval: time between two synchronisations in seconds
+        """
+        if self._thread is not None:
+            return
+        self._stop.clear()
+
+        def run():
+            while True:
+                try:
+                    self.sync()
+                except LogbookError:
+                    pass
+                if self._stop.wait(interval):
+                    return
+
+        self._thread = threading.Thread(target=run, name='elog-search-index', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """ Stops the background synchronisation started with start()."""
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+
+    def close(self):
+        self.stop()
+        with self._lock:
+            self._db.close()
+
+    def __len__(self):
+        with self._lock:
+            return self._db.execute('SELECT COUNT(*) FROM entries').fetchone()[0]
+
+    def search(self, search_term, n_results=20, scope="subtext"):
+        """
+        Searches the index. Arguments have the same meaning as for Logbook.search().
+
+        :return: list of message ids (newest first) or None if the query contains terms the index does not know
+                 (e.g. an attribute none of the indexed messages has) and the server has to be asked
+        """
+        n_results = 1 if n_results < 1 else n_results
+        terms = dict(search_term) if type(search_term) is dict else {scope: search_term}
+        terms = {key: str(value) for key, value in terms.items() if value != ""}
+        options = {key: terms.pop(key) for key in SEARCH_OPTIONS if key in terms}
+        flags = 0 if _is_set(options.get('casesensitive')) else re.IGNORECASE
+        search_all = _is_set(options.get('sall'))
+        try:
+            patterns = [(_attribute_key(key), re.compile(value, flags)) for key, value in terms.items()]
+        except re.error as e:
+            raise LogbookMessageRejected('Invalid search pattern: {}'.format(e))
+
+        query = 'SELECT msg_id, text, attributes FROM entries'
+        args = list()
+        substrings = [value for value in terms.values() if len(value) >= 3 and not REGEX_CHARACTERS & set(value)]
+        if self._full_text and substrings:
+            # Only candidates containing all plain terms (case insensitive), matches are checked below
+            query += ' WHERE msg_id IN (SELECT rowid FROM entries_text WHERE entries_text MATCH ?)'
+            args.append(' AND '.join('"{}"'.format(s.replace('"', '""')) for s in substrings))
+        query += ' ORDER BY msg_id DESC'
+
+        with self._lock:
+            attribute_keys = {key for (key,) in self._db.execute('SELECT key FROM attribute_keys')}
+            if any(key != 'subtext' and key not in attribute_keys for key, _ in patterns):
+                return None
+            result = list()
+            for msg_id, text, attributes in self._db.execute(query, args):
+                attributes = {_attribute_key(key): value for key, value in json.loads(attributes).items()}
+                if all(_matches(key, pattern, text, attributes, search_all) for key, pattern in patterns):
+                    result.append(msg_id)
+                    if len(result) == n_results:
+                        break
+        return result
+
+    def _store(self, msg_id, message, attributes, fingerprint):
+        with self._lock, self._db:
+            self._delete([msg_id])
+            self._db.execute('INSERT INTO entries (msg_id, text, attributes, fingerprint) VALUES (?, ?, ?, ?)',
+                             (msg_id, message, json.dumps(attributes), fingerprint))
+            self._db.executemany('INSERT OR IGNORE INTO attribute_keys (key) VALUES (?)',
+                                 [(_attribute_key(key),) for key in attributes])
+            if self._full_text:
+                self._db.execute('INSERT INTO entries_text (rowid, content) VALUES (?, ?)',
+                                 (msg_id, '\n'.join([message] + list(attributes.values()))))
+
+    def _delete(self, msg_ids):
+        msg_ids = [(msg_id,) for msg_id in msg_ids]
+        self._db.executemany('DELETE FROM entries WHERE msg_id = ?', msg_ids)
+        if self._full_text:
+            self._db.executemany('DELETE FROM entries_text WHERE rowid = ?', msg_ids)
+
+
+def _create_full_text_table(db):
+    """ Creates FTS5 table with trigram tokenizer (substring search). Returns False if SQLite does not support it."""
+    try:
+        db.execute("CREATE VIRTUAL TABLE IF NOT EXISTS entries_text USING fts5(content, tokenize='trigram')")
+        return True
+    except sqlite3.OperationalError:
+        return False
+
+
+def _matches(key, pattern, text, attributes, search_all):
+    if key == 'subtext':
+        values = [text] + list(attributes.values()) if search_all else [text]
+    else:
+        values = [attributes.get(key, '')]
+    return any(pattern.search(value) for value in values)
+
+
+def _attribute_key(key):
+    """ Attribute names are sent as query parameters with special characters replaced and are case insensitive."""
+    return key if key == 'subtext' else re.sub('[^0-9a-zA-Z]', '_', key).lower()
+
+
+def _is_set(value):
+    return value not in (None, '', '0', 0, False)
@@ -0,0 +1,164 @@
+import collections
+import logging
+import threading
+
+# Emitted for each HTTP exchange with the server.
+#   operation: name of the innermost public Logbook method which made the request (e.g. 'read')
+#   method, path, status: HTTP method, path of the url and status code (None if no response was received)
+#   bytes_sent, bytes_received: size of the request and response (headers + body)
+#   elapsed: duration in seconds
+#   retries: number of previous attempts of the same request (e.g. after renewing an expired session)
+#   error: exception raised by the request or None
+RequestEvent = collections.namedtuple('RequestEvent', ['operation', 'method', 'path', 'status', 'bytes_sent',
+                                                       'bytes_received', 'elapsed', 'retries', 'error'])
+
+# Emitted when a public Logbook method returns. Aggregates all requests made by the method (including the requests
+# of other public methods it called, which also emit their own spans with parent set).
+#   operation: name of the method, parent: name of the calling public method or None
+#   requests, bytes_sent, bytes_received: totals of all requests made by the call
+#   elapsed: duration in seconds
+#   error: exception raised by the method or None
+SpanEvent = collections.namedtuple('SpanEvent', ['operation', 'parent', 'requests', 'bytes_sent', 'bytes_received',
+                                                 'elapsed', 'error'])
+
+
+class Span(object):
+    """ Counters of one running public method call."""
+    __slots__ = ('operation', 'parent', 'requests', 'bytes_sent', 'bytes_received')
+
+    def __init__(self, operation, parent):
+        self.operation = operation
+        self.parent = parent
+        self.requests = 0
+        self.bytes_sent = 0
+        self.bytes_received = 0
+
+    def add(self, event):
+        self.requests += 1
+        self.bytes_sent += event.bytes_sent
+        self.bytes_received += event.bytes_received
+
+    def event(self, elapsed, error):
+        return SpanEvent(self.operation, self.parent, self.requests, self.bytes_sent, self.bytes_received, elapsed,
+                         error)
+
+
+class StatsCollector(object):
+    """
+    Hook which counts calls, requests, bytes and errors per operation and keeps latencies for percentiles.
+
+        stats = elog.StatsCollector()
+        logbook.add_hook(stats)
+        ...
+        print(stats)
+    """
+
+    def __init__(self, max_samples=10000):
+        """
+        :param max_samples: number of newest latencies kept per operation for the percentiles
+        """
+        self._max_samples = max_samples
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._calls = collections.defaultdict(lambda: collections.Counter())
+            self._requests = collections.defaultdict(lambda: collections.Counter())
+            self._call_latencies = collections.defaultdict(lambda: collections.deque(maxlen=self._max_samples))
+            self._request_latencies = collections.deque(maxlen=self._max_samples)
+
+    def __call__(self, event):
+        with self._lock:
+            if isinstance(event, RequestEvent):
+                counter = self._requests[(event.operation, event.method)]
+                counter['requests'] += 1
+                counter['bytes_sent'] += event.bytes_sent
+                counter['bytes_received'] += event.bytes_received
+                counter['retries'] += event.retries
+                counter['errors'] += event.error is not None or (event.status or 0) >= 400
+                self._request_latencies.append(event.elapsed)
+
+            elif event.parent is None:
+                # Only top level calls, so requests of nested calls are not counted twice
+                counter = self._calls[event.operation]
+                counter['calls'] += 1
+                counter['requests'] += event.requests
+                counter['bytes_sent'] += event.bytes_sent
+                counter['bytes_received'] += event.bytes_received
+                counter['errors'] += event.error is not None
+                self._call_latencies[event.operation].append(event.elapsed)
+
+    def summary(self):
+        """
+        :return: dictionary {operation: {'calls', 'requests', 'bytes_sent', 'bytes_received', 'errors',
+                 'p50', 'p90', 'p99', 'mean'}} of top level calls, latencies in seconds
+        """
+        with self._lock:
+            result = dict()
+            for operation, counter in self._calls.items():
+                result[operation] = dict(counter)
+                result[operation].update(_latency_stats(self._call_latencies[operation]))
+            return result
+
+    def request_summary(self):
+        """
+        :return: dictionary {(operation, method): {'requests', 'bytes_sent', 'bytes_received', 'retries', 'errors'}}
+                 and latency statistics of all requests under key 'latency'
+        """
+        with self._lock:
+            result = {key: dict(counter) for key, counter in self._requests.items()}
+            result['latency'] = _latency_stats(self._request_latencies)
+            return result
+
+    def __str__(self):
+        lines = ['{:<24}{:>8}{:>10}{:>12}{:>14}{:>10}{:>10}{:>10}{:>8}'.format(
+            'operation', 'calls', 'requests', 'sent [B]', 'received [B]', 'p50 [ms]', 'p90 [ms]', 'p99 [ms]',
+            'errors')]
+        for operation, stats in sorted(self.summary().items()):
+            lines.append('{:<24}{:>8}{:>10}{:>12}{:>14}{:>10.1f}{:>10.1f}{:>10.1f}{:>8}'.format(
+                operation, stats['calls'], stats['requests'], stats['bytes_sent'], stats['bytes_received'],
+                stats['p50'] * 1000, stats['p90'] * 1000, stats['p99'] * 1000, stats['errors']))
+        return '\n'.join(lines)
+
+
+class LogTracer(object):
+    """
+    Hook which logs every request and span with the logging module.
+
+        logbook.add_hook(elog.LogTracer(level=logging.INFO))
+    """
+
+    def __init__(self, logger=None, level=logging.DEBUG):
+        """
+        :param logger: logging.Logger to be used (default: logger 'elog')
+        :param level: logging level of the messages
+        """
+        self._logger = logger or logging.getLogger('elog')
+        self._level = level
+
+    def __call__(self, event):
+        if not self._logger.isEnabledFor(self._level):
+            return
+        if isinstance(event, RequestEvent):
+            self._logger.log(self._level, 'request %s %s %s -> %s (%d B sent, %d B received, %.1f ms, %d retries%s)',
+                             event.operation, event.method, event.path, event.status, event.bytes_sent,
+                             event.bytes_received, event.elapsed * 1000, event.retries,
+                             ', error: {!r}'.format(event.error) if event.error else '')
+        else:
+            self._logger.log(self._level, 'span %s%s: %d requests (%d B sent, %d B received, %.1f ms%s)',
+                             event.operation, ' in ' + event.parent if event.parent else '', event.requests,
+                             event.bytes_sent, event.bytes_received, event.elapsed * 1000,
+                             ', error: {!r}'.format(event.error) if event.error else '')
+
+
+def _latency_stats(latencies):
+    """ Returns percentiles and mean of the latencies (0 if there are none)."""
+    values = sorted(latencies)
+    if not values:
+        return {'p50': 0.0, 'p90': 0.0, 'p99': 0.0, 'mean': 0.0}
+
+    def percentile(p):
+        return values[max(0, min(len(values) - 1, int(round(p / 100.0 * len(values))) - 1))]
+
+    return {'p50': percentile(50), 'p90': percentile(90), 'p99': percentile(99), 'mean': sum(values) / len(values)}
@@ -4,18 +4,77 @@ import os
 import builtins
 import re
 import sys
+import time
+import functools
+import contextlib
+import threading
+import asyncio
+import concurrent.futures
+import collections
 from elog.logbook_exceptions import *
+from elog.instrumentation import RequestEvent, Span
+from elog.transport import RequestsTransport
+from elog.message import Message
+from elog.sequence import MessageSequence
 from datetime import datetime
 
+# How many times an expired session is renewed before the request is given up
+MAX_SESSION_RENEWALS = 2
+
+# Result of the bulk operations (edit_many(), ...)
+#   succeeded: list of IDs of the messages processed successfully
+#   failed: dictionary {msg_id: exception} of the messages which could not be processed
+BulkResult = collections.namedtuple('BulkResult', ['succeeded', 'failed'])
+
+
+def _operation(method):
+    """
+    Decorator of the public Logbook methods. If the method is called with deadline=<seconds>, all requests made
+    during the call (also by nested calls) share this time budget. If hooks are registered, the call is measured
+    and a SpanEvent with the totals of all requests made during the call is emitted.
+    """
+    operation = method.__name__.lstrip('_')
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        if kwargs.get('deadline') is not None:
+            with self._deadline(kwargs['deadline']):
+                return measured(self, *args, **kwargs)
+        return measured(self, *args, **kwargs)
+
+    def measured(self, *args, **kwargs):
+        if not self._hooks:
+            return method(self, *args, **kwargs)
+
+        spans = self._spans()
+        span = Span(operation, spans[-1].operation if spans else None)
+        spans.append(span)
+        start = time.perf_counter()
+        error = None
+        try:
+            return method(self, *args, **kwargs)
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            spans.pop()
+            self._emit(span.event(time.perf_counter() - start, error))
+
+    return wrapper
+
 
 class Logbook(object):
     """
     Logbook provides methods to interface with logbook on location: "server:port/subdir/logbook". User can create,
     edit, delete logbook messages.
+
+    Logbook is thread-safe. One instance can be shared by many threads: with the default transport each thread uses
+    its own pooled session (the session cookie established by login() is shared), and dictionaries passed to the
+    methods are never modified.
     """
 
     def __init__(self, hostname, logbook='', port=None, user=None, password=None, subdir='', use_ssl=True,
-                 encrypt_pwd=True):
+                 encrypt_pwd=True, session_login=False, transport=None):
         """
         :param hostname: elog server hostname. If whole url is specified here, it will be parsed and arguments:
                          "logbook, port, subdir, use_ssl" will be overwritten by parsed values.
@@ -29,6 +88,12 @@ class Logbook(object):
         :param encrypt_pwd: To avoid exposing password in the code, this flag can be set to False and password
                             will then be handled as it is (user needs to provide sha256 encrypted password with
                             salt= '' and rounds=5000)
+        :param session_login: If True, credentials are sent only once (see login()) and the session cookie issued by
+                              the elog server is used for all further requests. Expired sessions are renewed
+                              transparently. If the server does not issue a session cookie, credentials are sent
+                              with every request as usual. (default: False)
+        :param transport: elog.Transport used to exchange requests with the server. Default is
+                          elog.RequestsTransport(), other transports can record or replay the traffic.
         :return:
         """
         hostname = hostname.strip()
@@ -106,8 +171,101 @@ class Logbook(object):
         self._user = user
         self._password = _handle_pswd(password, encrypt_pwd)
 
+        # Requests go through the transport (by default a pooled requests.Session per thread). Cookies set by the
+        # server (e.g. elogd session id) are kept in the cookie jar of the transport.
+        self._transport = transport or RequestsTransport()
+        self._local = threading.local()
+        self._lock = threading.RLock()  # protects the hooks
+        self._session_login = session_login
+        self._login = _LoginState()
+        self._hooks = tuple()  # replaced (not modified) when changed, so it can be iterated without lock
+        self._search_index = None
+        self._attachment_cache = None
+
+    def __getstate__(self):
+        """
+        Logbook can be pickled (e.g. to be used in other processes). The password is pickled as it is stored
+        (hashed), so it is not hashed again. Locks and per thread state are created again, the transport (if
+        picklable) gets its own connections and the attachment cache is opened again from its directory. Hooks and
+        the search index are not pickled.
+        """
+        state = self.__dict__.copy()
+        for key in ('_local', '_lock', '_hooks', '_search_index'):
+            del state[key]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._local = threading.local()
+        self._lock = threading.RLock()
+        self._hooks = tuple()
+        self._search_index = None
+
+    def _view(self, logbook):
+        """
+        Returns Logbook for other logbook on the same server (the url of this logbook is the base url of the new one).
+        It shares the transport (connections and cookies), credentials and session with this logbook, as well as the
+        time budget (deadline) and running public method calls of each thread.
+        """
+        view = Logbook(self._url, logbook, user=self._user, password=self._password, encrypt_pwd=False,
+                       session_login=self._session_login, transport=self._transport)
+        view._login = self._login
+        view._local = self._local
+        return view
+
+    @_operation
+    def login(self, timeout=None, *, deadline=None):
+        """
+        Authenticates against the logbook server with the user credentials and keeps the session cookie issued by
+        the server. While the session is valid it is used for all requests instead of sending credentials every time.
+        It is called automatically before the first request if the logbook was opened with session_login=True.
+
+        :param timeout: The timeout value to be passed to the get request.
+        :param deadline: Total time budget of the call in seconds shared by all its requests. If it is spent,
+                         LogbookServerTimeout is raised. (default: None, no limit)
+        :return: True if the server issued a session, False if credentials have to be sent with every request.
+        """
+        with self._login.lock:
+            self._transport.cookies.clear()
+            self._login.logged_in = None
+            self._login.generation += 1
+
+            try:
+                # elogd authenticates the unm/upwd cookies (as sent by its own command line client) and answers with
+                # a session id cookie (sid) if it keeps sessions. Its login form (uname/upassword) is not used, it
+                # needs the plain password which is not kept. Smallest possible listing is requested, the content is
+                # not needed only the cookies set by the server.
+                response = self._exchange('GET', self._url, params={'npp': 1},
+                                          cookies=self._make_user_and_pswd_cookie(), timeout=timeout)
+
+                # Validate response. Wrong credentials will raise LogbookAuthenticationError.
+                _validate_response(response)
+
+            except requests.Timeout as e:
+                # Catch here a timeout of the get request.
+                # Raise the logbook exception and let the user handle it
+                raise LogbookServerTimeout('{0} method cannot be completed because of a network timeout:\n'
+                                           '{1}'.format(sys._getframe().f_code.co_name, e))
+
+            except requests.RequestException as e:
+                raise LogbookServerProblem('Cannot access logbook server to log in because of:\n' + '{0}'.format(e))
+
+            # Only the session id makes the credentials unnecessary, other cookies may be set by the server as well
+            self._login.logged_in = 'sid' in self._transport.cookies
+            return self._login.logged_in
+
+    def logout(self):
+        """
+        Forgets the session established with login(). Following requests will send the credentials again (or
+        establish a new session if the logbook was opened with session_login=True).
+        """
+        with self._login.lock:
+            self._transport.cookies.clear()
+            self._login.logged_in = None
+
+    @_operation
     def post(self, message, msg_id=None, reply=False, attributes=None, attachments=None,
-             suppress_email_notification=False, encoding=None, timeout=None, **kwargs):
+             suppress_email_notification=False, encoding=None, timeout=None, *, deadline=None, **kwargs):
         """
         Posts message to the logbook. If msg_id is not specified new message will be created, otherwise existing
         message will be edited, or a reply (if reply=True) to it will be created. This method returns the msg_id
@@ -129,6 +287,9 @@ class Logbook(object):
                          'ELCode' --> elog formatting syntax
         :param timeout: Define the timeout to be used by the post request. Its value is directly passed to the requests
                         post. Use None to disable the request timeout.
+        :param deadline: Total time budget of the call in seconds. Editing a message can take several requests
+                         (reading the message, comparing and deleting attachments, ...), which all share this
+                         budget. If it is spent, LogbookServerTimeout is raised. (default: None, no limit)
         :param kwargs: Anything in the kwargs will be interpreted as attribute. e.g.: logbook.post('Test text',
                        Author='Rok Vintar), "Author" will be sent as an attribute. If named same as one of the
                        attributes defined in "attributes", kwargs will have priority.
@@ -185,7 +346,7 @@ class Logbook(object):
             # Message exists, we can continue
             if reply:
                 # Verify that there is a message on the server, otherwise do not reply to it!
-                self._check_if_message_on_server(msg_id)  # raises exception in case of none existing message
+                self._check_if_message_on_server(msg_id, timeout)  # raises exception in case of none existing message
                 attributes['reply_to'] = str(msg_id)
             else:  # Edit existing
                 attributes['edit_id'] = str(msg_id)
@@ -194,7 +355,7 @@ class Logbook(object):
                 # here we accomplish point 1.1.
                 # existing_attachments_list is something like:
                 # [ 'https://elog.url.com/logbook/timestamped_filename' ]
-                msg_to_edit, attributes_to_edit, existing_attachments_list = self.read(msg_id)
+                msg_to_edit, attributes_to_edit, existing_attachments_list = self.read(msg_id, timeout)
 
                 for attribute, data in attributes.items():
                     new_data = attributes.get(attribute)
@@ -285,8 +446,8 @@ class Logbook(object):
         attributes_to_edit = _encode_values(attributes_to_edit)
 
         try:
-            response = requests.post(self._url, data=attributes_to_edit, files=new_attachment_list,
-                                     allow_redirects=False, verify=False, timeout=timeout)
+            response = self._send('POST', self._url, data=attributes_to_edit, files=new_attachment_list,
+                                  timeout=timeout)
 
             # Validate response. Any problems will raise an Exception.
             resp_message, resp_headers, resp_msg_id = _validate_response(response)
@@ -304,7 +465,7 @@ class Logbook(object):
 
         except requests.RequestException as e:
             # Check if message on server.
-            self._check_if_message_on_server(msg_id)  # raises exceptions if no message or no response from server
+            self._check_if_message_on_server(msg_id, timeout)  # raises exceptions if no message or no response
 
             # If here: message is on server but cannot be downloaded (should never happen)
             raise LogbookServerProblem('Cannot access logbook server to post a message, ' + 'because of:\n' +
@@ -315,7 +476,72 @@ class Logbook(object):
             raise LogbookInvalidMessageID('Invalid message ID: ' + str(resp_msg_id) + ' returned')
         return resp_msg_id
 
-    def read(self, msg_id, timeout=None):
+    @_operation
+    def read_many(self, targets, workers=4, n_results=None, timeout=None, *, columnar=False, deadline=None):
+        """
+        Reads many messages with concurrent requests. Messages deleted in the meantime are skipped.
+
+            frame = logbook.read_many({'Type': 'Problem'}, columnar=True).to_pandas()
+
+        :param targets: list of message IDs or a search term (string or dictionary, see search())
+        :param workers: number of concurrent requests
+        :param n_results: maximal number of search results to be read (default: all results)
+        :param timeout: The timeout value to be passed to the requests.
+        :param columnar: If True elog.ResultSet is returned, which stores the messages by columns as they arrive
+        :param deadline: Total time budget of the call in seconds shared by all its requests.
+        :return: list of elog.Message (see read(raw=True)) in the order of targets, or elog.ResultSet
+        """
+        from elog.export import _map_ordered
+        from elog.resultset import ResultSet
+
+        def read(msg_id):
+            try:
+                return self.read(msg_id, timeout, raw=True)
+            except LogbookInvalidMessageID:
+                return None
+
+        msg_ids = self._resolve_targets(targets, n_results, timeout)
+        messages = (message for _, message in _map_ordered(self._bind_context(read), msg_ids, workers)
+                    if message is not None)
+        return ResultSet.from_messages(messages) if columnar else list(messages)
+
+    @_operation
+    def edit_many(self, targets, attributes=None, workers=4, n_results=None, timeout=None, *, deadline=None,
+                  **kwargs):
+        """
+        Applies the same attribute changes to many messages with concurrent requests, e.g. to set Status=Closed
+        on all results of a search:
+
+            result = logbook.edit_many({'Status': 'Open'}, Status='Closed', workers=8)
+
+        Each message is read once and submitted with its merged attributes. Text and attachments are kept as
+        they are (attachments are not uploaded again) and messages which already have the requested values are
+        not submitted at all. Failure of one message does not stop editing of the others.
+
+        :param targets: list of message IDs or a search term (string or dictionary, see search())
+        :param attributes: dictionary of the attributes to be changed
+        :param workers: number of concurrent requests
+        :param n_results: maximal number of search results to be edited (default: all results)
+        :param timeout: The timeout value to be passed to the requests.
+        :param deadline: Total time budget of the call in seconds shared by all its requests.
+        :param kwargs: Anything in the kwargs will be interpreted as attribute (see post())
+        :return: BulkResult(succeeded, failed) with IDs of the edited messages and dictionary {msg_id: exception}
+        """
+        attributes = {**(attributes or {}), **kwargs}  # kwargs as attributes with higher priority
+        msg_ids = self._resolve_targets(targets, n_results, timeout)
+
+        def edit(msg_id):
+            try:
+                self._submit_edit(self.read(msg_id, timeout, raw=True), attributes, timeout)
+            except LogbookError as e:
+                return e
+
+        results = self._map_concurrently(edit, msg_ids, workers)
+        return BulkResult([msg_id for msg_id, error in zip(msg_ids, results) if error is None],
+                          {msg_id: error for msg_id, error in zip(msg_ids, results) if error is not None})
+
+    @_operation
+    def read(self, msg_id, timeout=None, *, raw=False, deadline=None):
         """
         Reads message from the logbook server and returns tuple of (message, attributes, attachments) where:
         message: string with message body
@@ -324,21 +550,19 @@ class Logbook(object):
 
         :param msg_id: ID of the message to be read
         :param timeout: The timeout value to be passed to the get request.
+        :param raw: If True elog.Message is returned instead of the tuple. It keeps only the response of the server
+                    and parses it on access, which needs less memory when many messages are kept. It can be unpacked
+                    as the tuple.
+        :param deadline: Total time budget of the call in seconds shared by all its requests. If it is spent,
+                         LogbookServerTimeout is raised. (default: None, no limit)
         :return: message, attributes, attachments
         """
 
-        request_headers = dict()
-        if self._user or self._password:
-            request_headers['Cookie'] = self._make_user_and_pswd_cookie()
-
         try:
-            self._check_if_message_on_server(msg_id)  # raises exceptions if no message or no response from server
-            response = requests.get(self._url + str(msg_id) + '?cmd=download', headers=request_headers,
-                                    allow_redirects=False, verify=False, timeout=timeout)
-
-            # Validate response. If problems Exception will be thrown.
-            resp_message, resp_headers, resp_msg_id = _validate_response(response)
-
+            # One request: the download command returns the message or an error page if there is no such message
+            resp_message = self._download_entry(msg_id, timeout)
+            if resp_message is None:
+                raise LogbookInvalidMessageID('Message with ID: ' + str(msg_id) + ' does not exist on logbook.')
 
         except requests.Timeout as e:
 
@@ -354,47 +578,22 @@ class Logbook(object):
             raise LogbookServerProblem('Cannot access logbook server to read the message with ID: ' + str(msg_id) +
                                        'because of:\n' + '{0}'.format(e))
 
-        # Parse message to separate message body, attributes and attachments
-        attributes = dict()
-        attachments = list()
-
-        returned_msg = resp_message.decode('iso-8859-1', 'ignore').splitlines()
-        delimiter_idx = returned_msg.index('========================================')
-
-        message = '\n'.join(returned_msg[delimiter_idx + 1:])
-        for line in returned_msg[0:delimiter_idx]:
-            line = line.split(': ')
-            data = ''.join(line[1:])
-            if line[0] == 'Attachment':
-                if not data:
-                    # Treat the empty string as special case,
-                    # otherwise the split below returns [""] and attachments is [self._url]
-                    attachments = []
-                else:
-                    attachments = data.split(',')
-                    # Here are only attachment names, make a full url out of it, so they could be
-                    # recognisable by others, and downloaded if needed
-                    attachments = [self._url + '{0}'.format(i) for i in attachments]
-            else:
-                attributes[line[0]] = data
-
-        return message, attributes, attachments
+        # Message separates message body, attributes and attachments
+        message = Message(msg_id, resp_message, self._url)
+        return message if raw else tuple(message)
 
-    def delete_attachment(self, msg_id, text, attributes, attachment_id, timeout=None):
+    @_operation
+    def delete_attachment(self, msg_id, text, attributes, attachment_id, timeout=None, *, deadline=None):
 
+        attributes = dict(attributes)  # do not modify the dictionary of the caller
         attributes[f'delatt{attachment_id}'] = 'Delete'
         attributes['cmd'] = 'Update'
         attributes['exp'] = self.logbook
-        if self._user:
-            attributes['unm'] = self._user
-        if self._password:
-            attributes['upwd'] = self._password
 
         just_text = list()
         just_text.append(('Text', ('', text.encode('iso-8859-1'))))
         try:
-            response = requests.post(self._url, data=attributes, verify=False, allow_redirects=False,
-                                     files=just_text)
+            response = self._send('POST', self._url, data=attributes, files=just_text, timeout=timeout)
         except requests.Timeout as e:
             # Catch here a timeout o the post request.
             # Raise the logbook excetion and let the user handle it
@@ -402,15 +601,14 @@ class Logbook(object):
                                        '{1}'.format(sys._getframe().f_code.co_name, e))
         except requests.RequestException as e:
             # Check if message on server.
-            self._check_if_message_on_server(msg_id)  # raises exceptions if no message or no response from server
+            self._check_if_message_on_server(msg_id, timeout)  # raises exceptions if no message or no response
 
             # If here: message is on server but cannot be downloaded (should never happen)
             raise LogbookServerProblem('Cannot access logbook server to post a message, ' + 'because of:\n' +
                                        '{0}'.format(e))
-        finally:
-            del attributes[f'delatt{attachment_id}']
 
-    def delete_all_attachments(self, msg_id, timeout=None):
+    @_operation
+    def delete_all_attachments(self, msg_id, timeout=None, *, deadline=None):
 
         message, attributes, attachments = self.read(msg_id, timeout)
         n_attach = len(attachments)
@@ -418,25 +616,86 @@ class Logbook(object):
             self.delete_attachment(msg_id, message, attributes, attachment_id, timeout)
 
 
-    def delete(self, msg_id, timeout=None):
+    @_operation
+    def delete(self, msg_id, timeout=None, *, deadline=None):
         """
         Deletes message thread (!!!message + all replies!!!) from logbook.
         It also deletes all attachments of corresponding messages from the server.
 
         :param msg_id: message to be deleted
         :param timeout: timeout value to be passed to the get request
+        :param deadline: total time budget in seconds of all requests made by the call
         :return:
         """
 
-        request_headers = dict()
-        if self._user or self._password:
-            request_headers['Cookie'] = self._make_user_and_pswd_cookie()
+        self._check_if_message_on_server(msg_id, timeout)  # check if something to delete
+        self._delete_entry(msg_id, timeout)
 
-        try:
-            self._check_if_message_on_server(msg_id)  # check if something to delete
+    @_operation
+    def delete_many(self, targets, workers=4, n_results=None, timeout=None, *, deadline=None):
+        """
+        Deletes many messages with concurrent requests, e.g. to clean up a logbook:
+
+            result = logbook.delete_many(logbook.get_message_ids(), workers=8)
+
+        Messages are read first to find the threads. Only the messages whose parent is not deleted as well (thread
+        roots and orphaned replies) are deleted, their replies are removed by the server with them. Messages removed
+        in the meantime (e.g. as replies of other deleted messages) count as deleted.
+
+        :param targets: list of message IDs or a search term (string or dictionary, see search())
+        :param workers: number of concurrent requests
+        :param n_results: maximal number of search results to be deleted (default: all results)
+        :param timeout: timeout value to be passed to the requests
+        :param deadline: total time budget in seconds of all requests made by the call
+        :return: BulkResult(succeeded, failed) with IDs of the deleted messages and dictionary {msg_id: exception}
+        """
+        msg_ids = self._resolve_targets(targets, n_results, timeout)
+
+        def read_parent(msg_id):
+            try:
+                return int(self.read(msg_id, timeout, raw=True).get('In reply to') or 0)
+            except LogbookError as e:
+                return e
+
+        failed = dict()
+        parents = dict()
+        for msg_id, parent in zip(msg_ids, self._map_concurrently(read_parent, msg_ids, workers)):
+            if isinstance(parent, LogbookError):
+                failed[msg_id] = parent
+            else:
+                parents[msg_id] = parent
+
+        def root(msg_id):
+            while parents[msg_id] in parents:
+                msg_id = parents[msg_id]
+            return msg_id
+
+        def delete(msg_id):
+            try:
+                self._delete_entry(msg_id, timeout)
+            except LogbookError as e:
+                # Fails also if it was already deleted with its parent, which is fine
+                try:
+                    return e if self.exists(msg_id, timeout) else None
+                except LogbookError:
+                    return e
 
-            response = requests.get(self._url + str(msg_id) + '?cmd=Delete&confirm=Yes', headers=request_headers,
-                                    allow_redirects=False, verify=False, timeout=timeout)
+        roots = [msg_id for msg_id in parents if root(msg_id) == msg_id]
+        failed_roots = {msg_id: error for msg_id, error in zip(roots, self._map_concurrently(delete, roots, workers))
+                        if error is not None}
+        for msg_id in parents:
+            if root(msg_id) in failed_roots:
+                failed[msg_id] = failed_roots[root(msg_id)]
+
+        return BulkResult([msg_id for msg_id in msg_ids if msg_id not in failed],
+                          {msg_id: failed[msg_id] for msg_id in msg_ids if msg_id in failed})
+
+    def _delete_entry(self, msg_id, timeout=None):
+        """
+        Sends the delete command of the message (thread) without checking if it exists.
+        """
+        try:
+            response = self._send('GET', self._url + str(msg_id) + '?cmd=Delete&confirm=Yes', timeout=timeout)
 
             _validate_response(response)  # raises exception if any other error identified
 
@@ -457,20 +716,29 @@ class Logbook(object):
         if response.status_code == 200:
             raise LogbookServerProblem('Cannot process delete command (only logbooks in English supported).')
 
-    def search(self, search_term, n_results=20, scope="subtext", timeout=None):
+    @_operation
+    def search(self, search_term, n_results=20, scope="subtext", timeout=None, *, lazy=False, prefetch=8,
+               deadline=None):
         """
-        Searches the logbook and returns the message ids.
+        Searches the logbook and returns the message ids. If a search index is used (see use_search_index()) and
+        it is fresh, the search is answered by the index without a request to the server.
 
         :param timeout: timeout value to be passed to the get request
+        :param lazy: If True elog.MessageSequence of the found messages is returned instead of the ids. Messages
+                     are read when they are used, while iterating up to prefetch messages are read ahead.
+        :param prefetch: maximal number of messages read ahead by the lazy sequence
+        :param deadline: total time budget in seconds of all requests made by the call
 
         """
-        request_headers = dict()
-        if self._user or self._password:
-            request_headers['Cookie'] = self._make_user_and_pswd_cookie()
-
         # Putting n_results = 0 crashes the elog. also in the web-gui.
         n_results = 1 if n_results < 1 else n_results
 
+        index = self._search_index
+        if index is not None and index.is_fresh():
+            result = index.search(search_term, n_results, scope)
+            if result is not None:
+                return MessageSequence(self, result, prefetch, timeout) if lazy else result
+
         params = {
             "mode": "full",
             "reverse": "1",
@@ -489,8 +757,7 @@ class Logbook(object):
                 params.pop(key)
 
         try:
-            response = requests.get(self._url, params=params, headers=request_headers,
-                                    allow_redirects=False, verify=False, timeout=timeout)
+            response = self._send('GET', self._url, params=params, timeout=timeout)
 
             # Validate response. If problems Exception will be thrown.
             _validate_response(response)
@@ -507,27 +774,241 @@ class Logbook(object):
             raise LogbookServerProblem('Cannot access logbook server to read message ids '
                                        'because of:\n' + '{0}'.format(e))
 
-        from lxml import html
-        tree = html.fromstring(resp_message.content)
-        message_ids = tree.xpath('(//tr/td[@class="list1" or @class="list2"][1])/a/@href')
-        message_ids = [int(m.split("/")[-1]) for m in message_ids]
-        return message_ids
+        msg_ids = _parse_message_ids(resp_message.content)
+        return MessageSequence(self, msg_ids, prefetch, timeout) if lazy else msg_ids
 
-    def get_last_message_id(self, timeout=None):
-        ids = self.get_message_ids(timeout)
-        if len(ids) > 0:
-            return ids[0]
-        else:
+    @_operation
+    def get_last_message_id(self, timeout=None, *, deadline=None):
+        return self.last_id(timeout)
+
+    @_operation
+    def last_id(self, timeout=None, *, deadline=None):
+        """
+        Returns ID of the newest message with the smallest possible request (listing of one entry).
+
+        :param timeout: The timeout value to be passed to the get request.
+        :return: message ID or None if the logbook is empty
+        """
+        rows = self._get_newest_entries(1, timeout=timeout)
+        return rows[0][0] if rows else None
+
+    @_operation
+    def exists(self, msg_id, timeout=None, *, deadline=None):
+        """
+        Checks if there is a message with msg_id on the server. The download command is used, which returns the
+        plain message instead of the rendered html page.
+
+        :param msg_id: ID of the message
+        :param timeout: The timeout value to be passed to the get request.
+        :return: True if the message exists
+        """
+        try:
+            return self._download_entry(msg_id, timeout) is not None
+
+        except requests.Timeout as e:
+            # Catch here a timeout of the get request.
+            # Raise the logbook exception and let the user handle it
+            raise LogbookServerTimeout('{0} method cannot be completed because of a network timeout:\n'
+                                       '{1}'.format(sys._getframe().f_code.co_name, e))
+
+        except requests.RequestException as e:
+            raise LogbookServerProblem('No response from the logbook server.\nDetails: ' + '{0}'.format(e))
+
+    @_operation
+    def exists_many(self, msg_ids, workers=4, timeout=None, *, deadline=None):
+        """
+        Checks existence of many messages with concurrent requests (see exists()).
+
+        :param msg_ids: IDs of the messages
+        :param workers: number of concurrent requests
+        :param timeout: The timeout value to be passed to the get requests.
+        :return: dictionary {msg_id: True if the message exists}
+        """
+        msg_ids = list(msg_ids)
+        return dict(zip(msg_ids, self._map_concurrently(lambda msg_id: self.exists(msg_id, timeout), msg_ids,
+                                                        workers)))
+
+    @_operation
+    def count(self, timeout=None, *, deadline=None):
+        """
+        Returns number of messages in the logbook. The number is taken from the header of the listing of one entry.
+        Only if the server does not show it, the whole listing is requested.
+
+        :param timeout: The timeout value to be passed to the get request.
+        :return: number of messages
+        """
+        params = {
+            "mode": "summary",
+            "reverse": "1",
+            "npp": 1
+        }
+        try:
+            response = self._send('GET', self._url, params=params, timeout=timeout)
+
+            # Validate response. If problems Exception will be thrown.
+            _validate_response(response)
+
+        except requests.Timeout as e:
+            # Catch here a timeout of the get request.
+            # Raise the logbook exception and let the user handle it
+            raise LogbookServerTimeout('{0} method cannot be completed because of a network timeout:\n'
+                                       '{1}'.format(sys._getframe().f_code.co_name, e))
+
+        except requests.RequestException as e:
+            raise LogbookServerProblem('Cannot access logbook server to count messages '
+                                       'because of:\n' + '{0}'.format(e))
+
+        n_entries = _parse_number_of_entries(response.content)
+        if n_entries is None:
+            n_entries = len(self.get_message_ids(timeout))
+        return n_entries
+
+    def follow(self, since_id=None, poll_interval=5, max_interval=60, include_edits=False, window=20,
+               timeout=None, *, workers=4, deadline=None):
+        """
+        Generator which follows the logbook and yields new (and optionally edited) messages as they appear. Instead
+        of downloading the whole listing on each poll, only one small page of the newest entries is requested. If
+        nothing happens the polling interval is doubled up to max_interval, and reset to poll_interval as soon as
+        there is something new. Stop following by breaking out of the loop.
+
+            for event in logbook.follow():
+                message, attributes, attachments = event.entry
+
+        :param since_id: yield messages with ID higher than since_id. If not specified, only messages posted after
+                         the first poll are yielded.
+        :param poll_interval: minimal time between two polls in seconds
+        :param max_interval: maximal time between two polls in seconds when the logbook is quiet
+        :param include_edits: If True, changes of the newest `window` messages are detected and yielded as well
+        :param window: number of newest messages requested per poll (and watched for edits)
+        :param timeout: The timeout value to be passed to the get requests.
+        :param workers: number of new (or edited) messages of one poll read concurrently
+        :param deadline: If specified, following stops (the generator is exhausted) after deadline seconds. Requests
+                         of the polls are limited to the remaining time.
+        :return: generator of FollowEvent(msg_id, edited, entry) where entry is what read(msg_id) returns
+        """
+        from elog.follow import Follower
+        follower = Follower(self, since_id, poll_interval, max_interval, include_edits, window, timeout, workers)
+        expires = None if deadline is None else time.monotonic() + deadline
+        while True:
+            events = self._poll_until(follower, expires)
+            if events is None:
+                return
+            yield from events
+            time.sleep(_sleep_time(follower.interval, expires))
+
+    async def follow_async(self, since_id=None, poll_interval=5, max_interval=60, include_edits=False, window=20,
+                           timeout=None, *, workers=4, deadline=None):
+        """
+        Asynchronous variant of follow(). Requests are executed in the default executor of the running loop.
+
+            async for event in logbook.follow_async():
+                message, attributes, attachments = event.entry
+
+        For parameters see follow().
+        """
+        from elog.follow import Follower
+        follower = Follower(self, since_id, poll_interval, max_interval, include_edits, window, timeout, workers)
+        expires = None if deadline is None else time.monotonic() + deadline
+        loop = asyncio.get_running_loop()
+        while True:
+            events = await loop.run_in_executor(None, self._poll_until, follower, expires)
+            if events is None:
+                return
+            for event in events:
+                yield event
+            await asyncio.sleep(_sleep_time(follower.interval, expires))
+
+    def _poll_until(self, follower, expires):
+        """
+        Polls the followed logbook once with requests limited to the expiration time (time.monotonic()).
+
+        :return: list of FollowEvent or None if following expired
+        """
+        if expires is None:
+            return follower.poll()
+
+        try:
+            with self._deadline(expires - time.monotonic()):
+                return follower.poll()
+        except LogbookServerTimeout:
+            if time.monotonic() < expires:
+                raise
             return None
 
-    def get_message_ids(self, timeout=None):
-        request_headers = dict()
-        if self._user or self._password:
-            request_headers['Cookie'] = self._make_user_and_pswd_cookie()
+    @_operation
+    def export(self, path, format='jsonl', include_attachments=False, workers=4, resume=True, columns=None,
+               timeout=None, *, deadline=None):
+        """
+        Exports all messages to a file. Messages are read concurrently and written in the order of their IDs as they
+        arrive, so memory use does not grow with the size of the logbook. Progress is saved to <path>.checkpoint and
+        an interrupted export continues where it stopped when called again (unless resume=False).
+
+        JSON lines: one object {"msg_id", "attributes", "message", "attachments"} per line.
+        CSV: columns msg_id, attributes, message, attachments and other_attributes (JSON of attributes which are not
+        in the columns, e.g. attributes which appear only in later messages).
+
+        :param path: path of the output file
+        :param format: 'jsonl' or 'csv'
+        :param include_attachments: If True attachments are downloaded to directory <path>.attachments/<msg_id>/
+                                    and the exported attachments are relative paths of the files instead of urls.
+        :param workers: number of messages read concurrently
+        :param resume: continue an interrupted export (if there is a checkpoint)
+        :param columns: attribute columns of CSV (default: attributes of the first exported message)
+        :param timeout: The timeout value to be passed to the requests.
+        :param deadline: Total time budget of the call in seconds shared by all its requests. If it is spent,
+                         LogbookServerTimeout is raised and the export can be resumed later. (default: None, no limit)
+        :return: number of exported messages
+        """
+        from elog.export import Exporter
+        return Exporter(self, path, format, include_attachments, workers, columns, timeout).run(resume)
+
+    @_operation
+    def _get_newest_entries(self, n_entries=None, timeout=None):
+        """
+        Requests one page of the listing with n_entries newest messages.
 
+        :param n_entries: number of entries on the page (None: all entries)
+        :param timeout: The timeout value to be passed to the get request.
+        :return: list of (msg_id, row_text) tuples, newest first
+        """
+        params = {
+            "mode": "summary",
+            "reverse": "1"
+        }
+        url = self._url + 'page'  # all entries on one page
+        if n_entries is not None:
+            url = self._url
+            params["npp"] = max(1, n_entries)  # Putting npp = 0 crashes the elog
         try:
-            response = requests.get(self._url + 'page', headers=request_headers,
-                                    allow_redirects=False, verify=False, timeout=timeout)
+            response = self._send('GET', url, params=params, timeout=timeout)
+
+            # Validate response. If problems Exception will be thrown.
+            _validate_response(response)
+
+        except requests.Timeout as e:
+            # Catch here a timeout of the get request.
+            # Raise the logbook exception and let the user handle it
+            raise LogbookServerTimeout('{0} method cannot be completed because of a network timeout:\n'
+                                       '{1}'.format(sys._getframe().f_code.co_name, e))
+
+        except requests.RequestException as e:
+            raise LogbookServerProblem('Cannot access logbook server to read message ids '
+                                       'because of:\n' + '{0}'.format(e))
+
+        return _parse_listing_rows(response.content)
+
+    @_operation
+    def get_message_ids(self, timeout=None, *, lazy=False, prefetch=8, deadline=None):
+        """
+        Returns ids of all messages of the logbook.
+
+        :param timeout: timeout value to be passed to the get request
+        :param lazy: If True elog.MessageSequence of all messages is returned instead of the ids (see search())
+        :param prefetch: maximal number of messages read ahead by the lazy sequence
+        :param deadline: total time budget in seconds of all requests made by the call
+        """
+        try:
+            response = self._send('GET', self._url + 'page', timeout=timeout)
 
             # Validate response. If problems Exception will be thrown.
             _validate_response(response)
@@ -544,23 +1025,23 @@ class Logbook(object):
             raise LogbookServerProblem('Cannot access logbook server to read message ids '
                                        'because of:\n' + '{0}'.format(e))
 
-        from lxml import html
-        tree = html.fromstring(resp_message.content)
-        message_ids = tree.xpath('(//tr/td[@class="list1" or @class="list2"][1])/a/@href')
-        message_ids = [int(m.split("/")[-1]) for m in message_ids]
-        return message_ids
+        msg_ids = _parse_message_ids(resp_message.content)
+        return MessageSequence(self, msg_ids, prefetch, timeout) if lazy else msg_ids
 
-    def download_attachment(self, url, timeout=None):
+    @_operation
+    def download_attachment(self, url, timeout=None, *, deadline=None):
         """
-        Download an attachment from the specified url.
+        Download an attachment from the specified url. If an attachment cache is used (see use_attachment_cache()),
+        cached attachments are not downloaded again.
         """
-        request_headers = dict()
-        if self._user or self._password:
-            request_headers['Cookie'] = self._make_user_and_pswd_cookie()
+        cache = self._attachment_cache
+        if cache is not None:
+            content = cache.get(url)
+            if content is not None:
+                return content
 
         try:
-            response = requests.get(url, headers=request_headers, allow_redirects=False,
-                                    verify=False, timeout=timeout)
+            response = self._send('GET', url, timeout=timeout)
             # If there is no message code 200 will be returned (OK) and _validate_response will not recognise it
             # but there will be some error in the html code.
             resp_message, resp_headers, resp_msg_id = _validate_response(response)
@@ -571,42 +1052,90 @@ class Logbook(object):
             raise LogbookServerTimeout('{0} method cannot be completed because of a network timeout:\n' +
                                        '{1}'.format(sys._getframe().f_code.co_name, e))
 
+        if cache is not None:
+            cache.put(url, resp_message)
         return resp_message
 
+    def _resolve_targets(self, targets, n_results=None, timeout=None):
+        """
+        Returns list of message IDs of the bulk operation. Search terms (string or dictionary) are searched.
+
+        :param targets: list of message IDs or search term
+        :param n_results: maximal number of search results (default: all results)
+        """
+        if isinstance(targets, (str, dict)):
+            if n_results is None:
+                n_results = self.count(timeout)
+            return self.search(targets, n_results, timeout=timeout) if n_results else []
+        return list(dict.fromkeys(int(msg_id) for msg_id in targets))  # without duplicates, in the given order
+
+    def _submit_edit(self, entry, changes, timeout=None):
+        """
+        Submits message with changed attributes. Text and attachments of the message are kept. Nothing is sent if
+        the message already has all values.
+
+        :param entry: elog.Message to be edited
+        :param changes: dictionary of the changed attributes
+        """
+        if all(entry.get(attribute) == str(value) for attribute, value in changes.items()):
+            return
+
+        attributes = {**entry.attributes, **changes}
+        attributes['edit_id'] = str(entry.msg_id)
+        attributes['skiplock'] = '1'
+        # Existing attachments are referenced by their stored names, so they are kept without uploading them
+        for i, attachment in enumerate(entry.attachments):
+            attributes[f'attachment{i}'] = os.path.basename(attachment)
+
+        _remove_reserved_attributes(attributes)
+        self._add_base_msg_attributes(attributes)
+        attributes = _encode_values(_replace_special_characters_in_attribute_keys(attributes))
+
+        # Text has to be sent, otherwise elog clears it. It is sent as "file" to force multipart/form-data.
+        files = [('Text', ('', entry.text.encode('iso-8859-1')))]
+        try:
+            response = self._send('POST', self._url, data=attributes, files=files, timeout=timeout)
+            _validate_response(response)
+
+        except requests.Timeout as e:
+            raise LogbookServerTimeout('{0} method cannot be completed because of a network timeout:\n'
+                                       '{1}'.format(sys._getframe().f_code.co_name, e))
+
+        except requests.RequestException as e:
+            raise LogbookServerProblem('Cannot access logbook server to edit the message with ID: ' +
+                                       str(entry.msg_id) + ' because of:\n' + '{0}'.format(e))
+
     def _check_if_message_on_server(self, msg_id, timeout=None):
-        """Try to load page for specific message. If there is a html tag like <td class="errormsg"> then there is no
-        such message.
+        """
+        Raises LogbookInvalidMessageID if there is no message with msg_id on the server (see exists()).
 
         :param msg_id: ID of message to be checked
         :params timeout: The value of timeout to be passed to the get request
         :return:
         """
+        if not self.exists(msg_id, timeout):
+            raise LogbookInvalidMessageID('Message with ID: ' + str(msg_id) + ' does not exist on logbook.')
 
-        request_headers = dict()
-        if self._user or self._password:
-            request_headers['Cookie'] = self._make_user_and_pswd_cookie()
-        try:
-            response = requests.get(self._url + str(msg_id), headers=request_headers, allow_redirects=False,
-                                    verify=False, timeout=timeout)
+    def _download_entry(self, msg_id, timeout=None):
+        """
+        Requests message with the download command.
 
-            # If there is no message code 200 will be returned (OK) and _validate_response will not recognise it
-            # but there will be some error in the html code.
-            resp_message, resp_headers, resp_msg_id = _validate_response(response)
-            # If there is no message, code 200 will be returned (OK) but there will be some error indication in
-            # the html code.
-            if re.findall('<td.*?class="errormsg".*?>.*?</td>',
-                          resp_message.decode('utf-8', 'ignore'),
-                          flags=re.DOTALL):
-                raise LogbookInvalidMessageID('Message with ID: ' + str(msg_id) + ' does not exist on logbook.')
+        :param msg_id: ID of the message
+        :param timeout: The value of timeout to be passed to the get request
+        :return: content of the response or None if there is no such message
+        """
+        response = self._send('GET', self._url + str(msg_id) + '?cmd=download', timeout=timeout)
 
-        except requests.Timeout as e:
-            # Catch here a timeout o the post request.
-            # Raise the logbook exception and let the user handle it
-            raise LogbookServerTimeout('{0} method cannot be completed because of a network timeout:\n' +
-                                       '{1}'.format(sys._getframe().f_code.co_name, e))
+        # Validate response. If problems Exception will be thrown.
+        resp_message, resp_headers, resp_msg_id = _validate_response(response)
+        if resp_message.startswith(b'$@MID@$:'):
+            return resp_message
 
-        except requests.RequestException as e:
-            raise LogbookServerProblem('No response from the logbook server.\nDetails: ' + '{0}'.format(e))
+        # If there is no message, code 200 will be returned (OK) but there will be some error indication in
+        # the html code.
+        if re.findall('<td.*?class="errormsg".*?>.*?</td>', resp_message.decode('utf-8', 'ignore'), flags=re.DOTALL):
+            return None
+        raise LogbookServerProblem('Unexpected response to the download command of message with ID: ' + str(msg_id))
 
     def _add_base_msg_attributes(self, data):
         """
@@ -616,10 +1145,6 @@ class Logbook(object):
         """
         data['cmd'] = 'Submit'
         data['exp'] = self.logbook
-        if self._user:
-            data['unm'] = self._user
-        if self._password:
-            data['upwd'] = self._password
 
     def _prepare_attachments(self, files):
         """
@@ -681,18 +1206,220 @@ class Logbook(object):
 
     def _make_user_and_pswd_cookie(self):
         """
-        prepares user name and password cookie. It is sent in header when posting a message.
-        :return: user name and password value for the Cookie header
+        prepares user name and password cookie. It is sent with every request unless an elog session is established.
+        :return: dictionary with user name and password cookies
         """
-        cookie = ''
+        cookie = dict()
         if self._user:
-            cookie += 'unm=' + self._user + ';'
+            cookie['unm'] = self._user
         if self._password:
-            cookie += 'upwd=' + self._password + ';'
+            cookie['upwd'] = self._password
 
         return cookie
 
-    def get_parent(self, msg_id, timeout=None):
+    def _send(self, method, url, params=None, data=None, files=None, timeout=None):
+        """
+        Sends request to the logbook server through the transport. Credentials are added to the request (as
+        cookies or, if form data is sent, as form fields) unless an elog session was established with login().
+        If the session expired in the meantime, it is renewed and the request is repeated.
+
+        :param method: 'GET' or 'POST'
+        :param url: full url of the request
+        :param params: dictionary of query parameters
+        :param data: dictionary of form fields (POST only)
+        :param files: list of multipart files (POST only)
+        :param timeout: The value of timeout to be passed to the request
+        :return: requests.Response
+        """
+        if self._session_login and self._login.logged_in is None and (self._user or self._password):
+            with self._login.lock:
+                if self._login.logged_in is None:  # other thread could log in while waiting for the lock
+                    self.login(timeout=timeout)
+
+        for attempt in range(MAX_SESSION_RENEWALS + 1):
+            login_generation = self._login.generation
+            # If the session keeps expiring, the last attempt does not depend on it and sends the credentials
+            response = self._exchange(method, url, attempt, params=params, timeout=timeout,
+                                      **self._credentials_for(data, files, attempt == MAX_SESSION_RENEWALS))
+
+            if attempt == MAX_SESSION_RENEWALS or not (self._session_login or self._login.logged_in) or \
+                    not (self._user or self._password) or not _is_login_page(response):
+                return response
+
+            # Session expired on the server (or was renewed by other thread in the meantime). Authenticate again
+            # if nobody else did it yet and repeat the request.
+            with self._login.lock:
+                if login_generation == self._login.generation:
+                    self.login(timeout=timeout)
+            _rewind_files(files)
+
+    def _exchange(self, method, url, retries=0, **kwargs):
+        """
+        Makes one request through the transport and emits RequestEvent to the hooks.
+
+        :param method: 'GET' or 'POST'
+        :param url: full url of the request
+        :param retries: number of previous attempts of the same request
+        :param kwargs: keyword arguments passed to transport.request()
+        :return: requests.Response
+        """
+        kwargs['timeout'] = self._request_timeout(kwargs.get('timeout'))
+        if not self._hooks:
+            return self._transport.request(method, url, **kwargs)
+
+        start = time.perf_counter()
+        response = None
+        error = None
+        try:
+            response = self._transport.request(method, url, **kwargs)
+            return response
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            spans = self._spans()
+            event = RequestEvent(spans[-1].operation if spans else None, method, urllib.parse.urlsplit(url).path,
+                                 response.status_code if response is not None else None,
+                                 _request_size(response.request) if response is not None else 0,
+                                 _response_size(response) if response is not None else 0,
+                                 time.perf_counter() - start, retries, error)
+            for span in spans:
+                span.add(event)
+            self._emit(event)
+
+    @contextlib.contextmanager
+    def _deadline(self, seconds):
+        """
+        Limits the total time of all requests made by the current thread within the context to seconds. Nested
+        deadlines can only shorten the outer one.
+
+        :param seconds: time budget in seconds (None: no additional limit)
+        """
+        previous = getattr(self._local, 'deadline', None)
+        if seconds is not None:
+            expires = time.monotonic() + seconds
+            self._local.deadline = expires if previous is None else min(previous, expires)
+        try:
+            yield
+        finally:
+            self._local.deadline = previous
+
+    def _request_timeout(self, timeout):
+        """
+        Returns timeout of the next request limited by the remaining time budget of the current thread.
+
+        :param timeout: timeout requested by the caller (number, (connect, read) tuple or None)
+        :return: timeout to be passed to the transport
+        :raise LogbookServerTimeout: if the time budget is already spent
+        """
+        expires = getattr(self._local, 'deadline', None)
+        if expires is None:
+            return timeout
+
+        remaining = expires - time.monotonic()
+        if remaining <= 0:
+            raise LogbookServerTimeout('Deadline exceeded before the request to the logbook server could be sent.')
+        if timeout is None:
+            return remaining
+        if isinstance(timeout, tuple):
+            return tuple(remaining if t is None else min(t, remaining) for t in timeout)
+        return min(timeout, remaining)
+
+    def use_search_index(self, index):
+        """
+        Answers search() with the local index while it is fresh, otherwise the server is searched.
+
+        :param index: elog.SearchIndex of this logbook or None to always search on the server
+        """
+        self._search_index = index
+
+    def use_attachment_cache(self, cache):
+        """
+        Keeps downloaded attachments in the cache. Attachments in the cache are not downloaded again, neither by
+        download_attachment() nor when comparing attachments while editing a message.
+
+        :param cache: elog.AttachmentCache or None to always download attachments
+        """
+        self._attachment_cache = cache
+
+    def add_hook(self, hook):
+        """
+        Registers a hook which is called with an event for each request made to the server
+        (elog.instrumentation.RequestEvent) and for each call of a public method (elog.instrumentation.SpanEvent).
+        Hooks are called in the thread which made the request and must not raise exceptions.
+        See elog.StatsCollector and elog.LogTracer for the built-in hooks.
+
+        :param hook: callable accepting one argument (the event)
+        """
+        with self._lock:
+            self._hooks = self._hooks + (hook,)
+
+    def remove_hook(self, hook):
+        """
+        Removes hook registered with add_hook().
+
+        :param hook: hook to be removed
+        """
+        with self._lock:
+            self._hooks = tuple(h for h in self._hooks if h is not hook)
+
+    def _emit(self, event):
+        for hook in self._hooks:
+            hook(event)
+
+    def _spans(self):
+        """ Returns the stack of running public method calls of the current thread."""
+        spans = getattr(self._local, 'spans', None)
+        if spans is None:
+            spans = self._local.spans = list()
+        return spans
+
+    def _map_concurrently(self, function, items, workers):
+        """
+        Calls function(item) for all items in a pool of threads. The time budget (deadline) and the running
+        public method calls (for the hooks) of the calling thread apply to the calls in the pool.
+
+        :return: list of results in the order of items
+        """
+        with concurrent.futures.ThreadPoolExecutor(max(1, workers)) as executor:
+            return list(executor.map(self._bind_context(function), items))
+
+    def _bind_context(self, function):
+        """
+        Returns function which can be called in other threads with the time budget (deadline) and the running public
+        method calls (for the hooks) of the calling thread.
+        """
+        expires = getattr(self._local, 'deadline', None)
+        spans = list(self._spans())
+
+        def call(item):
+            previous = getattr(self._local, 'deadline', None), self._spans()
+            self._local.deadline, self._local.spans = expires, list(spans)
+            try:
+                return function(item)
+            finally:
+                self._local.deadline, self._local.spans = previous
+
+        return call
+
+    def _credentials_for(self, data, files, always=False):
+        """
+        Prepares keyword arguments for the request with credentials included, unless the session is authenticated.
+
+        :param data: dictionary of form fields or None
+        :param files: list of multipart files or None
+        :param always: include credentials even if the session is authenticated
+        :return: dictionary with 'data', 'files' and 'cookies' keyword arguments
+        """
+        credentials = dict() if self._login.logged_in and not always else self._make_user_and_pswd_cookie()
+        if data is None:
+            return {'files': files, 'cookies': credentials}
+
+        # Elog expects credentials of the submitted forms as form fields (latin1 encoded as all other values)
+        return {'data': {**data, **_encode_values(credentials)}, 'files': files}
+
+    @_operation
+    def get_parent(self, msg_id, timeout=None, *, deadline=None):
         """
         :return: the message id of the message specify by msg_id
         """
@@ -710,7 +1437,8 @@ class Logbook(object):
         """
         return [int(child) for child in children_string.split(',')]
 
-    def get_children(self, msg_id, timeout=None):
+    @_operation
+    def get_children(self, msg_id, timeout=None, *, deadline=None):
         """
         :return: a list of children of a message. The list could be empty if the message has no children.
         """
@@ -721,7 +1449,8 @@ class Logbook(object):
         else:
             return self.from_string_to_list(children_str)
 
-    def get_descendants(self, msg_id, timeout=None):
+    @_operation
+    def get_descendants(self, msg_id, timeout=None, *, deadline=None):
         """
         :return: a list with all children of a message recursively.
                 The list could be empty if the message has no descendant.
@@ -734,11 +1463,12 @@ class Logbook(object):
         return all_children
 
 
-    def get_siblings(self, msg_id, timeout=None):
+    @_operation
+    def get_siblings(self, msg_id, timeout=None, *, deadline=None):
         """
         :return: the list of siblings of the message specified by msg_id
         """
-        parent_id = self.get_parent(msg_id, timeout=None)
+        parent_id = self.get_parent(msg_id, timeout)
         if parent_id is None:
             return None
         return self.get_children(parent_id, timeout)
@@ -753,7 +1483,8 @@ class Logbook(object):
             cumulative_list.append(child)
             self._recursive_loop(cumulative_list, child, timeout)
 
-    def get_ancestors(self, msg_id, timeout=None):
+    @_operation
+    def get_ancestors(self, msg_id, timeout=None, *, deadline=None):
         """
         :return: the list of all predecessors up to the first element in the series. The list could be empty if the
         message correspoonding to msg_id is already the first element in the series.
@@ -765,6 +1496,25 @@ class Logbook(object):
             parent_id = self.get_parent(parent_id, timeout)
         return anchestors
 
+class _LoginState(object):
+    """
+    Session state of a Logbook: None (not authenticated yet), True (session cookie is used) or False (server does
+    not support sessions). Logbooks of one LogbookServer share it, as they share the cookies.
+    """
+
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.logged_in = None
+        self.generation = 0  # incremented with each login, so concurrent renewals are done only once
+
+    def __getstate__(self):
+        return {'logged_in': self.logged_in, 'generation': self.generation}
+
+    def __setstate__(self, state):
+        self.__init__()
+        self.__dict__.update(state)
+
+
 def _remove_reserved_attributes(attributes):
     """
     Removes elog reserved attributes (from the attributes dict) that can not be sent.
@@ -851,14 +1601,95 @@ def _validate_response(response):
                     # this may happen when deleting the last entry of a logbook
                     msg_id = None
 
-        if b'type=password' in response.content or b'type="password"' in response.content:
-            # Not too smart to check this way, but no other indication of this kind of error.
-            # C client does it the same way
+        if _is_login_page(response):
             raise LogbookAuthenticationError('Invalid username or password.')
 
     return response.content, response.headers, msg_id
 
 
+def _request_size(request):
+    """ Returns approximate number of bytes sent with the request (request line, headers and body)."""
+    body = request.body or b''
+    size = len(request.method) + len(request.url) + 11
+    size += sum(len(key) + len(value) + 4 for key, value in request.headers.items())
+    return size + len(body if isinstance(body, bytes) else str(body).encode('utf-8'))
+
+
+def _response_size(response):
+    """ Returns approximate number of bytes received with the response (status line, headers and body)."""
+    size = 17 + len(response.reason or '')
+    size += sum(len(key) + len(value) + 4 for key, value in response.headers.items())
+    return size + len(response.content)
+
+
+def _is_login_page(response):
+    """ Returns True if the server answered with the login form instead of the requested content."""
+    # Not too smart to check this way, but no other indication of this kind of error.
+    # C client does it the same way
+    return b'type=password' in response.content or b'type="password"' in response.content
+
+
+def _sleep_time(interval, expires):
+    """ Returns interval shortened to the expiration time (time.monotonic()) if there is one."""
+    if expires is None:
+        return interval
+    return max(0, min(interval, expires - time.monotonic()))
+
+
+def _rewind_files(files):
+    """
+    Rewinds file like objects of the multipart files list, so the request can be sent again.
+
+    :param files: list of [ ('attfileN', ('filename', file_object)) ] or None
+    :return:
+    """
+    for _, (_, file_obj) in files or []:
+        if hasattr(file_obj, 'seek'):
+            file_obj.seek(0)
+
+
+def _parse_message_ids(content):
+    """
+    Parses message ids from the html listing (search results or page) returned by the server.
+
+    :param content: html content of the listing
+    :return: list of message ids in the order of the listing
+    """
+    from lxml import html
+    tree = html.fromstring(content)
+    message_ids = tree.xpath('(//tr/td[@class="list1" or @class="list2"][1])/a/@href')
+    return [int(m.split("/")[-1]) for m in message_ids]
+
+
+def _parse_number_of_entries(content):
+    """
+    Parses number of entries shown in the header of the listing ("<b>123 Entries</b>").
+
+    :param content: html content of the listing
+    :return: number of entries or None if it is not shown
+    """
+    found = re.search(r'<b>\s*(\d+)\s+Entries\s*</b>', content.decode('utf-8', 'ignore'))
+    return int(found.group(1)) if found else None
+
+
+def _parse_listing_rows(content):
+    """
+    Parses rows of the html listing returned by the server. Text of the row contains all the attribute values
+    shown in the listing, so it changes when the message is edited.
+
+    :param content: html content of the listing
+    :return: list of (msg_id, row_text) tuples in the order of the listing
+    """
+    from lxml import html
+    tree = html.fromstring(content)
+    rows = list()
+    for row in tree.xpath('//tr[td[@class="list1" or @class="list2"]]'):
+        href = row.xpath('(td[@class="list1" or @class="list2"][1])/a/@href')
+        if href:
+            rows.append((int(href[0].split("/")[-1]), row.text_content()))
+    return rows
+
+
 def _handle_pswd(password, encrypt=True):
     """
     Takes password string and returns password as needed by elog. If encrypt=True then password will be
@@ -0,0 +1,91 @@
+import re
+
+# Line separating the attributes from the message text in the response of the download command. Line boundaries
+# are the same as of str.splitlines() for latin1 text.
+LINE_BREAKS = rb'\n\r\x0b\x0c\x1c\x1d\x1e\x85'
+DELIMITER = re.compile(rb'(?:\A|(?<=[' + LINE_BREAKS + rb']))={40}(?=[' + LINE_BREAKS + rb']|\Z)')
+
+
+class Message(object):
+    """
+    Message as returned by Logbook.read(msg_id, raw=True). It keeps only the raw response of the server: attributes
+    are parsed on first access, the text is decoded and attachment urls are built each time they are accessed.
+    It can be used as the tuple returned by Logbook.read():
+
+        message, attributes, attachments = logbook.read(msg_id, raw=True)
+    """
+    __slots__ = ('msg_id', 'raw', '_url', '_header_end', '_text_start', '_attributes', '_attachment_names')
+
+    def __init__(self, msg_id, raw, url):
+        """
+        :param msg_id: ID of the message
+        :param raw: response of the download command (bytes)
+        :param url: url of the logbook (attachment urls are relative to it)
+        """
+        delimiter = DELIMITER.search(raw)
+        if delimiter is None:
+            raise ValueError('Invalid message format: no delimiter between attributes and text.')
+        self.msg_id = msg_id
+        self.raw = raw
+        self._url = url
+        self._header_end = delimiter.start()
+        self._text_start = delimiter.end()
+        self._attributes = None
+        self._attachment_names = None
+
+    @property
+    def text(self):
+        """ Message text (decoded on each access)."""
+        return '\n'.join(self.raw[self._text_start:].decode('iso-8859-1', 'ignore').splitlines()[1:])
+
+    @property
+    def attributes(self):
+        """ Dictionary of all attributes returned by the logbook."""
+        if self._attributes is None:
+            self._parse_header()
+        return self._attributes
+
+    @property
+    def attachments(self):
+        """ List of urls of the attachments."""
+        if self._attributes is None:
+            self._parse_header()
+        return [self._url + '{0}'.format(name) for name in self._attachment_names]
+
+    def get(self, attribute, default=None):
+        """ Returns value of the attribute or default."""
+        return self.attributes.get(attribute, default)
+
+    def _parse_header(self):
+        attributes = dict()
+        attachment_names = list()
+        header = self.raw[:self._header_end].decode('iso-8859-1', 'ignore').splitlines()
+        for line in header:
+            line = line.split(': ')
+            data = ''.join(line[1:])
+            if line[0] == 'Attachment':
+                # Treat the empty string as special case, otherwise the split returns [""]
+                attachment_names = data.split(',') if data else []
+            else:
+                attributes[line[0]] = data
+        self._attachment_names = attachment_names
+        self._attributes = attributes
+
+    def __iter__(self):
+        yield self.text
+        yield self.attributes
+        yield self.attachments
+
+    def __len__(self):
+        return 3
+
+    def __getitem__(self, index):
+        return tuple(self)[index]
+
+    def __eq__(self, other):
+        if isinstance(other, (Message, tuple)):
+            return tuple(self) == tuple(other)
+        return NotImplemented
+
+    def __repr__(self):
+        return 'Message({}, {} bytes)'.format(self.msg_id, len(self.raw))
@@ -0,0 +1,172 @@
+import collections
+import email.utils
+import io
+import json
+import os
+import threading
+import time
+
+from elog.export import _map_ordered
+from elog.logbook_exceptions import *
+
+# Statistics of one stage of replicate()
+#   items: number of processed messages, bytes: size of the processed content
+#   seconds: time spent in the stage (summed over its threads)
+#   throughput: messages per second the stage can process with its threads
+StageStats = collections.namedtuple('StageStats', ['items', 'bytes', 'seconds', 'throughput'])
+
+# Result of replicate()
+#   copied: dictionary {source msg_id: destination msg_id} of the messages copied by this run
+#   skipped: IDs of the messages copied by previous runs or deleted in the meantime
+#   stages: dictionary {'read' | 'attachments' | 'post': StageStats}
+#   elapsed: duration of the run in seconds
+ReplicationResult = collections.namedtuple('ReplicationResult', ['copied', 'skipped', 'stages', 'elapsed'])
+
+# Attributes managed by elog itself, they are not copied
+RESERVED_ATTRIBUTES = ('$@MID@$', 'Date', 'Encoding', 'In reply to', 'Reply to', 'Locked by', 'Attachment')
+
+
+def replicate(src, dst, msg_ids=None, id_map=None, workers=4, suppress_email_notification=True, timeout=None):
+    """
+    Copies messages with their attachments and threads from one logbook to another, e.g. to migrate a logbook to
+    a new server. Reading messages, downloading attachments and posting are pipelined: messages are read and
+    attachments downloaded by pools of threads while earlier messages are posted. Only a bounded number of messages
+    is in flight. Messages are posted in the order of their IDs, so replies are posted after their parents and are
+    linked to the new IDs of the parents. The creation time of the messages is kept.
+
+        result = elog.replicate(old_logbook, new_logbook, id_map='migration.jsonl', workers=8)
+        print(result.copied, result.stages['attachments'].throughput)
+
+    :param src: source Logbook
+    :param dst: destination Logbook
+    :param msg_ids: IDs of the messages to copy (default: all messages of the source logbook)
+    :param id_map: path of a file where the mapping of the IDs is stored (JSON lines). Messages which are in the
+                   file already are not copied again, so an interrupted replication can be restarted.
+    :param workers: number of threads reading messages and number of threads downloading attachments
+    :param suppress_email_notification: do not send E-Mail notifications for the posted messages
+    :param timeout: The timeout value to be passed to the requests.
+    :return: ReplicationResult
+    """
+    start = time.perf_counter()
+    workers = max(1, workers)
+    mapping, complete = _load_id_map(id_map)
+    if msg_ids is None:
+        msg_ids = src.get_message_ids(timeout=timeout)
+    msg_ids = sorted(msg_ids)
+    skipped = [msg_id for msg_id in msg_ids if msg_id in mapping]
+
+    stages = {stage: _Stage() for stage in ('read', 'attachments', 'post')}
+
+    def read(msg_id):
+        with stages['read'].measure() as measurement:
+            try:
+                entry = src.read(msg_id, timeout=timeout, raw=True)
+            except LogbookInvalidMessageID:
+                return None
+            measurement.bytes = len(entry.raw)
+            return entry
+
+    def download(item):
+        entry = item[1]
+        if entry is None:
+            return None
+        with stages['attachments'].measure() as measurement:
+            files = list()
+            for url in entry.attachments:
+                attachment = io.BytesIO(src.download_attachment(url, timeout=timeout))
+                # Stored name has a 'YYMMDD_HHMMSS_' prefix
+                attachment.name = os.path.basename(url)[14:]
+                files.append(attachment)
+                measurement.bytes += len(attachment.getbuffer())
+            return files
+
+    copied = dict()
+    pending = [msg_id for msg_id in msg_ids if msg_id not in mapping]
+    with open(id_map if id_map is not None else os.devnull, 'a') as map_file:
+        if not complete:
+            map_file.write('\n')  # Finish the incomplete line of an interrupted run
+        for (msg_id, entry), files in _map_ordered(download, _map_ordered(read, pending, workers), workers):
+            if entry is None:
+                skipped.append(msg_id)
+                continue
+            with stages['post'].measure() as measurement:
+                new_id = _post(dst, entry, files, mapping, suppress_email_notification, timeout)
+                measurement.bytes = len(entry.raw) + sum(len(attachment.getbuffer()) for attachment in files)
+            mapping[msg_id] = copied[msg_id] = new_id
+            # Stored immediately, so a restarted run does not copy it again
+            map_file.write(json.dumps({'src': msg_id, 'dst': new_id}) + '\n')
+            map_file.flush()
+
+    concurrency = {'read': workers, 'attachments': workers, 'post': 1}
+    return ReplicationResult(copied, sorted(skipped),
+                             {name: stage.stats(concurrency[name]) for name, stage in stages.items()},
+                             time.perf_counter() - start)
+
+
+def _post(dst, entry, files, mapping, suppress_email_notification, timeout):
+    """ Posts copy of the message to the destination logbook. Returns the new ID."""
+    attributes = {key: value for key, value in entry.attributes.items() if key not in RESERVED_ATTRIBUTES}
+    try:
+        attributes['When'] = int(email.utils.parsedate_to_datetime(entry.get('Date')).timestamp())
+    except (TypeError, ValueError):
+        pass  # No valid date, the time of posting is used
+
+    encoding = entry.get('Encoding')
+    parent = mapping.get(int(entry.get('In reply to') or 0))
+    return dst.post(entry.text, msg_id=parent, reply=parent is not None, attributes=attributes, attachments=files,
+                    suppress_email_notification=suppress_email_notification,
+                    encoding=encoding if encoding in ('plain', 'HTML', 'ELCode') else None, timeout=timeout)
+
+
+def _load_id_map(path):
+    """ Returns the stored mapping {source msg_id: destination msg_id} and False if the last line is incomplete."""
+    mapping = dict()
+    line = ''
+    if path is not None and os.path.exists(path):
+        with open(path) as map_file:
+            for line in map_file:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue  # Incomplete last line of an interrupted run
+                mapping[record['src']] = record['dst']
+    return mapping, not line or line.endswith('\n')
+
+
+class _Stage(object):
+    """ Collects statistics of one stage of the pipeline (updated by several threads)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._items = 0
+        self._bytes = 0
+        self._seconds = 0.0
+
+    def measure(self):
+        return _Measurement(self)
+
+    def add(self, n_bytes, seconds):
+        with self._lock:
+            self._items += 1
+            self._bytes += n_bytes
+            self._seconds += seconds
+
+    def stats(self, concurrency):
+        with self._lock:
+            return StageStats(self._items, self._bytes, self._seconds,
+                              self._items * concurrency / self._seconds if self._seconds else 0.0)
+
+
+class _Measurement(object):
+
+    def __init__(self, stage):
+        self._stage = stage
+        self.bytes = 0
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self._stage.add(self.bytes, time.perf_counter() - self._start)
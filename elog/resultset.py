@@ -0,0 +1,135 @@
+import array
+import email.utils
+import sys
+
+# Format of the Date attribute written by elog
+DATE_FORMAT = '%a, %d %b %Y %H:%M:%S %z'
+
+# Integer representation of NaT (not a time) in datetime64 arrays
+NAT = -2 ** 63
+
+
+class ResultSet(object):
+    """
+    Messages stored by columns: an int64 array of IDs and one list per attribute (None where a message does not have
+    the attribute). Attribute values are interned, so repeated values (authors, types, ...) are stored only once.
+    Columns can be converted to NumPy arrays or a pandas DataFrame without converting each message (NumPy and
+    pandas are optional and imported only by the conversion).
+
+        results = logbook.read_many({'Type': 'Problem'}, columnar=True)
+        frame = results.to_pandas()
+        frame.groupby('Author').size()
+    """
+
+    def __init__(self):
+        self.ids = array.array('q')
+        self.texts = list()
+        self.attachments = list()
+        self._columns = dict()
+
+    @classmethod
+    def from_messages(cls, messages):
+        """
+        Builds result set from messages as returned by read(msg_id, raw=True) or from (msg_id, message) pairs as
+        yielded by elog.crawl().
+        """
+        result_set = cls()
+        for message in messages:
+            if isinstance(message, tuple) and len(message) == 2:
+                msg_id, message = message
+            else:
+                msg_id = message.msg_id
+            result_set.append(msg_id, *message)
+        return result_set
+
+    def append(self, msg_id, text, attributes, attachments):
+        """
+        Appends one message.
+
+        :param msg_id: ID of the message
+        :param text, attributes, attachments: message as returned by read()
+        """
+        row = len(self.ids)
+        self.ids.append(msg_id)
+        self.texts.append(text)
+        self.attachments.append(attachments)
+        for name, value in attributes.items():
+            if name == '$@MID@$':
+                continue
+            column = self._columns.get(name)
+            if column is None:
+                column = self._columns[name] = [None] * row
+            column.append(sys.intern(value) if isinstance(value, str) else value)
+        for column in self._columns.values():
+            if len(column) == row:
+                column.append(None)
+
+    @property
+    def columns(self):
+        """ Names of the attribute columns."""
+        return list(self._columns)
+
+    def column(self, name):
+        """ Returns list of the values of the attribute (None where a message does not have it)."""
+        return self._columns[name]
+
+    def __getitem__(self, name):
+        return self.column(name)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __repr__(self):
+        return 'ResultSet({} messages, {} columns)'.format(len(self), len(self._columns))
+
+    def to_numpy(self):
+        """
+        :return: dictionary {'msg_id': int64 array, 'Date': datetime64[s] array (UTC), attribute: object array,
+                 'text': object array, 'attachments': object array}
+        """
+        import numpy as np
+
+        result = {'msg_id': np.frombuffer(self.ids, dtype=np.int64).copy()}
+        for name, values in self._columns.items():
+            result[name] = _parse_dates_numpy(values) if name == 'Date' else _object_array(values)
+        result['text'] = _object_array(self.texts)
+        result['attachments'] = _object_array(self.attachments)
+        return result
+
+    def to_pandas(self):
+        """
+        :return: pandas.DataFrame indexed by msg_id. Attributes are categorical columns, Date is parsed to
+                 datetime (UTC).
+        """
+        import pandas as pd
+
+        data = dict()
+        for name, values in self._columns.items():
+            if name == 'Date':
+                data[name] = pd.to_datetime(values, format=DATE_FORMAT, errors='coerce', utc=True)
+            else:
+                data[name] = pd.Categorical(values)
+        data['text'] = self.texts
+        data['attachments'] = self.attachments
+        return pd.DataFrame(data, index=pd.Index(self.ids, dtype='int64', name='msg_id'))
+
+
+def _object_array(values):
+    import numpy as np
+
+    result = np.empty(len(values), dtype=object)
+    result[:] = values
+    return result
+
+
+def _parse_dates_numpy(values):
+    """ Returns datetime64[s] (UTC) array of the dates, each distinct date string is parsed only once."""
+    import numpy as np
+
+    parsed = dict()
+    for value in set(values):
+        try:
+            parsed[value] = int(email.utils.parsedate_to_datetime(value).timestamp())
+        except (TypeError, ValueError):
+            parsed[value] = NAT
+    return np.array([parsed[value] for value in values], dtype=np.int64).view('datetime64[s]')
@@ -0,0 +1,90 @@
+import collections
+import concurrent.futures
+
+from elog.logbook_exceptions import *
+
+# Number of messages read ahead when the iteration starts. It is doubled each time the consumer has to wait for a
+# message (up to prefetch of the sequence) and decreased while the read-ahead is complete.
+INITIAL_DEPTH = 2
+
+
+class MessageSequence(object):
+    """
+    Messages of a search or listing which are read only when they are used. Returned by search() and
+    get_message_ids() with lazy=True. While it is iterated the next messages are read in the background, so
+    processing of one message overlaps with reading the following ones:
+
+        for message in logbook.search('beam dump', lazy=True):
+            text, attributes, attachments = message
+
+    The read-ahead adapts to the consumer: it grows while the consumer waits for messages and shrinks while the
+    consumer is slower than the server. If the iteration is stopped early (break), pending reads are cancelled.
+    Messages deleted in the meantime are skipped.
+    """
+
+    def __init__(self, logbook, msg_ids, prefetch=8, timeout=None):
+        """
+        :param logbook: Logbook of the messages
+        :param msg_ids: IDs of the messages in the order of the sequence
+        :param prefetch: maximal number of messages read ahead (0 disables the read-ahead)
+        :param timeout: The timeout value to be passed to the requests.
+        """
+        self._logbook = logbook
+        self.ids = list(msg_ids)
+        self.prefetch = prefetch
+        self._timeout = timeout
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __getitem__(self, index):
+        """ Reads message at the index (elog.Message). Slice returns MessageSequence of the messages in it."""
+        if isinstance(index, slice):
+            return MessageSequence(self._logbook, self.ids[index], self.prefetch, self._timeout)
+        return self._logbook.read(self.ids[index], self._timeout, raw=True)
+
+    def __iter__(self):
+        if self.prefetch < 1:
+            for msg_id in self.ids:
+                message = self._read(msg_id)
+                if message is not None:
+                    yield message
+            return
+
+        # Reads run with the time budget and hooks context of the thread which started the iteration
+        read = self._logbook._bind_context(self._read)
+        depth = min(INITIAL_DEPTH, self.prefetch)
+        msg_ids = iter(self.ids)
+        pending = collections.deque()
+        executor = concurrent.futures.ThreadPoolExecutor(self.prefetch)
+        try:
+            while True:
+                while len(pending) < depth:
+                    msg_id = next(msg_ids, None)
+                    if msg_id is None:
+                        break
+                    pending.append(executor.submit(read, msg_id))
+                if not pending:
+                    return
+
+                future = pending.popleft()
+                if not future.done():
+                    depth = min(self.prefetch, depth * 2)  # consumer waits for the server
+                elif all(f.done() for f in pending):
+                    depth = max(1, depth - 1)  # consumer is slower than the server
+                message = future.result()
+                if message is not None:
+                    yield message
+        finally:
+            for future in pending:
+                future.cancel()
+            executor.shutdown(wait=False)
+
+    def __repr__(self):
+        return 'MessageSequence({} messages)'.format(len(self.ids))
+
+    def _read(self, msg_id):
+        try:
+            return self._logbook.read(msg_id, self._timeout, raw=True)
+        except LogbookInvalidMessageID:
+            return None
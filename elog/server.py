@@ -0,0 +1,130 @@
+import re
+import sys
+import threading
+import urllib.parse
+
+import requests
+
+from elog.logbook import Logbook, _validate_response
+from elog.logbook_exceptions import *
+
+# Links to the logbooks on the selection page of the server
+_LOGBOOK_LINK = re.compile(r'class="sellogbook"[^>]*>\s*<a href="([^"]+)"')
+
+
+class LogbookServer(object):
+    """
+    Client of an elog server with many logbooks. Logbooks handed out by the server share one transport (pooled
+    connections and cookies), the credentials (hashed only once) and the session, so using many logbooks of one
+    server does not open new connections or log in again for each of them.
+
+        server = elog.LogbookServer('https://elog.example.com', user='me', password='secret')
+        print(server.logbooks())
+        server['Operation'].post('Beam on', Author='me')
+        results = server.search('beam dump', workers=8)  # {logbook: [msg_id, ...]} of all logbooks
+    """
+
+    def __init__(self, hostname, port=None, user=None, password=None, subdir='', use_ssl=True, encrypt_pwd=True,
+                 session_login=False, transport=None):
+        """
+        Arguments are the same as of Logbook() except of the logbook name. If the url in hostname has a path, it is
+        the subdirectory of the logbooks.
+        """
+        # Logbook at the root of the server, it makes the requests of the server itself
+        self._root = Logbook(hostname, '', port, user, password, subdir, use_ssl, encrypt_pwd, session_login,
+                             transport)
+        self.url = self._root._url
+        self._lock = threading.Lock()
+        self._logbooks = dict()
+
+    def logbook(self, name):
+        """
+        Returns Logbook of the server. The same instance is returned for the same name.
+
+        :param name: name of the logbook
+        """
+        with self._lock:
+            if name not in self._logbooks:
+                self._logbooks[name] = self._root._view(name)
+            return self._logbooks[name]
+
+    def __getitem__(self, name):
+        return self.logbook(name)
+
+    def logbooks(self, timeout=None):
+        """
+        Returns names of the logbooks listed on the selection page of the server.
+
+        :param timeout: The timeout value to be passed to the get request.
+        :return: list of logbook names
+        """
+        try:
+            response = self._root._send('GET', self.url, timeout=timeout)
+            resp_message, resp_headers, resp_msg_id = _validate_response(response)
+
+        except requests.Timeout as e:
+            # Catch here a timeout of the get request.
+            # Raise the logbook exception and let the user handle it
+            raise LogbookServerTimeout('{0} method cannot be completed because of a network timeout:\n'
+                                       '{1}'.format(sys._getframe().f_code.co_name, e))
+
+        except requests.RequestException as e:
+            raise LogbookServerProblem('Cannot access logbook server to list logbooks because of:\n' +
+                                       '{0}'.format(e))
+
+        location = resp_headers.get('Location')
+        if response.status_code == 302 and location:
+            # Server with only one logbook redirects to it
+            return [_logbook_name(urllib.parse.urlsplit(location).path)]
+        return [_logbook_name(link) for link in _LOGBOOK_LINK.findall(resp_message.decode('utf-8', 'ignore'))]
+
+    def map(self, function, logbooks=None, workers=8, timeout=None, *, deadline=None):
+        """
+        Calls function(logbook) for many logbooks of the server concurrently. The calls share the time budget
+        (deadline) and the running public method calls (for the hooks) of the calling thread.
+
+            counts = server.map(lambda logbook: logbook.count())
+
+        :param function: callable accepting Logbook
+        :param logbooks: names of the logbooks (default: all logbooks of the server)
+        :param workers: number of concurrent calls
+        :param timeout: The timeout value to be passed to the request listing the logbooks.
+        :param deadline: Total time budget of the call in seconds shared by all its requests. If it is spent,
+                         LogbookServerTimeout is raised. (default: None, no limit)
+        :return: dictionary {logbook name: result} in the order of the logbooks
+        """
+        with self._root._deadline(deadline):
+            if logbooks is None:
+                logbooks = self.logbooks(timeout)
+            logbooks = list(logbooks)
+            results = self._root._map_concurrently(lambda name: function(self.logbook(name)), logbooks, workers)
+        return dict(zip(logbooks, results))
+
+    def search(self, search_term, logbooks=None, n_results=20, scope='subtext', workers=8, timeout=None, *,
+               deadline=None):
+        """
+        Searches many logbooks of the server concurrently (see Logbook.search()).
+
+        :param logbooks: names of the logbooks (default: all logbooks of the server)
+        :param workers: number of concurrent searches
+        :param deadline: Total time budget of the call in seconds shared by all its requests. If it is spent,
+                         LogbookServerTimeout is raised. (default: None, no limit)
+        :return: dictionary {logbook name: list of message IDs} in the order of the logbooks
+        """
+        return self.map(lambda logbook: logbook.search(search_term, n_results, scope, timeout=timeout), logbooks,
+                        workers, timeout, deadline=deadline)
+
+    def close(self):
+        """ Closes the connections of the transport shared by the logbooks (opened again if they are used)."""
+        self._root._transport.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+def _logbook_name(path):
+    """ Returns logbook name from the (url encoded) path of the logbook."""
+    return urllib.parse.unquote_plus(path.rstrip('/').rsplit('/', 1)[-1])
@@ -0,0 +1,280 @@
+import base64
+import gzip
+import http.cookies
+import json
+import threading
+import time
+import urllib.parse
+import weakref
+
+import requests
+
+# Credentials are never written to the cassettes
+CREDENTIAL_FIELDS = {'unm', 'upwd', 'uname', 'upassword'}
+SECRET_COOKIES = {'unm', 'upwd', 'sid'}
+REDACTED = 'REDACTED'
+
+CASSETTE_VERSION = 1
+
+
+class Transport(object):
+    """
+    Transport used by the Logbook to exchange requests with the server. All requests of the Logbook (and of all
+    its threads) go through one transport, so a transport must be thread-safe.
+
+    Redirects are never followed. Cookies set by the server must be stored in the transport cookie jar (cookies)
+    and sent with all following requests.
+    """
+
+    def __init__(self):
+        self.cookies = requests.cookies.RequestsCookieJar()
+
+    def request(self, method, url, params=None, data=None, files=None, cookies=None, timeout=None):
+        """
+        :param method: 'GET' or 'POST'
+        :param url: full url of the request
+        :param params: dictionary of query parameters
+        :param data: dictionary of form fields
+        :param files: list of multipart files [ ('name', ('filename', bytes or file_object)) ]
+        :param cookies: dictionary of cookies sent in addition to the cookie jar
+        :param timeout: The value of timeout for the request (None: no timeout)
+        :return: requests.Response
+        :raise: requests.RequestException (requests.Timeout) if there is no response
+        """
+        raise NotImplementedError()
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+class RequestsTransport(Transport):
+    """
+    Transport using requests library with a session per thread (requests.Session is not guaranteed to be
+    thread-safe). All sessions share one connection pool and the cookie jar, so connections are kept alive and reused
+    by all threads, also by the thread pools of the bulk operations which are created for each call.
+    """
+
+    def __init__(self, verify=False, pool_maxsize=10):
+        """
+        :param verify: verify certificates of the server (see requests)
+        :param pool_maxsize: number of connections kept alive per host
+        """
+        super().__init__()
+        self.verify = verify
+        self._pool_maxsize = pool_maxsize
+        self._connect()
+
+    def request(self, method, url, params=None, data=None, files=None, cookies=None, timeout=None):
+        return self.session().request(method, url, params=params, data=data, files=files, cookies=cookies,
+                                      timeout=timeout, allow_redirects=False, verify=self.verify)
+
+    def close(self):
+        """ Closes all connections. The transport can still be used, new connections are opened when needed."""
+        with self._lock:
+            sessions = list(self._sessions)
+        for session in sessions:
+            session.close()
+        self._adapter.close()
+
+    def __getstate__(self):
+        # Sessions (connections) are not pickled, only the cookies and settings
+        state = self.__dict__.copy()
+        for key in ('_local', '_lock', '_adapter', '_sessions'):
+            del state[key]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._connect()
+
+    def session(self):
+        """ Returns the session of the current thread."""
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = requests.Session()
+            session.mount('http://', self._adapter)
+            session.mount('https://', self._adapter)
+            session.cookies = self.cookies
+            self._local.session = session
+            with self._lock:
+                self._sessions.add(session)
+        return session
+
+    def _connect(self):
+        # urllib3 connection pools of the adapter are thread-safe, so one adapter serves the sessions of all threads.
+        # Sessions of finished threads are dropped with their thread.
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._adapter = requests.adapters.HTTPAdapter(pool_maxsize=self._pool_maxsize)
+        self._sessions = weakref.WeakSet()
+
+
+class RecordingTransport(Transport):
+    """
+    Transport which passes requests to another transport and records request/response pairs to a gzip compressed
+    JSON lines file (cassette). Credentials (form fields, cookies and session ids) are not recorded.
+
+        with elog.RecordingTransport('session.cassette.gz') as transport:
+            logbook = elog.open(url, transport=transport)
+            ...
+    """
+
+    def __init__(self, path, transport=None):
+        """
+        :param path: path of the cassette file (overwritten)
+        :param transport: transport which makes the requests (default: RequestsTransport())
+        """
+        super().__init__()
+        self._transport = transport or RequestsTransport()
+        self.cookies = self._transport.cookies
+        self._lock = threading.Lock()
+        self._start = time.perf_counter()
+        self._file = gzip.open(path, 'wt', encoding='utf-8')
+        self._write({'version': CASSETTE_VERSION})
+
+    def request(self, method, url, params=None, data=None, files=None, cookies=None, timeout=None):
+        record = {
+            'offset': time.perf_counter() - self._start,
+            'method': method,
+            'url': request_key(method, url, params)[1],
+            'fields': {key: _text(value) for key, value in (data or {}).items() if key not in CREDENTIAL_FIELDS},
+            'files': [[name, filename] for name, (filename, _) in (files or [])],
+        }
+        start = time.perf_counter()
+        try:
+            response = self._transport.request(method, url, params, data, files, cookies, timeout)
+        except requests.RequestException as e:
+            record['elapsed'] = time.perf_counter() - start
+            record['error'] = 'timeout' if isinstance(e, requests.Timeout) else 'connection'
+            record['message'] = str(e)
+            self._write(record)
+            raise
+
+        record['elapsed'] = time.perf_counter() - start
+        record['status'] = response.status_code
+        record['reason'] = response.reason
+        record['headers'] = {key: _redact_header(key, value) for key, value in response.headers.items()}
+        record['content'] = base64.b64encode(response.content).decode('ascii')
+        self._write(record)
+        return response
+
+    def close(self):
+        with self._lock:
+            if not self._file.closed:
+                self._file.close()
+        self._transport.close()
+
+    def _write(self, record):
+        line = json.dumps(record, separators=(',', ':'))
+        with self._lock:
+            self._file.write(line + '\n')
+
+
+class ReplayTransport(Transport):
+    """
+    Transport which serves responses recorded by RecordingTransport, so a session can be reproduced without a
+    server. Requests are matched by method, path and query parameters (ignoring the host and credentials). Equal
+    requests get their responses in the recorded order.
+
+        logbook = elog.open(url, transport=elog.ReplayTransport('session.cassette.gz', speed=None))
+    """
+
+    def __init__(self, path, speed=1.0):
+        """
+        :param path: path of the cassette file
+        :param speed: 1.0 replays with the recorded response times, 2.0 twice as fast etc. None answers immediately.
+        """
+        super().__init__()
+        self._speed = speed
+        self._lock = threading.Lock()
+        self._interactions = dict()
+        with gzip.open(path, 'rt', encoding='utf-8') as cassette:
+            header = json.loads(cassette.readline())
+            if header.get('version') != CASSETTE_VERSION:
+                raise ValueError('Unsupported cassette version: {}'.format(header.get('version')))
+            for line in cassette:
+                record = json.loads(line)
+                self._interactions.setdefault((record['method'], record['url']), list()).append(record)
+
+    def request(self, method, url, params=None, data=None, files=None, cookies=None, timeout=None):
+        key = request_key(method, url, params)
+        with self._lock:
+            records = self._interactions.get(key)
+            if not records:
+                raise requests.ConnectionError('No recorded response for: {} {}'.format(*key))
+            record = records.pop(0)
+
+        delay = record['elapsed'] / self._speed if self._speed else 0
+        read_timeout = _read_timeout(timeout)
+        if read_timeout is not None and delay > read_timeout:
+            time.sleep(read_timeout)
+            raise requests.Timeout('Replayed request timed out: {} {}'.format(*key))
+        if delay:
+            time.sleep(delay)
+
+        if 'error' in record:
+            error = requests.Timeout if record['error'] == 'timeout' else requests.ConnectionError
+            raise error(record['message'])
+
+        response = requests.Response()
+        response.status_code = record['status']
+        response.reason = record['reason']
+        response.headers = requests.structures.CaseInsensitiveDict(record['headers'])
+        response._content = base64.b64decode(record['content'])
+        response.url = url
+        response.request = requests.Request(method, url, params=params).prepare()
+        self._store_cookies(response.headers.get('Set-Cookie'))
+        return response
+
+    def remaining(self):
+        """ Returns number of recorded interactions which were not replayed yet."""
+        with self._lock:
+            return sum(len(records) for records in self._interactions.values())
+
+    def _store_cookies(self, set_cookie):
+        if set_cookie:
+            for name, morsel in http.cookies.SimpleCookie(set_cookie).items():
+                self.cookies.set(name, morsel.value)
+
+
+def request_key(method, url, params=None):
+    """
+    Returns (method, path?query) identifying the request regardless of the host, credentials and parameter order.
+    """
+    parsed = urllib.parse.urlsplit(url)
+    query = urllib.parse.parse_qsl(parsed.query, keep_blank_values=True)
+    query += [(key, str(value)) for key, value in (params or {}).items()]
+    query = sorted((key, value) for key, value in query if key not in CREDENTIAL_FIELDS)
+    return method, parsed.path + ('?' + urllib.parse.urlencode(query) if query else '')
+
+
+def _text(value):
+    return value.decode('iso-8859-1') if isinstance(value, bytes) else str(value)
+
+
+def _redact_header(key, value):
+    if key.lower() != 'set-cookie':
+        return value
+    cookie = http.cookies.SimpleCookie()
+    try:
+        cookie.load(value)
+    except http.cookies.CookieError:
+        return REDACTED
+    for name in cookie:
+        if name in SECRET_COOKIES:
+            cookie[name].set(name, REDACTED, REDACTED)
+    return cookie.output(header='', sep=',').strip()
+
+
+def _read_timeout(timeout):
+    """
+    Returns time to wait for the response (None: no limit). requests timeout can be a tuple (connect, read), replayed
+    requests do not connect, so only the read timeout applies.
+    """
+    return timeout[1] if isinstance(timeout, tuple) else timeout
@@ -0,0 +1,118 @@
+"""
+End-to-end benchmark of the library against the fake elog server (see fake_elogd.py). It is not meant to be
+executed by the test suite. Run it directly to get latency percentiles and throughput of the main operations:
+
+    python tests/benchmark_logbook.py --entries 500 --iterations 200 --latency 0.002 --threads 4
+"""
+import argparse
+import io
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import elog  # noqa: E402
+from fake_elogd import FakeElogd  # noqa: E402
+
+
+def percentile(sorted_values, p):
+    """ Returns p-th percentile (0-100) of the sorted list (nearest rank)."""
+    if not sorted_values:
+        return float('nan')
+    index = max(0, min(len(sorted_values) - 1, int(round(p / 100.0 * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+def measure(operation, iterations, threads=1):
+    """
+    Calls operation(i) for i in range(iterations) from a pool of threads.
+
+    :return: dictionary with latency percentiles (seconds), mean, throughput (calls/s) and number of errors
+    """
+    def timed(i):
+        start = time.perf_counter()
+        try:
+            operation(i)
+            error = False
+        except Exception:
+            error = True
+        return time.perf_counter() - start, error
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(threads) as executor:
+        results = list(executor.map(timed, range(iterations)))
+    elapsed = time.perf_counter() - start
+
+    latencies = sorted(r[0] for r in results)
+    return {
+        'p50': percentile(latencies, 50),
+        'p90': percentile(latencies, 90),
+        'p99': percentile(latencies, 99),
+        'max': latencies[-1],
+        'mean': sum(latencies) / len(latencies),
+        'throughput': iterations / elapsed,
+        'errors': sum(r[1] for r in results),
+    }
+
+
+def named_file(name, content):
+    file_obj = io.BytesIO(content)
+    file_obj.name = name
+    return file_obj
+
+
+def scenarios(logbook, msg_ids, attachment_url, attachment_size):
+    """ Returns list of (name, operation) benchmarked scenarios. Operation is called with iteration number."""
+    attachment = b'x' * attachment_size
+
+    return [
+        ('read', lambda i: logbook.read(msg_ids[i % len(msg_ids)])),
+        ('post', lambda i: logbook.post('Benchmark message {}'.format(i), Author='bench', Subject='post')),
+        ('edit', lambda i: logbook.post('Edited message {}'.format(i), msg_id=msg_ids[i % len(msg_ids)])),
+        ('search', lambda i: logbook.search('message {}'.format(i % 10))),
+        ('listing', lambda i: logbook.get_message_ids()),
+        ('last id', lambda i: logbook.get_last_message_id()),
+        ('upload', lambda i: logbook.post('With attachment', Author='bench',
+                                          attachments=[named_file('file{}.bin'.format(i), attachment)])),
+        ('download', lambda i: logbook.download_attachment(attachment_url)),
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark py_elog against a local fake elog server.')
+    parser.add_argument('--entries', type=int, default=200, help='number of entries created before benchmarking')
+    parser.add_argument('--iterations', type=int, default=100, help='calls per scenario')
+    parser.add_argument('--threads', type=int, default=1, help='concurrent callers sharing one Logbook')
+    parser.add_argument('--latency', type=float, default=0.0, help='server latency per request [s]')
+    parser.add_argument('--page-overhead', type=int, default=8000, help='bytes added to each html page')
+    parser.add_argument('--attachment-size', type=int, default=100000, help='attachment size [bytes]')
+    parser.add_argument('--only', nargs='*', help='run only scenarios with these names')
+    args = parser.parse_args()
+
+    with FakeElogd(page_overhead=args.page_overhead) as server:
+        msg_ids = [server.add_entry(text='Benchmark message {}\n'.format(i) * 20, Author='bench',
+                                    Type='Routine', Subject='Entry {}'.format(i)) for i in range(args.entries)]
+        attachment_id = server.add_entry(text='attachment holder',
+                                         attachments={'data.bin': b'x' * args.attachment_size})
+        logbook = elog.open(server.url('demo'))
+        attachment_url = logbook.read(attachment_id)[2][0]
+        server.latency = args.latency
+
+        print('{} entries, {} iterations, {} threads, latency {} s'.format(args.entries, args.iterations,
+                                                                           args.threads, args.latency))
+        print('{:<10}{:>10}{:>10}{:>10}{:>10}{:>10}{:>12}{:>8}'.format(
+            'scenario', 'p50 [ms]', 'p90 [ms]', 'p99 [ms]', 'max [ms]', 'mean [ms]', 'calls/s', 'errors'))
+        for name, operation in scenarios(logbook, msg_ids, attachment_url, args.attachment_size):
+            if args.only and name not in args.only:
+                continue
+            stats = measure(operation, args.iterations, args.threads)
+            print('{:<10}{:>10.2f}{:>10.2f}{:>10.2f}{:>10.2f}{:>10.2f}{:>12.1f}{:>8}'.format(
+                name, stats['p50'] * 1000, stats['p90'] * 1000, stats['p99'] * 1000, stats['max'] * 1000,
+                stats['mean'] * 1000, stats['throughput'], stats['errors']))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,436 @@
+"""
+Fake elog server (elogd) for running the tests and benchmarks without a real server. It implements the subset of
+elogd behaviour used by the library:
+
+    - listings (/<logbook>/, /<logbook>/page) with list1/list2 rows, filtered by subtext or attribute values
+    - entry pages (/<logbook>/<id>) and the download command (?cmd=download)
+    - selection page listing the logbooks (/)
+    - multipart submission of new entries, replies and edits (cmd=Submit) and deleting attachments (cmd=Update)
+    - attachments (/<logbook>/<YYMMDD_HHMMSS_filename>)
+    - deleting threads (?cmd=Delete&confirm=Yes)
+    - authentication with credentials (cookies or form fields) and session cookies
+    - error pages and moved server redirects
+
+    with FakeElogd(users={'user': 'password'}, latency=0.005) as server:
+        logbook = elog.open(server.url('demo'), user='user', password='password')
+"""
+import email.parser
+import email.policy
+import html
+import http.server
+import itertools
+import re
+import threading
+import time
+import urllib.parse
+import uuid
+from datetime import datetime, timedelta
+
+from elog.logbook import _handle_pswd
+
+DELIMITER = '========================================'
+
+# Fields of submitted forms which are commands for elogd and not attributes of the entry
+FORM_FIELDS = {'cmd', 'exp', 'unm', 'upwd', 'edit_id', 'reply_to', 'skiplock', 'suppress', 'Encoding', 'When'}
+
+# Reserved attributes returned by download which are resent by the library when editing (with replaced characters)
+RESERVED_ATTRIBUTES = {'___MID___', 'Date', 'In_reply_to', 'Reply_to', 'Locked_by', 'Attachment', 'Text'}
+
+# Query parameters of listings which are not search terms
+LISTING_PARAMETERS = {'mode', 'reverse', 'npp', 'page', 'cmd', 'sort', 'rsort'}
+
+
+class Entry(object):
+    """ Logbook entry as stored by the fake server."""
+
+    def __init__(self, msg_id, attributes, text, encoding='plain', in_reply_to=None):
+        self.msg_id = msg_id
+        self.date = datetime.now().strftime('%a, %d %b %Y %H:%M:%S +0000')
+        self.attributes = attributes
+        self.text = text
+        self.encoding = encoding
+        self.in_reply_to = in_reply_to
+        self.replies = list()
+        self.attachments = list()
+
+    def download(self):
+        """ Returns the entry in the format of elogd ?cmd=download."""
+        lines = ['$@MID@$: {}'.format(self.msg_id), 'Date: {}'.format(self.date)]
+        if self.in_reply_to:
+            lines.append('In reply to: {}'.format(self.in_reply_to))
+        if self.replies:
+            lines.append('Reply to: {}'.format(', '.join(str(r) for r in self.replies)))
+        lines += ['{}: {}'.format(key, value) for key, value in self.attributes.items()]
+        lines.append('Attachment: {}'.format(','.join(self.attachments)))
+        lines.append('Encoding: {}'.format(self.encoding))
+        lines.append(DELIMITER)
+        return ('\n'.join(lines) + '\n' + self.text).encode('iso-8859-1', 'replace')
+
+    def matches(self, search):
+        """
+        Returns True if all search terms {attribute or 'subtext': regex} match the entry (case insensitive unless
+        option 'casesensitive' is set). Subtext is searched in the text and with option 'sall' in all attributes.
+        """
+        search = dict(search)
+        flags = 0 if search.pop('casesensitive', '0') not in ('', '0') else re.IGNORECASE
+        search_all = search.pop('sall', '0') not in ('', '0')
+        attributes = {re.sub('[^0-9a-zA-Z]', '_', key).lower(): value for key, value in self.attributes.items()}
+        for key, pattern in search.items():
+            if key == 'subtext':
+                values = [self.text] + list(attributes.values()) if search_all else [self.text]
+            else:
+                values = [attributes.get(key.lower(), '')]
+            if not any(re.search(pattern, value, flags=flags) for value in values):
+                return False
+        return True
+
+
+class Logbook(object):
+    """ Entries and attachments of one logbook. Access is protected by the lock of the server."""
+
+    def __init__(self, name, attribute_names):
+        self.name = name
+        self.attribute_names = attribute_names
+        self.entries = dict()
+        self.files = dict()
+        self.ids = itertools.count(1)
+
+    def attribute_name(self, field):
+        """ Maps field name (special characters replaced by '_') back to the attribute name of the configuration."""
+        for name in self.attribute_names:
+            if re.sub('[^0-9a-zA-Z]', '_', name) == field:
+                return name
+        return field
+
+    def store_file(self, filename, content):
+        """ Stores attachment as elogd does, with a 'YYMMDD_HHMMSS_' prefix. Returns the stored name."""
+        now = datetime.now()
+        while True:
+            name = now.strftime('%y%m%d_%H%M%S_') + filename
+            if name not in self.files:
+                self.files[name] = content
+                return name
+            now += timedelta(seconds=1)
+
+    def delete(self, msg_id):
+        """ Deletes entry with all its replies."""
+        entry = self.entries.pop(msg_id, None)
+        if entry is None:
+            return
+        for reply in entry.replies:
+            self.delete(reply)
+        for name in entry.attachments:
+            self.files.pop(name, None)
+        parent = self.entries.get(entry.in_reply_to)
+        if parent is not None and msg_id in parent.replies:
+            parent.replies.remove(msg_id)
+
+
+class FakeElogd(object):
+    """
+    Fake elog server running in a background thread on a free port of localhost.
+    """
+
+    def __init__(self, logbooks=('demo',), users=None, sessions=True, latency=0.0, page_overhead=0,
+                 attributes=('Author', 'Type', 'Category', 'Subject')):
+        """
+        :param logbooks: names of the logbooks on the server
+        :param users: dictionary {user: password}. If specified, all requests must be authenticated.
+        :param sessions: If True, authenticated requests receive a session cookie (sid) which can be used instead of
+                         the credentials
+        :param latency: time in seconds added to each response (can be changed while running)
+        :param page_overhead: number of bytes added to each html page, to mimic menus and styles of real pages
+        :param attributes: attribute names of the logbook configuration
+        """
+        self.logbooks = {name: Logbook(name, attributes) for name in logbooks}
+        self.users = {user: _handle_pswd(password) for user, password in (users or {}).items()}
+        self.sessions_enabled = sessions
+        self.sessions = dict()
+        self.latency = latency
+        self.page_overhead = page_overhead
+        self.moved = False  # If True, all requests are answered with redirect to the new location
+        self.lock = threading.RLock()
+        self.requests = list()  # (method, path) of all received requests
+        self.connections = 0  # number of accepted connections
+
+        self._httpd = _HTTPServer(('127.0.0.1', 0), _make_handler(self))
+        self._thread = None
+
+    @property
+    def port(self):
+        return self._httpd.server_address[1]
+
+    def url(self, logbook='demo'):
+        return 'http://127.0.0.1:{}/{}/'.format(self.port, logbook)
+
+    def start(self):
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *args):
+        self.stop()
+
+    def expire_sessions(self):
+        """ Invalidates all sessions, as elogd does after the session timeout."""
+        with self.lock:
+            self.sessions.clear()
+
+    def add_entry(self, logbook='demo', text='', in_reply_to=None, attachments=None, **attributes):
+        """
+        Creates entry directly on the server (without request). Returns ID of the entry.
+
+        :param attachments: dictionary {filename: bytes}
+        """
+        with self.lock:
+            lb = self.logbooks[logbook]
+            entry = Entry(next(lb.ids), attributes, text, in_reply_to=in_reply_to)
+            entry.attachments = [lb.store_file(name, content) for name, content in (attachments or {}).items()]
+            lb.entries[entry.msg_id] = entry
+            if in_reply_to:
+                lb.entries[in_reply_to].replies.append(entry.msg_id)
+            return entry.msg_id
+
+    def page(self, body):
+        """ Wraps html body into a page of the configured size."""
+        padding = '<!-- {} -->'.format('x' * self.page_overhead) if self.page_overhead else ''
+        return '<html><head>{}</head><body>{}</body></html>'.format(padding, body).encode('utf-8')
+
+
+class _HTTPServer(http.server.ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128  # many clients connect at once, dropped connections are retried only after 1 s
+
+
+def _make_handler(server):
+
+    class Handler(http.server.BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+        # Send headers and content in one segment, otherwise delayed ACKs add ~40 ms to each request
+        wbufsize = 64 * 1024
+        disable_nagle_algorithm = True
+
+        def log_message(self, *args):
+            pass
+
+        def setup(self):
+            super().setup()
+            with server.lock:
+                server.connections += 1
+
+        def do_GET(self):
+            self._handle('GET', dict())
+
+        def do_POST(self):
+            length = int(self.headers.get('Content-Length', 0))
+            body = self.rfile.read(length)
+            self._handle('POST', _parse_multipart(self.headers.get('Content-Type', ''), body))
+
+        def _handle(self, method, form):
+            parsed = urllib.parse.urlsplit(self.path)
+            query = {key: values[0] for key, values in urllib.parse.parse_qs(parsed.query).items()}
+            parts = [urllib.parse.unquote(p) for p in parsed.path.split('/') if p]
+            with server.lock:
+                server.requests.append((method, self.path))
+
+            if server.latency:
+                time.sleep(server.latency)
+
+            set_cookie = self._authenticate(form)
+            if server.moved:
+                status, content, headers = 302, b'', {'Location': 'Logbook server has moved'}
+            elif set_cookie is False:
+                if method == 'POST' and ('unm' in form or 'upwd' in form):
+                    # elogd redirects submissions with wrong credentials
+                    status, content, headers = 302, b'', {'Location': self._location(parts[:1], '?fail=1')}
+                else:
+                    status, content, headers = 200, server.page(_LOGIN_FORM), dict()
+            else:
+                # Response is composed under the lock, but sent without holding it
+                with server.lock:
+                    status, content, headers = self._route(method, parts, query, form)
+                if set_cookie:
+                    headers['Set-Cookie'] = set_cookie
+            self._send(status, content, **headers)
+
+        def _route(self, method, parts, query, form):
+            """ Returns (status, content, headers) of the response."""
+            if not parts and method == 'GET':
+                return 200, _selection_page(), dict()
+            lb = server.logbooks.get(parts[0]) if parts else None
+            if lb is None:
+                return 404, _error_page('Logbook does not exist on remote server'), dict()
+            if method == 'POST':
+                return self._submit(lb, form)
+            if len(parts) == 1 or parts[1] == 'page':
+                return 200, _listing(lb, query), dict()
+
+            if parts[1] in lb.files:
+                return 200, lb.files[parts[1]], {'Content-Type': 'application/octet-stream'}
+            try:
+                msg_id = int(parts[1])
+            except ValueError:
+                return 404, _error_page('File not found'), dict()
+
+            entry = lb.entries.get(msg_id)
+            if entry is None:
+                return 200, _error_page('This entry has been deleted'), dict()
+            if query.get('cmd') == 'download':
+                return 200, entry.download(), {'Content-Type': 'text/plain'}
+            if query.get('cmd') == 'Delete' and query.get('confirm') == 'Yes':
+                lb.delete(msg_id)
+                return 302, b'', {'Location': self._location([lb.name], '')}
+            return 200, _entry_page(entry), dict()
+
+        def _authenticate(self, form):
+            """ Returns None (ok), cookie to be set (ok) or False (not authenticated)."""
+            if not server.users:
+                return None
+            cookies = dict()
+            for cookie in self.headers.get_all('Cookie', []):
+                for item in cookie.split(';'):
+                    if '=' in item:
+                        key, value = item.strip().split('=', 1)
+                        cookies[key] = value
+            with server.lock:
+                if cookies.get('sid') in server.sessions:
+                    return None
+            user = form.get('unm', cookies.get('unm'))
+            password = form.get('upwd', cookies.get('upwd'))
+            if user is None or server.users.get(user) != password:
+                return False
+            if server.sessions_enabled:
+                sid = uuid.uuid4().hex
+                with server.lock:
+                    server.sessions[sid] = user
+                return 'sid={}; Path=/'.format(sid)
+            # Without sessions only the user name is remembered (pre-fills the login form)
+            return 'unm={}; Path=/'.format(user)
+
+        def _submit(self, lb, form):
+            fields = {key: value for key, value in form.items() if not isinstance(value, tuple)}
+            cmd = fields.get('cmd')
+            if cmd not in ('Submit', 'Update'):
+                return 400, _error_page('Unknown command'), dict()
+
+            attributes = {lb.attribute_name(key): value for key, value in fields.items()
+                          if key not in FORM_FIELDS and key not in RESERVED_ATTRIBUTES and
+                          not key.startswith('attachment') and not key.startswith('delatt')}
+            text = form.get('Text', ('', b''))[1].decode('iso-8859-1')
+            encoding = fields.get('Encoding', 'plain')
+            uploaded = [value for key, value in sorted(form.items(), key=lambda item: _index(item[0]))
+                        if key.startswith('attfile') and isinstance(value, tuple) and value[0]]
+
+            if 'edit_id' in fields:
+                entry = lb.entries.get(int(fields['edit_id']))
+                if entry is None:
+                    return 200, _error_page('This entry has been deleted'), dict()
+                if cmd == 'Update':
+                    # Only deleting of the attachments is supported
+                    for key in sorted((k for k in fields if k.startswith('delatt')), key=_index, reverse=True):
+                        index = _index(key)
+                        if index < len(entry.attachments):
+                            lb.files.pop(entry.attachments.pop(index), None)
+                    return 302, b'', {'Location': self._location([lb.name, str(entry.msg_id)], '')}
+
+                entry.text = text
+                entry.encoding = encoding
+                entry.attributes = attributes
+                kept = [value for key, value in sorted(fields.items(), key=lambda item: _index(item[0]))
+                        if key.startswith('attachment') and value in entry.attachments]
+                for name in entry.attachments:
+                    if name not in kept:
+                        lb.files.pop(name, None)
+                entry.attachments = kept
+            else:
+                reply_to = int(fields['reply_to']) if 'reply_to' in fields else None
+                if reply_to and reply_to not in lb.entries:
+                    return 200, _error_page('This entry has been deleted'), dict()
+                entry = Entry(next(lb.ids), attributes, text, encoding, reply_to)
+                lb.entries[entry.msg_id] = entry
+                if reply_to:
+                    lb.entries[reply_to].replies.append(entry.msg_id)
+
+            entry.attachments += [lb.store_file(filename, content) for filename, content in uploaded]
+            return 302, b'', {'Location': self._location([lb.name, str(entry.msg_id)], '')}
+
+        def _location(self, parts, query):
+            return 'http://{}/{}{}'.format(self.headers.get('Host'), '/'.join(parts), query)
+
+        def _send(self, status, content, **headers):
+            self.send_response(status)
+            headers.setdefault('Content-Type', 'text/html')
+            headers['Content-Length'] = str(len(content))
+            for key, value in headers.items():
+                self.send_header(key, value)
+            self.end_headers()
+            self.wfile.write(content)
+
+    def _listing(lb, query):
+        """ Html listing of the entries as elogd returns it (rows with classes list1/list2)."""
+        search = {key: value for key, value in query.items() if key not in LISTING_PARAMETERS}
+        entries = [entry for entry in lb.entries.values() if entry.matches(search)]
+        entries.sort(key=lambda e: e.msg_id, reverse=query.get('reverse', '1') == '1')  # newest first by default
+        n_entries = len(entries)
+        npp = int(query.get('npp', 0)) or None
+        if npp:
+            page = int(query.get('page', 1))
+            entries = entries[(page - 1) * npp:page * npp]
+        rows = list()
+        for i, entry in enumerate(entries):
+            cls = 'list1' if i % 2 == 0 else 'list2'
+            cells = [entry.date] + list(entry.attributes.values()) + [entry.text[:40]]
+            rows.append('<tr><td class="{0}"><a href="../{1}/{2}">{2}</a></td>{3}</tr>'.format(
+                cls, lb.name, entry.msg_id,
+                ''.join('<td class="{}">{}</td>'.format(cls, html.escape(str(c))) for c in cells)))
+        return server.page('<table class="listframe"><tr><td class="menuframe"><b>{} Entries</b></td></tr>{}'
+                           '</table>'.format(n_entries, ''.join(rows)))
+
+    def _entry_page(entry):
+        return server.page('<table><tr><td class="attribvalue">{}</td></tr><tr><td class="messageframe">{}</td>'
+                           '</tr></table>'.format(entry.msg_id, html.escape(entry.text)))
+
+    def _selection_page():
+        rows = ['<tr><td class="sellogbook"><a href="{}/">{}</a></td><td>{}</td></tr>'.format(
+            urllib.parse.quote_plus(name), html.escape(name), len(lb.entries)) for name, lb in server.logbooks.items()]
+        return server.page('<table class="selframe">{}</table>'.format(''.join(rows)))
+
+    def _error_page(message):
+        return server.page('<table><tr><td class="errormsg">{}</td></tr></table>'.format(message))
+
+    return Handler
+
+
+_LOGIN_FORM = '<form><input type=text name=uname><input type=password name=upassword></form>'
+
+
+def _index(key):
+    """ Returns numeric suffix of the form field (attachment3 --> 3)."""
+    digits = re.findall(r'\d+$', key)
+    return int(digits[0]) if digits else -1
+
+
+def _parse_multipart(content_type, body):
+    """
+    Parses multipart/form-data body. Returns dictionary where plain fields are strings and files are tuples
+    (filename, bytes).
+    """
+    message = email.parser.BytesParser(policy=email.policy.HTTP).parsebytes(
+        b'Content-Type: ' + content_type.encode('latin1') + b'\r\n\r\n' + body)
+    form = dict()
+    for part in message.iter_parts():
+        name = part.get_param('name', header='content-disposition')
+        filename = part.get_param('filename', header='content-disposition')
+        payload = part.get_payload(decode=True)
+        if filename is not None:
+            form[name] = (filename, payload)
+        else:
+            form[name] = payload.decode('iso-8859-1')
+    return form
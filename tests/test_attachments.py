@@ -48,8 +48,7 @@ def main():
 
 
     print('Removing all entries', end='')
-    for id in logbook.get_message_ids():
-        logbook.delete(id)
+    logbook.delete_many(logbook.get_message_ids())
     print('........ DONE!')
 
     attributes = {'Operator': 'Ich', 'Sample ID': 'AAA', 'Sample Material': 'Irrelevant'}
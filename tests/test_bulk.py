@@ -0,0 +1,88 @@
+import unittest
+
+import elog
+from elog.logbook_exceptions import *
+from fake_elogd import FakeElogd
+
+
+class TestBulkOperations(unittest.TestCase):
+
+    def setUp(self):
+        self.server = FakeElogd().start()
+        self.logbook = elog.open(self.server.url('demo'))
+
+    def tearDown(self):
+        self.server.stop()
+
+    def test_edit_many_ids(self):
+        first = self.server.add_entry(text='first', Author='AB', Type='Open', attachments={'a.txt': b'a'})
+        second = self.server.add_entry(text='second', Author='CD', Type='Open')
+        third = self.server.add_entry(text='third', Author='EF', Type='Closed')
+        attachments = self.logbook.read(first)[2]
+
+        n_requests = len(self.server.requests)
+        result = self.logbook.edit_many([first, second, third, 99], Type='Closed', workers=3)
+        self.assertEqual(result.succeeded, [first, second, third])
+        self.assertEqual(list(result.failed), [99])
+        self.assertIsInstance(result.failed[99], LogbookInvalidMessageID)
+        # One read per message, third already has the value and is not submitted
+        self.assertEqual(len(self.server.requests), n_requests + 4 + 2)
+
+        message, attributes, new_attachments = self.logbook.read(first)
+        self.assertEqual((message, attributes['Type'], attributes['Author']), ('first', 'Closed', 'AB'))
+        self.assertEqual(new_attachments, attachments)
+        self.assertEqual(self.logbook.download_attachment(attachments[0]), b'a')
+        self.assertEqual(self.logbook.read(second)[1]['Type'], 'Closed')
+
+    def test_edit_many_search(self):
+        msg_ids = [self.server.add_entry(text='entry', Type='Open' if i % 3 else 'Closed') for i in range(30)]
+        result = self.logbook.edit_many({'Type': 'Open'}, {'Type': 'Closed'}, workers=8)
+        self.assertEqual(sorted(result.succeeded), [msg_id for i, msg_id in enumerate(msg_ids) if i % 3])
+        self.assertEqual(result.failed, {})
+        self.assertEqual(self.logbook.search({'Type': 'Open'}), [])
+
+    def test_edit_timeout_message(self):
+        entry = self.logbook.read(self.server.add_entry(text='entry', Type='Open'), raw=True)
+        self.server.latency = 0.2
+        with self.assertRaises(LogbookServerTimeout) as context:
+            self.logbook._submit_edit(entry, {'Type': 'Closed'}, timeout=0.05)
+        self.assertTrue(str(context.exception).startswith('_submit_edit method cannot be completed'))
+
+    def test_delete_many_threads(self):
+        first = self.server.add_entry(text='first', attachments={'a.txt': b'a'})
+        reply = self.server.add_entry(text='reply', in_reply_to=first)
+        reply_of_reply = self.server.add_entry(text='reply of reply', in_reply_to=reply)
+        other = self.server.add_entry(text='other')
+        orphan = self.server.add_entry(text='orphan', in_reply_to=other)
+        kept = self.server.add_entry(text='kept')
+
+        n_requests = len(self.server.requests)
+        result = self.logbook.delete_many([reply_of_reply, first, reply, orphan, 99], workers=4)
+        self.assertEqual(result.succeeded, [reply_of_reply, first, reply, orphan])
+        self.assertEqual(list(result.failed), [99])
+        # Five reads, only the thread root and the orphan are deleted
+        self.assertEqual(len(self.server.requests), n_requests + 5 + 2)
+        self.assertEqual(sorted(self.logbook.get_message_ids()), [other, kept])
+        self.assertEqual(self.server.logbooks['demo'].files, {})
+
+    def test_delete_many_already_removed(self):
+        first = self.server.add_entry(text='first')
+        reply = self.server.add_entry(text='reply', in_reply_to=first)
+        middle = self.server.add_entry(text='middle', in_reply_to=reply)
+        last = self.server.add_entry(text='last', in_reply_to=middle)
+        # Parent of middle is not deleted, both middle and first threads are deleted concurrently
+        result = self.logbook.delete_many([first, middle, last], workers=2)
+        self.assertEqual((result.succeeded, result.failed), ([first, middle, last], {}))
+        self.assertEqual(self.logbook.get_message_ids(), [])
+
+    def test_delete_many_search(self):
+        for i in range(50):
+            self.server.add_entry(text='test {}'.format(i) if i % 2 else 'production')
+        result = self.logbook.delete_many('test', workers=8)
+        self.assertEqual((len(result.succeeded), result.failed), (25, {}))
+        self.assertEqual(self.logbook.search('test'), [])
+        self.assertEqual(self.logbook.count(), 25)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,100 @@
+import io
+import multiprocessing
+import os
+import pickle
+import tempfile
+import unittest
+
+import elog
+from fake_elogd import FakeElogd
+
+
+def _fill(directory, start):
+    cache = elog.AttachmentCache(directory, max_bytes=50 * 100)
+    for i in range(start, start + 40):
+        cache.put('http://server/demo/file{}'.format(i), bytes([i % 256]) * 100)
+        cache.get('http://server/demo/file{}'.format(i - 1))
+    cache.close()
+
+
+class TestAttachmentCache(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.cache = elog.AttachmentCache(self.directory, max_bytes=1000)
+
+    def tearDown(self):
+        self.cache.close()
+
+    def _blobs(self):
+        return sum(len(files) for _, _, files in os.walk(os.path.join(self.directory, 'blobs')))
+
+    def test_get_put(self):
+        self.assertIsNone(self.cache.get('http://server/demo/a'))
+        self.cache.put('http://server/demo/a', b'content')
+        self.cache.put('http://server/demo/b', b'content')
+        self.assertEqual(self.cache.get('http://server/demo/a'), b'content')
+        self.assertEqual(self._blobs(), 1)  # same content stored once
+        self.assertEqual(self.cache.stats(), {'hits': 1, 'misses': 1, 'hit_ratio': 0.5, 'entries': 2, 'bytes': 7})
+
+        # Persistent
+        other = elog.AttachmentCache(self.directory)
+        self.assertEqual(other.get('http://server/demo/b'), b'content')
+        other.close()
+
+    def test_lru_eviction(self):
+        for name in 'abcd':
+            self.cache.put(name, name.encode() * 300)
+        self.assertIsNone(self.cache.get('a'))
+        self.cache.get('b')
+        self.cache.put('e', b'e' * 300)
+        self.assertEqual(self.cache.get('b'), b'b' * 300)
+        self.assertIsNone(self.cache.get('c'))
+        self.assertEqual(self.cache.stats()['bytes'], 900)
+        self.assertEqual(self._blobs(), 3)
+
+        self.cache.put('too big', b'x' * 1001)
+        self.assertIsNone(self.cache.get('too big'))
+
+    def test_concurrent_processes(self):
+        context = multiprocessing.get_context('spawn')
+        processes = [context.Process(target=_fill, args=(self.directory, start)) for start in (0, 20, 40)]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+            self.assertEqual(process.exitcode, 0)
+        cache = elog.AttachmentCache(self.directory, max_bytes=50 * 100)
+        self.assertLessEqual(cache.stats()['bytes'], 50 * 100)
+        self.assertEqual(cache.stats()['bytes'], 100 * self._blobs())
+        cache.close()
+
+    def test_logbook(self):
+        server = FakeElogd().start()
+        try:
+            logbook = elog.open(server.url('demo'))
+            logbook.use_attachment_cache(self.cache)
+            attachment = io.BytesIO(b'attached content')
+            attachment.name = 'file.txt'
+            msg_id = logbook.post('message', attachments=[attachment])
+            url = logbook.read(msg_id)[2][0]
+
+            self.assertEqual(logbook.download_attachment(url), b'attached content')
+            n_requests = len(server.requests)
+            self.assertEqual(logbook.download_attachment(url), b'attached content')
+
+            # Comparison of attachments when editing uses the cache as well
+            attachment.seek(0)
+            logbook.post('edited', msg_id=msg_id, attachments=[attachment])
+            self.assertEqual(len([r for r in server.requests[n_requests:] if r[1].endswith('file.txt')]), 0)
+            self.assertEqual(self.cache.stats()['hits'], 2)
+
+            copy = pickle.loads(pickle.dumps(logbook))
+            self.assertEqual(copy.download_attachment(url), b'attached content')
+            self.assertEqual(copy._attachment_cache.stats()['hits'], 1)
+        finally:
+            server.stop()
+
+
+if __name__ == '__main__':
+    unittest.main()
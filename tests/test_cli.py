@@ -0,0 +1,99 @@
+import contextlib
+import io
+import json
+import os
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+from elog import cli
+from fake_elogd import FakeElogd
+
+
+class TestCli(unittest.TestCase):
+
+    def setUp(self):
+        self.server = FakeElogd(users={'user': 'password'}).start()
+        self.url = self.server.url('demo')
+        self.first = self.server.add_entry(text='Hello World', Author='AB', attachments={'a.txt': b'a'})
+        self.second = self.server.add_entry(text='Other', Author='CD')
+        self.reply = self.server.add_entry(text='Hello reply', Author='AB', in_reply_to=self.first)
+
+    def tearDown(self):
+        self.server.stop()
+
+    def run_cli(self, *args, stdin=''):
+        stdout, stderr = io.StringIO(), io.StringIO()
+        with mock.patch.dict(os.environ, {'ELOG_USER': 'user', 'ELOG_PASSWORD': 'password'}), \
+                mock.patch('sys.stdin', io.StringIO(stdin)), \
+                contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(stderr):
+            status = cli.main(list(args))
+        return status, [json.loads(line) for line in stdout.getvalue().splitlines()], stderr.getvalue()
+
+    def test_list_and_read_pipe(self):
+        status, records, _ = self.run_cli('list', self.url)
+        self.assertEqual(status, 0)
+        self.assertEqual(sorted(record['msg_id'] for record in records), [self.first, self.second, self.reply])
+
+        ids = ''.join(json.dumps(record) + '\n' for record in records)
+        status, records, _ = self.run_cli('read', self.url, '-', '--workers', '3', stdin=ids)
+        self.assertEqual([record['message'] for record in records], ['Hello reply', 'Other', 'Hello World'])
+        self.assertEqual(records[2]['attributes']['Author'], 'AB')
+
+        status, records, stderr = self.run_cli('read', self.url, str(self.second), '99')
+        self.assertEqual([record['msg_id'] for record in records], [self.second])
+        self.assertIn('message 99 skipped', stderr)
+
+    def test_search(self):
+        status, records, _ = self.run_cli('search', self.url, 'hello')
+        self.assertEqual([record['msg_id'] for record in records], [self.reply, self.first])
+        status, records, _ = self.run_cli('search', self.url, '-a', 'Author=CD')
+        self.assertEqual([record['msg_id'] for record in records], [self.second])
+
+    def test_fetch_attachments_and_export(self):
+        directory = tempfile.mkdtemp()
+        status, records, _ = self.run_cli('fetch-attachments', self.url, '-d', directory)
+        self.assertEqual([(record['msg_id'], record['bytes']) for record in records], [(self.first, 1)])
+        with open(records[0]['path'], 'rb') as attachment:
+            self.assertEqual(attachment.read(), b'a')
+
+        path = os.path.join(directory, 'export.jsonl')
+        status, records, _ = self.run_cli('export', self.url, path)
+        self.assertEqual(records, [{'path': path, 'exported': 3}])
+
+    def test_post_and_delete(self):
+        posts = json.dumps({'message': 'New', 'attributes': {'Author': 'EF'}}) + '\n' + \
+                json.dumps({'message': 'Reply', 'msg_id': self.second, 'reply': True}) + '\n'
+        status, records, _ = self.run_cli('post-from-file', self.url, '-', stdin=posts)
+        self.assertEqual([record['line'] for record in records], [1, 2])
+        self.assertEqual(self.server.logbooks['demo'].entries[records[1]['msg_id']].in_reply_to, self.second)
+
+        status, records, _ = self.run_cli('delete', self.url, '--search', 'hello')
+        self.assertEqual(sorted(record['msg_id'] for record in records if record['deleted']), [self.first, self.reply])
+        status, records, _ = self.run_cli('delete', self.url, '--all')
+        self.assertEqual(len(records), 3)
+        self.assertEqual(self.server.logbooks['demo'].entries, {})
+
+    def test_follow_deadline_rate_and_stats(self):
+        start = time.monotonic()
+        status, records, stderr = self.run_cli('follow', self.url, '--since', str(self.second), '--poll-interval',
+                                               '0.05', '--deadline', '0.3', '--stats')
+        self.assertEqual([record['msg_id'] for record in records], [self.reply])
+        self.assertLess(time.monotonic() - start, 1)
+        self.assertIn('latency p50', stderr)
+
+        start = time.monotonic()
+        status, records, _ = self.run_cli('read', self.url, '--rate', '20', '--workers', '4')
+        # Listing and three reads spaced by 50 ms
+        self.assertGreaterEqual(time.monotonic() - start, 0.15)
+        self.assertEqual(len(records), 3)
+
+        self.server.latency = 0.2
+        status, records, stderr = self.run_cli('read', self.url, '--deadline', '0.1')
+        self.assertEqual(status, 1)
+        self.assertIn('elog: error', stderr)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,55 @@
+import multiprocessing
+import pickle
+import unittest
+
+import elog
+from fake_elogd import FakeElogd
+
+
+class TestCrawl(unittest.TestCase):
+
+    def setUp(self):
+        self.server = FakeElogd(users={'user': 'password'}).start()
+        self.logbook = elog.open(self.server.url('demo'), user='user', password='password', session_login=True)
+        self.msg_ids = [self.server.add_entry(text='Message {}'.format(i), Author='AB') for i in range(30)]
+
+    def tearDown(self):
+        self.server.stop()
+
+    def test_pickle(self):
+        self.logbook.add_hook(elog.StatsCollector())
+        self.logbook.login()
+        copy = pickle.loads(pickle.dumps(self.logbook))
+
+        # Password is not hashed again and the session of the original is used
+        self.assertEqual(copy._password, self.logbook._password)
+        self.assertEqual(copy._hooks, tuple())
+        n_sessions = len(self.server.sessions)
+        self.assertEqual(copy.read(self.msg_ids[0])[0], 'Message 0')
+        self.assertEqual(len(self.server.sessions), n_sessions)
+
+    def test_crawl(self):
+        self.server.add_entry(text='deleted')
+        msg_ids = self.msg_ids + [self.logbook.get_last_message_id()]
+        self.logbook.delete(msg_ids[-1])
+
+        progress = list()
+        entries = list(elog.crawl(self.logbook, msg_ids, processes=2, max_connections=4, shard_size=7,
+                                  progress=progress.append, mp_context=multiprocessing.get_context('spawn')))
+        self.assertEqual([msg_id for msg_id, _ in entries], self.msg_ids)
+        self.assertEqual(entries[5][1][0], 'Message 5')
+
+        self.assertEqual(sorted(p.shard for p in progress), list(range(5)))
+        self.assertEqual(progress[-1].shards_done, 5)
+        self.assertEqual(progress[-1].messages_done, 30)
+        self.assertEqual(progress[-1].messages_total, 31)
+        self.assertTrue(all(p.throughput > 0 for p in progress))
+
+    def test_crawl_all(self):
+        entries = list(elog.crawl(self.logbook, processes=2, shard_size=20,
+                                  mp_context=multiprocessing.get_context('spawn')))
+        self.assertEqual([msg_id for msg_id, _ in entries], self.msg_ids)
+
+
+if __name__ == '__main__':
+    unittest.main()
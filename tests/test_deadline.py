@@ -0,0 +1,58 @@
+import io
+import time
+import unittest
+
+import elog
+from elog.logbook_exceptions import *
+from fake_elogd import FakeElogd
+
+
+class TestDeadline(unittest.TestCase):
+
+    def setUp(self):
+        self.server = FakeElogd().start()
+        self.logbook = elog.open(self.server.url('demo'))
+        attachment = io.BytesIO(b'content')
+        attachment.name = 'file.txt'
+        self.msg_id = self.logbook.post('message', Author='AB', attachments=[attachment])
+
+    def tearDown(self):
+        self.server.stop()
+
+    def test_budget_shared_by_all_requests(self):
+        # Each request takes 0.1 s, editing a message needs at least two of them (read and submit)
+        self.server.latency = 0.1
+        start = time.monotonic()
+        self.assertRaises(LogbookServerTimeout, self.logbook.post, 'edited', msg_id=self.msg_id, deadline=0.15)
+        self.assertLess(time.monotonic() - start, 0.4)
+
+        self.server.latency = 0
+        self.assertEqual(self.logbook.read(self.msg_id)[0], 'message')
+
+    def test_sufficient_budget(self):
+        self.server.latency = 0.02
+        self.logbook.post('edited', msg_id=self.msg_id, deadline=5)
+        self.assertEqual(self.logbook.read(self.msg_id, deadline=5)[0], 'edited')
+        self.assertEqual(self.logbook.get_siblings(self.msg_id, deadline=5), None)
+
+    def test_timeout_forwarded_to_all_requests(self):
+        self.server.latency = 0.2
+        start = time.monotonic()
+        self.assertRaises(LogbookServerTimeout, self.logbook.read, self.msg_id, timeout=0.05)
+        self.assertRaises(LogbookServerTimeout, self.logbook.delete, self.msg_id, timeout=0.05)
+        self.assertLess(time.monotonic() - start, 0.4)
+
+    def test_nested_deadline_does_not_extend(self):
+        self.server.latency = 0.1
+        with self.logbook._deadline(0.05):
+            self.assertRaises(LogbookServerTimeout, self.logbook.read, self.msg_id, deadline=10)
+
+    def test_follow_stops_after_deadline(self):
+        start = time.monotonic()
+        events = list(self.logbook.follow(since_id=0, poll_interval=0.05, deadline=0.3))
+        self.assertEqual([event.msg_id for event in events], [self.msg_id])
+        self.assertLess(time.monotonic() - start, 0.6)
+
+
+if __name__ == '__main__':
+    unittest.main()
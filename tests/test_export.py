@@ -0,0 +1,112 @@
+import csv
+import json
+import os
+import tempfile
+import unittest
+
+import elog
+import elog.export
+from elog.logbook_exceptions import *
+from fake_elogd import FakeElogd
+
+
+class TestExport(unittest.TestCase):
+
+    def setUp(self):
+        self.server = FakeElogd().start()
+        self.logbook = elog.open(self.server.url('demo'))
+        self.msg_ids = [self.server.add_entry(text='Message {}\nsecond line'.format(i), Author='AB',
+                                              Subject='Entry {}'.format(i)) for i in range(25)]
+        self.path = os.path.join(tempfile.mkdtemp(), 'export.jsonl')
+
+    def tearDown(self):
+        self.server.stop()
+
+    def _records(self):
+        with open(self.path, encoding='utf-8') as f:
+            return [json.loads(line) for line in f]
+
+    def test_jsonl(self):
+        self.assertEqual(self.logbook.export(self.path, workers=3), 25)
+        records = self._records()
+        self.assertEqual([r['msg_id'] for r in records], self.msg_ids)
+        self.assertEqual(records[3]['message'], 'Message 3\nsecond line')
+        self.assertEqual(records[3]['attributes']['Subject'], 'Entry 3')
+        self.assertFalse(os.path.exists(self.path + '.checkpoint'))
+
+    def test_csv(self):
+        other = self.server.add_entry(text='Other, "quoted"', Author='CD', Type='Routine')
+        path = self.path[:-5] + 'csv'
+        self.assertEqual(self.logbook.export(path, format='csv'), 26)
+        with open(path, newline='', encoding='utf-8') as f:
+            rows = list(csv.DictReader(f))
+        self.assertEqual([int(row['msg_id']) for row in rows], self.msg_ids + [other])
+        self.assertEqual(rows[0]['Subject'], 'Entry 0')
+        self.assertEqual(rows[-1]['message'], 'Other, "quoted"')
+        self.assertEqual(json.loads(rows[-1]['other_attributes']), {'Type': 'Routine'})
+
+    def test_attachments(self):
+        msg_id = self.server.add_entry(text='with attachment', attachments={'data.bin': b'\x00\x01binary'})
+        self.logbook.export(self.path, include_attachments=True)
+        attachments = self._records()[-1]['attachments']
+        self.assertEqual(len(attachments), 1)
+        self.assertTrue(attachments[0].startswith('export.jsonl.attachments/{}/'.format(msg_id)))
+        with open(os.path.join(os.path.dirname(self.path), attachments[0]), 'rb') as f:
+            self.assertEqual(f.read(), b'\x00\x01binary')
+
+    def test_resume(self):
+        read = self.logbook.read
+
+        def failing_read(msg_id, timeout=None):
+            if msg_id == self.msg_ids[17]:
+                raise LogbookServerTimeout('timeout')
+            return read(msg_id, timeout=timeout)
+
+        interval = elog.export.CHECKPOINT_INTERVAL
+        elog.export.CHECKPOINT_INTERVAL = 5
+        try:
+            self.logbook.read = failing_read
+            self.assertRaises(LogbookServerTimeout, self.logbook.export, self.path)
+            with open(self.path + '.checkpoint') as f:
+                self.assertEqual(json.load(f)['last_id'], self.msg_ids[14])
+
+            del self.logbook.read
+            n_requests = len(self.server.requests)
+            self.assertEqual(self.logbook.export(self.path), 25)
+            # Listing and one request per message not exported before the interruption
+            self.assertEqual(len(self.server.requests) - n_requests, 1 + 10)
+        finally:
+            elog.export.CHECKPOINT_INTERVAL = interval
+        self.assertEqual([r['msg_id'] for r in self._records()], self.msg_ids)
+
+    def test_deleted_while_exporting(self):
+        read = self.logbook.read
+
+        def read_deleted(msg_id, timeout=None):
+            if msg_id == self.msg_ids[0]:
+                raise LogbookInvalidMessageID('deleted')
+            return read(msg_id, timeout=timeout)
+
+        self.logbook.read = read_deleted
+        self.assertEqual(self.logbook.export(self.path), 24)
+        self.assertEqual([r['msg_id'] for r in self._records()], self.msg_ids[1:])
+
+    def test_deadline_and_hooks(self):
+        stats = elog.StatsCollector()
+        self.logbook.add_hook(stats)
+        self.server.latency = 0.05
+        self.assertRaises(LogbookServerTimeout, self.logbook.export, self.path, workers=2, deadline=0.3)
+        self.server.latency = 0
+        # Interrupted export is resumed
+        self.assertEqual(self.logbook.export(self.path), 25)
+        self.assertEqual([r['msg_id'] for r in self._records()], self.msg_ids)
+        summary = stats.summary()
+        self.assertEqual(summary['export']['calls'], 2)
+        self.assertNotIn('read', summary)
+
+    def test_invalid_format(self):
+        self.assertRaises(ValueError, self.logbook.export, self.path, format='xml')
+
+
+if __name__ == '__main__':
+    unittest.main()
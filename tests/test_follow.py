@@ -0,0 +1,115 @@
+import asyncio
+import time
+import unittest
+from unittest import mock
+
+import elog
+from elog.follow import Follower
+from elog.logbook_exceptions import *
+from fake_elogd import FakeElogd
+
+
+class TestFollow(unittest.TestCase):
+
+    def setUp(self):
+        self.server = FakeElogd().start()
+        self.logbook = elog.open(self.server.url('demo'))
+        self.first = self.server.add_entry(text='First', Author='AB', Subject='first')
+
+    def tearDown(self):
+        self.server.stop()
+
+    def _add(self, n):
+        return [self.server.add_entry(text='Message {}'.format(i), Author='AB', Subject=str(i)) for i in range(n)]
+
+    def test_high_water_mark(self):
+        follower = Follower(self.logbook)
+        # First poll only remembers the newest message
+        self.assertEqual(follower.poll(), [])
+        new_ids = self._add(3)
+        events = follower.poll()
+        self.assertEqual([event.msg_id for event in events], new_ids)
+        self.assertEqual([event.entry[0] for event in events], ['Message 0', 'Message 1', 'Message 2'])
+        self.assertFalse(any(event.edited for event in events))
+        self.assertEqual(follower.poll(), [])
+
+        follower = Follower(self.logbook, since_id=new_ids[0])
+        self.assertEqual([event.msg_id for event in follower.poll()], new_ids[1:])
+
+    def test_backoff_and_reset(self):
+        follower = Follower(self.logbook, since_id=self.first, poll_interval=1, max_interval=4)
+        intervals = list()
+        for _ in range(3):
+            follower.poll()
+            intervals.append(follower.interval)
+        self.assertEqual(intervals, [2, 4, 4])
+
+        self._add(1)
+        self.assertEqual(len(follower.poll()), 1)
+        self.assertEqual(follower.interval, 1)
+
+    def test_burst_larger_than_window(self):
+        follower = Follower(self.logbook, since_id=self.first, window=5)
+        new_ids = self._add(30)
+        self.assertEqual([event.msg_id for event in follower.poll()], new_ids)
+        self.assertEqual(follower.poll(), [])
+
+    def test_burst_larger_than_largest_page(self):
+        follower = Follower(self.logbook, since_id=self.first, window=4)
+        new_ids = self._add(25)
+        with mock.patch('elog.follow.MAX_CATCH_UP_ENTRIES', 10):
+            self.assertEqual([event.msg_id for event in follower.poll()], new_ids)
+            self.assertEqual(follower.poll(), [])
+
+    def test_failed_poll_repeated(self):
+        follower = Follower(self.logbook, include_edits=True)
+        follower.poll()
+        self.logbook.post('Edited', msg_id=self.first, Subject='edited')
+        new_id = self._add(1)[0]
+
+        with mock.patch.object(self.logbook, 'read', side_effect=LogbookServerTimeout('timeout')):
+            self.assertRaises(LogbookServerTimeout, follower.poll)
+        events = follower.poll()
+        self.assertEqual([(event.msg_id, event.edited) for event in events], [(new_id, False), (self.first, True)])
+
+    def test_include_edits(self):
+        follower = Follower(self.logbook, include_edits=True)
+        follower.poll()
+        self.logbook.post('Edited', msg_id=self.first, Subject='edited')
+        new_id = self._add(1)[0]
+
+        events = follower.poll()
+        self.assertEqual([(event.msg_id, event.edited) for event in events], [(new_id, False), (self.first, True)])
+        self.assertEqual(events[1].entry[0], 'Edited')
+        self.assertEqual(follower.poll(), [])
+
+        # Edits are not reported unless requested
+        follower = Follower(self.logbook)
+        follower.poll()
+        self.logbook.post('Edited again', msg_id=self.first, Subject='edited again')
+        self.assertEqual(follower.poll(), [])
+
+    def test_new_messages_read_concurrently(self):
+        follower = Follower(self.logbook, since_id=self.first, workers=8)
+        new_ids = self._add(8)
+        self.server.latency = 0.1
+        start = time.monotonic()
+        self.assertEqual([event.msg_id for event in follower.poll()], new_ids)
+        # Listing and 8 concurrent reads, serial reading would take 0.9 s
+        self.assertLess(time.monotonic() - start, 0.6)
+
+    def test_follow_async(self):
+        new_ids = self._add(2)
+
+        async def follow():
+            return [event async for event in self.logbook.follow_async(since_id=self.first, poll_interval=0.05,
+                                                                       deadline=0.3)]
+
+        start = time.monotonic()
+        events = asyncio.run(follow())
+        self.assertEqual([event.msg_id for event in events], new_ids)
+        self.assertLess(time.monotonic() - start, 0.6)
+
+
+if __name__ == '__main__':
+    unittest.main()
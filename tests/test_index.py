@@ -0,0 +1,91 @@
+import os
+import tempfile
+import time
+import unittest
+
+import elog
+from fake_elogd import FakeElogd
+
+
+class TestSearchIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.server = FakeElogd().start()
+        self.logbook = elog.open(self.server.url('demo'))
+        self.first = self.server.add_entry(text='Hello World', Author='AB', Category='Hardware')
+        self.second = self.server.add_entry(text='Hello elog', Author='CD', Category='Software')
+        self.third = self.server.add_entry(text='Beam dump at 10:00', Author='AB', Category='Software Update')
+        self.index = elog.SearchIndex(self.logbook, max_age=60)
+
+    def tearDown(self):
+        self.index.close()
+        self.server.stop()
+
+    def test_same_results_as_server(self):
+        self.assertEqual(self.index.sync(), (3, 0))
+        queries = [('hello',), ('HELLO',), ('world',), ('',), ('dump at 1[0-9]',), ('hel', 1),
+                   ({'Category': 'Hardware'},), ({'Category': 'software', 'Author': 'AB'},),
+                   ({'subtext': 'hello', 'Author': 'CD'},), ('AB', 20, 'Author'),
+                   ({'subtext': 'Software'},), ({'subtext': 'Software', 'sall': 1},),
+                   ({'subtext': 'hello', 'casesensitive': 1},), ({'Category': 'Software_Update'},)]
+        for query in queries:
+            self.assertEqual(self.index.search(*query), self.logbook.search(*query), query)
+
+    def test_search_answered_locally_while_fresh(self):
+        self.index.sync()
+        self.logbook.use_search_index(self.index)
+        n_requests = len(self.server.requests)
+        self.assertEqual(self.logbook.search('hello'), [self.second, self.first])
+        self.assertEqual(len(self.server.requests), n_requests)
+
+        # Unknown attributes are searched on the server
+        self.assertEqual(self.logbook.search({'Unknown': 'x'}), [])
+        self.assertEqual(len(self.server.requests), n_requests + 1)
+
+        # Stale index is not used
+        self.index.max_age = 0.05
+        time.sleep(0.1)
+        fourth = self.server.add_entry(text='Hello again')
+        self.assertEqual(self.logbook.search('hello'), [fourth, self.second, self.first])
+
+    def test_incremental_sync(self):
+        self.index.sync()
+        fourth = self.server.add_entry(text='Hello again')
+        self.logbook.post('Hello edited', msg_id=self.first)
+        self.logbook.delete(self.second)
+
+        n_requests = len(self.server.requests)
+        self.assertEqual(self.index.sync(), (2, 1))
+        # One listing and reading of the two changed messages
+        self.assertEqual(len(self.server.requests), n_requests + 3)
+        self.assertEqual(self.index.search('hello'), [fourth, self.first])
+        self.assertEqual(len(self.index), 3)
+        self.assertEqual(self.index.sync(), (0, 0))
+
+    def test_persistent(self):
+        path = os.path.join(tempfile.mkdtemp(), 'index.sqlite')
+        index = elog.SearchIndex(self.logbook, path)
+        index.sync()
+        index.close()
+
+        index = elog.SearchIndex(self.logbook, path)
+        try:
+            self.assertTrue(index.is_fresh())
+            self.assertEqual(index.search('hello'), [self.second, self.first])
+        finally:
+            index.close()
+
+    def test_background_sync(self):
+        self.index.start(interval=0.05)
+        try:
+            fourth = self.server.add_entry(text='Hello again')
+            deadline = time.monotonic() + 5
+            while self.index.search('again') != [fourth] and time.monotonic() < deadline:
+                time.sleep(0.02)
+            self.assertEqual(self.index.search('again'), [fourth])
+        finally:
+            self.index.stop()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,86 @@
+import io
+import logging
+import unittest
+
+import elog
+from elog.instrumentation import RequestEvent, SpanEvent
+from fake_elogd import FakeElogd
+
+
+class TestInstrumentation(unittest.TestCase):
+
+    def setUp(self):
+        self.server = FakeElogd().start()
+        self.logbook = elog.open(self.server.url('demo'))
+        self.events = list()
+        self.logbook.add_hook(self.events.append)
+
+    def tearDown(self):
+        self.server.stop()
+
+    def test_request_events(self):
+        msg_id = self.server.add_entry(text='text', Author='me')
+        self.logbook.read(msg_id)
+
+        requests = [e for e in self.events if isinstance(e, RequestEvent)]
+        self.assertEqual([(e.operation, e.method, e.path, e.status) for e in requests],
+                         [('read', 'GET', '/demo/{}'.format(msg_id), 200)])
+        self.assertTrue(all(e.bytes_sent > 0 and e.bytes_received > 0 and e.elapsed > 0 for e in requests))
+
+        spans = [e for e in self.events if isinstance(e, SpanEvent)]
+        self.assertEqual(len(spans), 1)
+        self.assertEqual(spans[0].operation, 'read')
+        self.assertEqual(spans[0].requests, 1)
+        self.assertEqual(spans[0].bytes_received, sum(e.bytes_received for e in requests))
+
+    def test_nested_spans(self):
+        attachment = io.BytesIO(b'content')
+        attachment.name = 'file.txt'
+        msg_id = self.logbook.post('text', Author='me', attachments=[attachment])
+        del self.events[:]
+
+        modified = io.BytesIO(b'modified')
+        modified.name = 'file.txt'
+        self.logbook.post('edited', msg_id=msg_id, attachments=[modified])
+
+        spans = [e for e in self.events if isinstance(e, SpanEvent)]
+        self.assertEqual([(s.operation, s.parent) for s in spans],
+                         [('read', 'post'), ('download_attachment', 'post'), ('delete_attachment', 'post'),
+                          ('post', None)])
+        self.assertEqual(spans[-1].requests, len([e for e in self.events if isinstance(e, RequestEvent)]))
+        self.assertEqual(spans[-1].requests, 4)
+
+    def test_error(self):
+        self.assertRaises(elog.LogbookInvalidMessageID, self.logbook.read, 42)
+        self.assertIsInstance(self.events[-1].error, elog.LogbookInvalidMessageID)
+
+    def test_stats_collector(self):
+        stats = elog.StatsCollector()
+        self.logbook.add_hook(stats)
+        msg_id = self.logbook.post('text', Author='me')
+        for _ in range(3):
+            self.logbook.read(msg_id)
+
+        summary = stats.summary()
+        self.assertEqual(summary['post']['calls'], 1)
+        self.assertEqual(summary['read']['calls'], 3)
+        self.assertEqual(summary['read']['requests'], 3)
+        self.assertGreater(summary['read']['p99'], 0)
+        self.assertEqual(stats.request_summary()[('read', 'GET')]['requests'], 3)
+        self.assertIn('read', str(stats))
+
+        self.logbook.remove_hook(stats)
+        self.logbook.read(msg_id)
+        self.assertEqual(stats.summary()['read']['calls'], 3)
+
+    def test_log_tracer(self):
+        self.logbook.add_hook(elog.LogTracer(level=logging.INFO))
+        with self.assertLogs('elog', level='INFO') as logs:
+            self.logbook.get_message_ids()
+        self.assertEqual(len(logs.output), 2)
+        self.assertIn('request get_message_ids GET /demo/page -> 200', logs.output[0])
+        self.assertIn('span get_message_ids: 1 requests', logs.output[1])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,173 @@
+import io
+import unittest
+
+import elog
+from elog.logbook_exceptions import *
+from fake_elogd import FakeElogd
+
+
+class TestLocalLogbook(unittest.TestCase):
+    """ Same scenarios as test_logbook.py, but against the fake elog server, so they run without network access."""
+
+    message = 'This message text is new'
+    attributes = {'Author': 'AB', 'Type': 'Routine'}
+
+    def setUp(self):
+        self.server = FakeElogd().start()
+        self.logbook = elog.open(self.server.url('demo'))
+
+    def tearDown(self):
+        self.server.stop()
+
+    def test_get_message_ids(self):
+        ids = [self.logbook.post(self.message, attributes=self.attributes) for _ in range(3)]
+        self.assertEqual(sorted(self.logbook.get_message_ids()), ids)
+
+    def test_get_last_message_id(self):
+        self.logbook.post(self.message, attributes=self.attributes)
+        msg_id = self.logbook.post(self.message, attributes=self.attributes)
+        self.assertEqual(self.logbook.get_last_message_id(), msg_id)
+
+    def test_short_timeout(self):
+        self.server.latency = 0.5
+        self.assertRaises(LogbookServerTimeout, self.logbook.post, self.message, attributes=self.attributes,
+                          timeout=0.05)
+
+    def test_edit(self):
+        msg_id = self.logbook.post(self.message, attributes={'Author': 'AB', 'Subject': 'py_elog test'})
+        self.logbook.post('hehehehehe', msg_id=msg_id, attributes={'Subject': 'py_elog test [mod]'})
+        message, attributes, attachments = self.logbook.read(msg_id)
+        self.assertEqual(message, 'hehehehehe')
+        self.assertEqual(attributes['Subject'], 'py_elog test [mod]')
+        self.assertEqual(attributes['Author'], 'AB')
+
+    def test_read_invalid_id(self):
+        self.assertRaises(LogbookInvalidMessageID, self.logbook.read, 42)
+
+    def test_search(self):
+        first = self.logbook.post('Hello World', attributes={'Category': 'Hardware'})
+        second = self.logbook.post('Hello elog', attributes={'Category': 'Software'})
+        self.assertEqual(self.logbook.search('hello'), [second, first])
+        self.assertEqual(self.logbook.search('world'), [first])
+        self.assertEqual(self.logbook.search(''), [second, first])
+        self.assertEqual(self.logbook.search({'Category': 'Hardware'}), [first])
+        self.assertEqual(self.logbook.search('hello', n_results=1), [second])
+
+    def test_post_special_characters(self):
+        attributes = {'Author': 'Me', 'Type': 'Other', 'Category': 'General',
+                      'Subject': 'This is a test of UTF-8 characters like èéöä'}
+        message = 'Just to be clear this is a general test using UTF-8 characters like èéöä.'
+        msg_id = self.logbook.post(message, reply=False, attributes=attributes, encoding='HTML')
+        read_msg, read_attr, read_att = self.logbook.read(msg_id)
+        self.assertEqual(read_msg, message)
+        for key in attributes:
+            self.assertEqual(read_attr[key], attributes[key])
+
+    def test_hierarchy_navigation(self):
+        top_level = self.logbook.post(self.message, attributes=self.attributes)
+        level1 = [self.logbook.post(self.message, reply=True, msg_id=top_level) for _ in range(2)]
+        level2 = self.logbook.post(self.message, reply=True, msg_id=level1[1])
+
+        self.assertEqual(sorted(self.logbook.get_descendants(top_level)), sorted(level1 + [level2]))
+        self.assertEqual(self.logbook.get_ancestors(level2), [level1[1], top_level])
+        self.assertEqual(self.logbook.get_siblings(level1[0]), level1)
+        self.assertIsNone(self.logbook.get_siblings(top_level))
+
+    def test_delete(self):
+        top_level = self.logbook.post(self.message, attributes=self.attributes)
+        reply = self.logbook.post(self.message, reply=True, msg_id=top_level)
+        other = self.logbook.post(self.message, attributes=self.attributes)
+        self.logbook.delete(top_level)
+        self.assertEqual(self.logbook.get_message_ids(), [other])
+        self.assertRaises(LogbookInvalidMessageID, self.logbook.read, reply)
+        self.assertRaises(LogbookInvalidMessageID, self.logbook.delete, top_level)
+
+    def test_attachments(self):
+        first = io.BytesIO(b'Content of the first file')
+        first.name = 'attach1.txt'
+        second = io.BytesIO(b'Another file with another content')
+        second.name = 'attach2.txt'
+        msg_id = self.logbook.post(self.message, attributes=self.attributes, attachments=[first, second])
+        message, attributes, attachments = self.logbook.read(msg_id)
+        self.assertEqual([a[-11:] for a in attachments], ['attach1.txt', 'attach2.txt'])
+        self.assertEqual(self.logbook.download_attachment(attachments[0]), b'Content of the first file')
+
+        # Same attachments are not uploaded again, existing ones are kept when editing without attachments
+        first.seek(0)
+        self.logbook.post('edited', msg_id=msg_id, attachments=[first])
+        self.logbook.post('edited again', msg_id=msg_id)
+        self.assertEqual(self.logbook.read(msg_id)[2], attachments)
+
+        # Modified attachment replaces the existing one
+        modified = io.BytesIO(b'modified test')
+        modified.name = 'attach1.txt'
+        self.logbook.post('modified', msg_id=msg_id, attachments=[modified])
+        new_attachments = self.logbook.read(msg_id)[2]
+        self.assertEqual(len(new_attachments), 2)
+        self.assertIn(attachments[1], new_attachments)
+        self.assertEqual(sorted(self.logbook.download_attachment(a) for a in new_attachments),
+                         [b'Another file with another content', b'modified test'])
+
+    def test_authentication(self):
+        server = FakeElogd(users={'user': 'password'}).start()
+        try:
+            logbook = elog.open(server.url('demo'), user='user', password='password')
+            msg_id = logbook.post(self.message, attributes=self.attributes)
+            self.assertEqual(logbook.read(msg_id)[0], self.message)
+
+            wrong = elog.open(server.url('demo'), user='user', password='wrong')
+            self.assertRaises(LogbookAuthenticationError, wrong.get_message_ids)
+            self.assertRaises(LogbookAuthenticationError, wrong.post, self.message)
+        finally:
+            server.stop()
+
+    def test_server_moved(self):
+        self.server.moved = True
+        self.assertRaises(LogbookServerProblem, self.logbook.get_message_ids)
+
+    def test_invalid_logbook(self):
+        logbook = elog.open(self.server.url('unknown'))
+        self.assertRaises(LogbookMessageRejected, logbook.get_message_ids)
+
+
+class TestSessionLogin(unittest.TestCase):
+
+    def setUp(self):
+        self.server = FakeElogd(users={'user': 'password'}).start()
+        self.logbook = elog.open(self.server.url('demo'), user='user', password='password', session_login=True)
+
+    def tearDown(self):
+        self.server.stop()
+
+    def test_login(self):
+        self.assertTrue(self.logbook.login())
+        self.assertEqual(len(self.server.sessions), 1)
+        self.logbook.get_message_ids()
+        self.assertEqual(len(self.server.sessions), 1)
+
+    def test_server_without_sessions(self):
+        self.server.sessions_enabled = False
+        # Server sets a cookie, but not a session id: credentials are sent with every request
+        self.assertFalse(self.logbook.login())
+        msg_id = self.logbook.post('Hello', Author='AB')
+        self.assertEqual(self.logbook.read(msg_id)[0], 'Hello')
+        self.assertEqual(self.server.sessions, {})
+
+    def test_expired_session_renewed(self):
+        self.logbook.login()
+        self.server.expire_sessions()
+        n_requests = len(self.server.requests)
+        self.assertEqual(self.logbook.get_message_ids(), [])
+        # Rejected request, login and the repeated request
+        self.assertEqual(len(self.server.requests) - n_requests, 3)
+        self.assertEqual(len(self.server.sessions), 1)
+
+    def test_login_timeout(self):
+        self.server.latency = 0.2
+        with self.assertRaises(LogbookServerTimeout) as context:
+            self.logbook.login(timeout=0.05)
+        self.assertTrue(str(context.exception).startswith('login method cannot be completed'))
+
+
+if __name__ == '__main__':
+    unittest.main()
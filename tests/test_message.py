@@ -0,0 +1,64 @@
+import io
+import pickle
+import sys
+import unittest
+
+import elog
+from elog.message import Message
+from fake_elogd import FakeElogd
+
+DOWNLOAD = ('$@MID@$: 7\nDate: Mon, 01 Jan 2024\nAuthor: Me\nSubject: a: b\nAttachment: 240101_120000_a.txt,'
+            '240101_120000_b.txt\nEncoding: plain\n========================================\nFirst line\r\n'
+            '\n========================================\nlast line \xe9\n').encode('iso-8859-1')
+
+
+class TestMessage(unittest.TestCase):
+
+    def test_lazy_parsing(self):
+        message = Message(7, DOWNLOAD, 'http://server/demo/')
+        self.assertIsNone(message._attributes)
+        self.assertEqual(message.text, 'First line\n\n========================================\nlast line \xe9')
+        self.assertIsNone(message._attributes)
+
+        self.assertEqual(message.get('Author'), 'Me')
+        self.assertEqual(message.attributes['Subject'], 'ab')  # same as the parsing of read()
+        self.assertNotIn('Attachment', message.attributes)
+        self.assertEqual(message.attachments, ['http://server/demo/240101_120000_a.txt',
+                                               'http://server/demo/240101_120000_b.txt'])
+
+    def test_tuple_compatible(self):
+        message = Message(7, DOWNLOAD, 'http://server/demo/')
+        text, attributes, attachments = message
+        self.assertEqual(len(message), 3)
+        self.assertEqual(message[0], text)
+        self.assertEqual(message[2], attachments)
+        self.assertEqual(message, (text, attributes, attachments))
+        self.assertEqual(pickle.loads(pickle.dumps(message)), message)
+
+    def test_no_attachments(self):
+        message = Message(1, b'Author: x\nAttachment: \n' + b'=' * 40, 'http://server/demo/')
+        self.assertEqual(tuple(message), ('', {'Author': 'x'}, []))
+        self.assertRaises(ValueError, Message, 1, b'Author: x\n', 'http://server/demo/')
+
+    def test_compact(self):
+        message = Message(7, DOWNLOAD, 'http://server/demo/')
+        self.assertFalse(hasattr(message, '__dict__'))
+        self.assertLess(sys.getsizeof(message), sys.getsizeof(tuple(message)[1]))
+
+    def test_read_raw(self):
+        with FakeElogd() as server:
+            logbook = elog.open(server.url('demo'))
+            attachment = io.BytesIO(b'content')
+            attachment.name = 'file.txt'
+            msg_id = logbook.post('Text\nwith lines', Author='AB', Subject='raw', attachments=[attachment])
+
+            message = logbook.read(msg_id, raw=True)
+            self.assertIsInstance(message, elog.Message)
+            self.assertEqual(message.msg_id, msg_id)
+            self.assertEqual(message, logbook.read(msg_id))
+            self.assertEqual(message.text, 'Text\nwith lines')
+            self.assertEqual(logbook.download_attachment(message.attachments[0]), b'content')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,77 @@
+import unittest
+from unittest import mock
+
+import elog
+from elog.logbook_exceptions import *
+from fake_elogd import FakeElogd
+
+
+class TestProbes(unittest.TestCase):
+
+    def setUp(self):
+        self.server = FakeElogd().start()
+        self.logbook = elog.open(self.server.url('demo'))
+
+    def tearDown(self):
+        self.server.stop()
+
+    def _requests(self, function, *args):
+        n_requests = len(self.server.requests)
+        result = function(*args)
+        return result, self.server.requests[n_requests:]
+
+    def test_empty_logbook(self):
+        self.assertIsNone(self.logbook.last_id())
+        self.assertIsNone(self.logbook.get_last_message_id())
+        self.assertEqual(self.logbook.count(), 0)
+        self.assertFalse(self.logbook.exists(1))
+
+    def test_probes(self):
+        msg_ids = [self.server.add_entry(text='Message {}'.format(i)) for i in range(5)]
+        self.logbook.delete(msg_ids[2])
+
+        last_id, requests = self._requests(self.logbook.get_last_message_id)
+        self.assertEqual(last_id, msg_ids[-1])
+        self.assertEqual(len(requests), 1)
+        self.assertIn('npp=1', requests[0][1])
+
+        count, requests = self._requests(self.logbook.count)
+        self.assertEqual(count, 4)
+        self.assertEqual(len(requests), 1)
+
+        exists, requests = self._requests(self.logbook.exists, msg_ids[0])
+        self.assertTrue(exists)
+        self.assertEqual(requests, [('GET', '/demo/{}?cmd=download'.format(msg_ids[0]))])
+        self.assertFalse(self.logbook.exists(msg_ids[2]))
+
+        self.assertEqual(self.logbook.exists_many(msg_ids + [42], workers=3),
+                         {1: True, 2: True, 3: False, 4: True, 5: True, 42: False})
+
+    def test_count_without_header(self):
+        for i in range(3):
+            self.server.add_entry(text='Message {}'.format(i))
+        with mock.patch('elog.logbook._parse_number_of_entries', return_value=None):
+            self.assertEqual(self.logbook.count(), 3)
+
+    def test_exists_many_with_hooks(self):
+        self.server.add_entry(text='Message')
+        stats = elog.StatsCollector()
+        self.logbook.add_hook(stats)
+        self.logbook.exists_many([1, 2], workers=2)
+        summary = stats.summary()
+        self.assertEqual(summary['exists_many']['requests'], 2)
+        self.assertNotIn('exists', summary)
+
+    def test_timeout_message(self):
+        self.server.latency = 0.2
+        calls = [('exists', lambda: self.logbook.exists(1, timeout=0.05)),
+                 ('count', lambda: self.logbook.count(timeout=0.05)),
+                 ('_get_newest_entries', lambda: self.logbook._get_newest_entries(timeout=0.05))]
+        for name, call in calls:
+            with self.assertRaises(LogbookServerTimeout) as context:
+                call()
+            self.assertTrue(str(context.exception).startswith(name + ' method cannot be completed'))
+
+
+if __name__ == '__main__':
+    unittest.main()
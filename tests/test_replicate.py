@@ -0,0 +1,68 @@
+import json
+import os
+import tempfile
+import unittest
+
+import elog
+from fake_elogd import FakeElogd
+
+
+class TestReplicate(unittest.TestCase):
+
+    def setUp(self):
+        self.server = FakeElogd(logbooks=('src', 'dst')).start()
+        self.src = elog.open(self.server.url('src'))
+        self.dst = elog.open(self.server.url('dst'))
+        self.id_map = os.path.join(tempfile.mkdtemp(), 'ids.jsonl')
+
+        self.server.add_entry('dst', text='existing')
+        self.first = self.server.add_entry('src', text='first', Author='AB', attachments={'a.txt': b'a', 'b.txt': b'b'})
+        self.deleted = self.server.add_entry('src', text='deleted')
+        self.server.logbooks['src'].delete(self.deleted)
+        self.second = self.server.add_entry('src', text='second', Author='CD')
+        self.reply = self.server.add_entry('src', text='reply', in_reply_to=self.first, Author='EF')
+        self.reply_of_reply = self.server.add_entry('src', text='reply of reply', in_reply_to=self.reply)
+
+    def tearDown(self):
+        self.server.stop()
+
+    def test_replicate(self):
+        result = elog.replicate(self.src, self.dst, id_map=self.id_map, workers=2)
+        self.assertEqual(sorted(result.copied), [self.first, self.second, self.reply, self.reply_of_reply])
+        self.assertEqual(result.stages['read'].items, 4)
+        self.assertEqual(result.stages['attachments'].bytes, 2)
+        self.assertEqual(result.stages['post'].items, 4)
+        self.assertGreater(result.stages['post'].throughput, 0)
+
+        for src_id, dst_id in result.copied.items():
+            src_message, src_attributes, src_attachments = self.src.read(src_id)
+            dst_message, dst_attributes, dst_attachments = self.dst.read(dst_id)
+            self.assertEqual(dst_message, src_message)
+            self.assertEqual(dst_attributes.get('Author'), src_attributes.get('Author'))
+            self.assertEqual([self.dst.download_attachment(url) for url in dst_attachments],
+                             [self.src.download_attachment(url) for url in src_attachments])
+
+        # Threads are kept with the new IDs
+        self.assertEqual(self.dst.get_parent(result.copied[self.reply]), result.copied[self.first])
+        self.assertEqual(self.dst.get_parent(result.copied[self.reply_of_reply]), result.copied[self.reply])
+
+        with open(self.id_map) as id_map:
+            self.assertEqual({record['src']: record['dst'] for record in map(json.loads, id_map)}, result.copied)
+
+    def test_resume(self):
+        first_run = elog.replicate(self.src, self.dst, msg_ids=[self.first, self.second], id_map=self.id_map)
+        with open(self.id_map, 'a') as id_map:
+            id_map.write('{"src": 99')  # interrupted while writing
+
+        result = elog.replicate(self.src, self.dst, id_map=self.id_map)
+        self.assertEqual(sorted(result.copied), [self.reply, self.reply_of_reply])
+        self.assertEqual(result.skipped, [self.first, self.second])
+        self.assertEqual(self.dst.get_parent(result.copied[self.reply]), first_run.copied[self.first])
+
+        # Nothing left to copy
+        self.assertEqual(elog.replicate(self.src, self.dst, id_map=self.id_map).copied, {})
+        self.assertEqual(len(self.dst.get_message_ids()), 5)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,71 @@
+import unittest
+
+import elog
+from fake_elogd import FakeElogd
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+try:
+    import pandas
+except ImportError:
+    pandas = None
+
+
+class TestResultSet(unittest.TestCase):
+
+    def setUp(self):
+        self.server = FakeElogd().start()
+        self.logbook = elog.open(self.server.url('demo'))
+        self.first = self.server.add_entry(text='Beam dump', Author='AB', Type='Problem', attachments={'a.txt': b'a'})
+        self.second = self.server.add_entry(text='All fine', Author='CD', Type='Routine')
+        self.third = self.server.add_entry(text='Beam dump again', Author='AB', Type='Problem', Category='Beam')
+
+    def tearDown(self):
+        self.server.stop()
+
+    def test_read_many(self):
+        messages = self.logbook.read_many([self.third, 99, self.first], workers=2)
+        self.assertEqual([message.msg_id for message in messages], [self.third, self.first])
+        self.assertEqual(messages[1], self.logbook.read(self.first))
+
+    def test_columns(self):
+        result = self.logbook.read_many([self.first, self.second, self.third], columnar=True)
+        self.assertEqual(len(result), 3)
+        self.assertEqual(list(result.ids), [self.first, self.second, self.third])
+        self.assertEqual(result['Author'], ['AB', 'CD', 'AB'])
+        self.assertIs(result['Author'][0], result['Author'][2])  # interned
+        self.assertEqual(result['Category'], [None, None, 'Beam'])
+        self.assertEqual(result.texts, ['Beam dump', 'All fine', 'Beam dump again'])
+        self.assertEqual(len(result.attachments[0]), 1)
+
+        searched = self.logbook.read_many({'Type': 'Problem'}, columnar=True)
+        self.assertEqual(sorted(searched.ids), [self.first, self.third])
+
+    def test_from_crawl_pairs(self):
+        pairs = [(msg_id, self.logbook.read(msg_id, raw=True)) for msg_id in (self.first, self.second)]
+        result = elog.ResultSet.from_messages(pairs)
+        self.assertEqual(result['Type'], ['Problem', 'Routine'])
+
+    @unittest.skipIf(numpy is None, 'numpy is not installed')
+    def test_to_numpy(self):
+        arrays = self.logbook.read_many([self.first, self.second, self.third], columnar=True).to_numpy()
+        self.assertEqual(arrays['msg_id'].dtype, numpy.int64)
+        self.assertEqual(arrays['Date'].dtype, numpy.dtype('datetime64[s]'))
+        self.assertFalse(numpy.isnat(arrays['Date']).any())
+        self.assertEqual(list(arrays['Author']), ['AB', 'CD', 'AB'])
+
+    @unittest.skipIf(pandas is None, 'pandas is not installed')
+    def test_to_pandas(self):
+        frame = self.logbook.read_many([self.first, self.second, self.third], columnar=True).to_pandas()
+        self.assertEqual(list(frame.index), [self.first, self.second, self.third])
+        self.assertEqual(frame.groupby('Author', observed=True).size().to_dict(), {'AB': 2, 'CD': 1})
+        self.assertTrue(pandas.api.types.is_datetime64_any_dtype(frame['Date']))
+        self.assertFalse(frame['Date'].isna().any())
+        self.assertEqual(frame.loc[self.second, 'text'], 'All fine')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,68 @@
+import time
+import unittest
+
+import elog
+from fake_elogd import FakeElogd
+
+
+class TestMessageSequence(unittest.TestCase):
+
+    def setUp(self):
+        self.server = FakeElogd().start()
+        self.logbook = elog.open(self.server.url('demo'))
+        self.msg_ids = [self.server.add_entry(text='Message {}'.format(i), Author='AB') for i in range(20)]
+
+    def tearDown(self):
+        self.server.stop()
+
+    def test_lazy_search(self):
+        n_requests = len(self.server.requests)
+        messages = self.logbook.search('message 1', lazy=True)
+        # Only the search, messages are read when used
+        self.assertEqual(len(self.server.requests), n_requests + 1)
+        expected = self.logbook.search('message 1')
+        self.assertEqual(messages.ids, expected)
+        self.assertEqual(len(messages), len(expected))
+        self.assertEqual([message.msg_id for message in messages], expected)
+        self.assertEqual(messages[0], self.logbook.read(expected[0]))
+        self.assertEqual(messages[1:3].ids, expected[1:3])
+
+    def test_deleted_messages_skipped(self):
+        messages = self.logbook.get_message_ids(lazy=True)
+        self.logbook.delete(self.msg_ids[5])
+        self.assertEqual(sorted(message.msg_id for message in messages), sorted(set(self.msg_ids) - {self.msg_ids[5]}))
+
+    def test_prefetch_overlaps_processing(self):
+        self.server.latency = 0.05
+        messages = self.logbook.get_message_ids(lazy=True, prefetch=8)
+        start = time.monotonic()
+        for message in messages:
+            time.sleep(0.02)  # processing of the message
+        # Serial reading would take 20 * (0.05 + 0.02) s
+        self.assertLess(time.monotonic() - start, 0.9)
+
+    def test_early_stop_cancels_reads(self):
+        self.server.latency = 0.02
+        messages = self.logbook.get_message_ids(lazy=True, prefetch=4)
+        n_requests = len(self.server.requests)
+        for i, message in enumerate(messages):
+            if i == 2:
+                break
+        time.sleep(0.2)
+        self.assertLessEqual(len(self.server.requests) - n_requests, 3 + 4)
+
+    def test_connections_reused_across_iterations(self):
+        self.server.latency = 0.01
+        messages = self.logbook.get_message_ids(lazy=True, prefetch=8)
+        for _ in range(3):
+            self.assertEqual(len(list(messages)), len(self.msg_ids))
+        # Listing in the calling thread and at most prefetch reads at once, each iteration reuses the connections
+        self.assertLessEqual(self.server.connections, 1 + 8)
+
+    def test_no_prefetch(self):
+        messages = self.logbook.search('message', 5, lazy=True, prefetch=0)
+        self.assertEqual([message.text for message in messages], ['Message {}'.format(i) for i in range(19, 14, -1)])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,73 @@
+import time
+import unittest
+
+import elog
+from elog.logbook_exceptions import *
+from fake_elogd import FakeElogd
+
+
+class TestLogbookServer(unittest.TestCase):
+
+    def setUp(self):
+        self.server = FakeElogd(logbooks=('Operation', 'Shift Log', 'Test'), users={'user': 'password'}).start()
+        self.url = 'http://127.0.0.1:{}'.format(self.server.port)
+
+    def tearDown(self):
+        self.server.stop()
+
+    def test_logbooks(self):
+        with elog.LogbookServer(self.url, user='user', password='password') as server:
+            self.assertEqual(server.logbooks(), ['Operation', 'Shift Log', 'Test'])
+            logbook = server['Shift Log']
+            self.assertIs(server.logbook('Shift Log'), logbook)
+            msg_id = logbook.post('Hello', Author='AB')
+            self.assertEqual(logbook.read(msg_id)[0], 'Hello')
+            self.assertEqual(self.server.logbooks['Shift Log'].entries[msg_id].text, 'Hello')
+
+    def test_shared_session(self):
+        server = elog.LogbookServer(self.url, user='user', password='password', session_login=True)
+        for name in ('Operation', 'Shift Log', 'Test'):
+            server[name].get_message_ids()
+        # One login for all logbooks, all other requests use the session
+        self.assertEqual(len(self.server.sessions), 1)
+        self.assertEqual(len(self.server.requests), 4)
+
+    def test_search(self):
+        hello = self.server.add_entry('Operation', text='Hello World')
+        self.server.add_entry('Operation', text='Other')
+        hello_test = self.server.add_entry('Test', text='hello')
+
+        server = elog.LogbookServer(self.url, user='user', password='password')
+        self.assertEqual(server.search('hello'), {'Operation': [hello], 'Shift Log': [], 'Test': [hello_test]})
+        self.assertEqual(server.search('hello', logbooks=['Test']), {'Test': [hello_test]})
+        self.assertEqual(server.map(lambda logbook: logbook.count()), {'Operation': 2, 'Shift Log': 0, 'Test': 1})
+
+    def test_map_deadline(self):
+        server = elog.LogbookServer(self.url, user='user', password='password')
+        self.server.latency = 0.1
+        start = time.perf_counter()
+        self.assertRaises(LogbookServerTimeout, server.map,
+                          lambda logbook: [logbook.count() for _ in range(10)], workers=3, deadline=0.5)
+        self.assertLess(time.perf_counter() - start, 0.9)
+
+    def test_map_reuses_connections(self):
+        with elog.LogbookServer(self.url, user='user', password='password') as server:
+            for _ in range(3):
+                server.map(lambda logbook: logbook.count(), workers=3)
+            self.assertLessEqual(self.server.connections, 3)
+
+            connections = self.server.connections
+            server.close()
+            server['Test'].count()
+            self.assertEqual(self.server.connections, connections + 1)
+
+    def test_logbooks_timeout(self):
+        server = elog.LogbookServer(self.url, user='user', password='password')
+        self.server.latency = 0.2
+        with self.assertRaises(LogbookServerTimeout) as context:
+            server.logbooks(timeout=0.05)
+        self.assertTrue(str(context.exception).startswith('logbooks method cannot be completed'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,81 @@
+import threading
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+import elog
+from fake_elogd import FakeElogd
+
+
+class TestThreadSafety(unittest.TestCase):
+
+    n_threads = 16
+    n_iterations = 10
+
+    def setUp(self):
+        self.server = FakeElogd(users={'user': 'password'}).start()
+        self.logbook = elog.open(self.server.url('demo'), user='user', password='password', session_login=True)
+
+    def tearDown(self):
+        self.server.stop()
+
+    def _worker(self, worker_id):
+        results = list()
+        for i in range(self.n_iterations):
+            subject = 'worker {} message {}'.format(worker_id, i)
+            msg_id = self.logbook.post('text of ' + subject, attributes={'Author': 'py_elog', 'Subject': subject})
+            self.logbook.post('edited ' + subject, msg_id=msg_id, Type='Routine')
+            message, attributes, attachments = self.logbook.read(msg_id)
+            results.append((msg_id, subject, message, attributes))
+        return results
+
+    def test_shared_instance(self):
+        with ThreadPoolExecutor(self.n_threads) as executor:
+            results = [r for worker in executor.map(self._worker, range(self.n_threads)) for r in worker]
+
+        msg_ids = [r[0] for r in results]
+        self.assertEqual(len(set(msg_ids)), self.n_threads * self.n_iterations)
+        for msg_id, subject, message, attributes in results:
+            self.assertEqual(message, 'edited ' + subject)
+            self.assertEqual(attributes['Subject'], subject)
+            self.assertEqual(attributes['Type'], 'Routine')
+        self.assertEqual(sorted(self.logbook.get_message_ids()), sorted(msg_ids))
+
+    def test_shared_instance_with_expiring_sessions(self):
+        stop = threading.Event()
+
+        def expire():
+            while not stop.wait(0.2):
+                self.server.expire_sessions()
+
+        expiring = threading.Thread(target=expire)
+        expiring.start()
+        try:
+            with ThreadPoolExecutor(self.n_threads) as executor:
+                results = [r for worker in executor.map(self._worker, range(self.n_threads)) for r in worker]
+        finally:
+            stop.set()
+            expiring.join()
+        self.assertEqual(len(set(r[0] for r in results)), self.n_threads * self.n_iterations)
+
+    def test_login_once(self):
+        with ThreadPoolExecutor(self.n_threads) as executor:
+            list(executor.map(lambda i: self.logbook.get_message_ids(), range(self.n_threads * 4)))
+        # Only the login request carries credentials, the server issued exactly one session
+        self.assertEqual(len(self.server.sessions), 1)
+
+    def test_caller_dicts_not_modified(self):
+        attributes = {'Author': 'py_elog', 'Subject': 'not modified'}
+        msg_id = self.logbook.post('text', attributes=attributes, encoding='plain', suppress_email_notification=True)
+        self.assertEqual(attributes, {'Author': 'py_elog', 'Subject': 'not modified'})
+
+        self.logbook.post('edited', msg_id=msg_id, attributes=attributes)
+        self.assertEqual(attributes, {'Author': 'py_elog', 'Subject': 'not modified'})
+
+        message, read_attributes, attachments = self.logbook.read(msg_id)
+        copy = dict(read_attributes)
+        self.logbook.delete_attachment(msg_id, message, read_attributes, 0)
+        self.assertEqual(read_attributes, copy)
+
+
+if __name__ == '__main__':
+    unittest.main()
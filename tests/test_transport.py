@@ -0,0 +1,128 @@
+import gzip
+import io
+import os
+import pickle
+import shutil
+import tempfile
+import time
+import unittest
+
+import elog
+from elog.logbook_exceptions import *
+from fake_elogd import FakeElogd
+
+
+class TestRecordReplay(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.cassette = os.path.join(self.directory, 'session.cassette.gz')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def _session(self, logbook):
+        """ Some traffic: returns everything read back from the server."""
+        attachment = io.BytesIO(b'attachment content')
+        attachment.name = 'file.txt'
+        msg_id = logbook.post('Recorded message', attributes={'Author': 'me', 'Subject': 'record'},
+                              attachments=[attachment])
+        logbook.post('Edited message', msg_id=msg_id)
+        message, attributes, attachments = logbook.read(msg_id)
+        return (msg_id, message, attributes, logbook.download_attachment(attachments[0]), logbook.search('edited'),
+                logbook.get_message_ids())
+
+    def _record(self, **kwargs):
+        with FakeElogd(users={'user': 'password'}, **kwargs) as server:
+            with elog.RecordingTransport(self.cassette) as transport:
+                logbook = elog.open(server.url('demo'), user='user', password='password', session_login=True,
+                                    transport=transport)
+                return server, self._session(logbook)
+
+    def test_replay(self):
+        server, recorded = self._record()
+
+        transport = elog.ReplayTransport(self.cassette, speed=None)
+        # Different host, credentials are not needed to replay
+        logbook = elog.open('http://replay.example.com/demo/', user='user', password='other', session_login=True,
+                            transport=transport)
+        self.assertEqual(self._session(logbook), recorded)
+        self.assertEqual(transport.remaining(), 0)
+
+        # Nothing more recorded
+        self.assertRaises(LogbookServerProblem, logbook.get_message_ids)
+
+    def test_credentials_not_recorded(self):
+        server, recorded = self._record()
+        with gzip.open(self.cassette, 'rt') as cassette:
+            content = cassette.read()
+        self.assertNotIn(server.users['user'], content)
+        for sid in server.sessions:
+            self.assertNotIn(sid, content)
+        self.assertIn('sid=REDACTED', content)
+
+    def test_replay_timing(self):
+        server, recorded = self._record(latency=0.05)
+
+        start = time.perf_counter()
+        self._session(elog.open('http://127.0.0.1/demo/', transport=elog.ReplayTransport(self.cassette, speed=None)))
+        fast = time.perf_counter() - start
+
+        start = time.perf_counter()
+        self._session(elog.open('http://127.0.0.1/demo/', transport=elog.ReplayTransport(self.cassette, speed=1.0)))
+        recorded_speed = time.perf_counter() - start
+
+        self.assertGreater(recorded_speed, 0.05 * len(server.requests) * 0.8)
+        self.assertLess(fast, recorded_speed)
+
+    def test_replay_timeout(self):
+        self._record(latency=0.2)
+        logbook = elog.open('http://127.0.0.1/demo/', transport=elog.ReplayTransport(self.cassette))
+        self.assertRaises(LogbookServerTimeout, logbook.post, 'Recorded message', timeout=0.01)
+        self.assertRaises(LogbookServerTimeout, logbook.post, 'Recorded message', timeout=(3.05, 0.01))
+
+    def test_replay_timeout_tuple(self):
+        self._record(latency=0.05)
+        logbook = elog.open('http://127.0.0.1/demo/', transport=elog.ReplayTransport(self.cassette))
+        # No read timeout, only the connect timeout which does not apply to replayed requests
+        msg_id = logbook.post('Recorded message', attributes={'Author': 'me', 'Subject': 'record'},
+                              timeout=(3.05, None))
+        self.assertEqual(logbook.post('Edited message', msg_id=msg_id, timeout=(0.01, 3.05)), msg_id)
+
+
+class TestRequestsTransport(unittest.TestCase):
+
+    def setUp(self):
+        self.server = FakeElogd(latency=0.01).start()
+        self.ids = [self.server.add_entry(text='Message {}'.format(i), Author='me') for i in range(20)]
+        self.transport = elog.RequestsTransport()
+        self.logbook = elog.open(self.server.url('demo'), transport=self.transport)
+
+    def tearDown(self):
+        self.transport.close()
+        self.server.stop()
+
+    def test_connections_reused_by_bulk_calls(self):
+        for _ in range(3):
+            self.assertEqual(len(self.logbook.read_many(self.ids, workers=4)), len(self.ids))
+        # Thread pool of each call uses the same pooled connections
+        self.assertLessEqual(self.server.connections, 4)
+
+    def test_close(self):
+        self.logbook.read_many(self.ids, workers=4)
+        connections = self.server.connections
+        self.transport.close()
+        # Closed connections are opened again when needed
+        self.logbook.read(self.ids[0])
+        self.assertEqual(self.server.connections, connections + 1)
+
+    def test_pickle(self):
+        self.logbook.read(self.ids[0])
+        transport = pickle.loads(pickle.dumps(self.transport))
+        logbook = elog.open(self.server.url('demo'), transport=transport)
+        self.assertEqual(logbook.read(self.ids[0])[0], 'Message 0')
+        transport.close()
+
+
+if __name__ == '__main__':
+    unittest.main()